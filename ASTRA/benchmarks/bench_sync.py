@@ -0,0 +1,246 @@
+# bench_sync.py
+"""
+Reproducible benchmarks for the sync engine.
+
+Builds synthetic source trees in a temp directory, runs SyncEngine.sync() on them
+headlessly and writes the results as JSON, so runs from different releases can be
+compared:
+
+    python benchmarks/bench_sync.py --output bench.json
+    python benchmarks/bench_sync.py --scale 1 --cases tiny resync   # full-size trees
+
+Each case runs in its own subprocess so peak RSS is per case. '--scale 1' gives the
+full shapes (1M tiny files, 4 x 1 GiB, ...); the default 0.01 finishes in a minute
+or two. Read/write syscall counts come from /proc/self/io and are null on platforms
+without it; the kernel copy calls (FICLONE, copy_file_range, sendfile) are counted by
+fastcopy itself, as /proc/self/io does not see a FICLONE.
+"""
+import argparse
+import json
+import os
+import platform
+import queue
+import random
+import shutil
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from datetime import datetime, timezone
+
+SRC_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir, "src")
+sys.path.insert(0, os.path.abspath(SRC_DIR))
+
+CASES = ["tiny", "huge", "deep", "resync"]
+SEED = 1234
+
+
+# -------------------------
+# Synthetic trees
+# -------------------------
+def _write(path, rng, size):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "wb") as f:
+        while size > 0:
+            n = min(size, 1024 * 1024)
+            f.write(rng.randbytes(n))
+            size -= n
+
+
+def build_tiny(root, scale, rng):
+    """Many small files (1M at scale 1), 1000 per directory."""
+    count = max(1, int(1_000_000 * scale))
+    for i in range(count):
+        _write(os.path.join(root, f"dir{i // 1000:05d}", f"file{i:07d}.dat"), rng, rng.randint(64, 4096))
+
+
+def build_huge(root, scale, rng):
+    """A few huge files (4 x 1 GiB at scale 1, never below 8 MiB each)."""
+    size = max(8 * 1024 * 1024, int(1024 ** 3 * scale))
+    for i in range(4):
+        _write(os.path.join(root, f"image{i}.bin"), rng, size)
+
+
+def build_deep(root, scale, rng):
+    """Deep nesting: branches 40 directories deep with a few files at every level."""
+    branches = max(1, int(500 * scale))
+    for b in range(branches):
+        path = os.path.join(root, f"branch{b:04d}")
+        for depth in range(40):
+            path = os.path.join(path, f"level{depth:02d}")
+            for i in range(3):
+                _write(os.path.join(path, f"f{i}.txt"), rng, rng.randint(64, 2048))
+
+
+def build_resync(root, scale, rng):
+    """Same shape as 'tiny' at a tenth of the size; it is synced once before measuring."""
+    build_tiny(root, scale / 10, rng)
+
+
+def touch_some(root, fraction, rng):
+    """Modify 'fraction' of the files under root, for the re-sync case."""
+    changed = 0
+    for dirpath, dirs, files in os.walk(root):
+        dirs.sort()
+        for name in sorted(files):
+            if rng.random() < fraction:
+                with open(os.path.join(dirpath, name), "ab") as f:
+                    f.write(b"changed")
+                changed += 1
+    # make sure the new mtimes are strictly later than the synced copies
+    time.sleep(0.01)
+    return changed
+
+
+BUILDERS = {"tiny": build_tiny, "huge": build_huge, "deep": build_deep, "resync": build_resync}
+
+
+# -------------------------
+# Measuring one case
+# -------------------------
+def _proc_io():
+    try:
+        with open("/proc/self/io") as f:
+            fields = dict(line.split(":", 1) for line in f)
+        return int(fields["syscr"]), int(fields["syscw"])
+    except (OSError, KeyError, ValueError):
+        return None
+
+
+def _peak_rss_kb():
+    try:
+        import resource
+    except ImportError:  # Windows
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # macOS reports bytes, Linux kilobytes
+    return peak // 1024 if sys.platform == "darwin" else peak
+
+
+def _drain(engine, stop, counts):
+    # keep the queue from growing like a UI that never polls; count what it would show
+    while not stop.is_set() or not engine.msg_queue.empty():
+        try:
+            mtype, _ = engine.msg_queue.get(timeout=0.1)
+        except queue.Empty:
+            continue
+        counts[mtype] = counts.get(mtype, 0) + 1
+
+
+def run_case(name, scale, workdir, workers):
+    import fastcopy
+    from engine import SyncEngine
+
+    rng = random.Random(SEED)
+    source = os.path.join(workdir, "source")
+    destination = os.path.join(workdir, "destination")
+    os.makedirs(source)
+    os.makedirs(destination)
+    BUILDERS[name](source, scale, rng)
+
+    engine = SyncEngine(last_backup_file=os.path.join(workdir, "last_backup.txt"))
+    engine.copy_workers = workers
+
+    changed = None
+    if name == "resync":
+        engine.sync(source, destination)
+        while not engine.msg_queue.empty():
+            engine.msg_queue.get_nowait()
+        changed = touch_some(source, 0.01, rng)
+
+    counts = {}
+    stop = threading.Event()
+    drainer = threading.Thread(target=_drain, args=(engine, stop, counts), daemon=True)
+    drainer.start()
+
+    io_before = _proc_io()
+    kernel_before = fastcopy.call_counts()
+    start = time.perf_counter()
+    engine.sync(source, destination)
+    elapsed = time.perf_counter() - start
+    io_after = _proc_io()
+    kernel_after = fastcopy.call_counts()
+    stop.set()
+    drainer.join()
+
+    files = engine.total_files_to_process
+    total_bytes = engine.total_bytes_to_copy
+    return {
+        "case": name,
+        "scale": scale,
+        "workers": workers,
+        "files": files,
+        "bytes": total_bytes,
+        "bytes_copied": engine.bytes_copied,
+        "files_modified": changed,
+        "seconds": round(elapsed, 4),
+        "files_per_s": round(files / elapsed, 1) if elapsed else None,
+        "mb_per_s": round(engine.bytes_copied / (1024 * 1024) / elapsed, 2) if elapsed else None,
+        "read_syscalls": io_after[0] - io_before[0] if io_before and io_after else None,
+        "write_syscalls": io_after[1] - io_before[1] if io_before and io_after else None,
+        "kernel_copy_calls": {m: kernel_after[m] - kernel_before[m] for m in kernel_after},
+        "peak_rss_kb": _peak_rss_kb(),
+        "errors": counts.get("error", 0),
+        # where the time went, summed over threads (see metrics.SyncMetrics)
+        "phases": engine.metrics.report()["phases"],
+    }
+
+
+# -------------------------
+# Driver
+# -------------------------
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the ASTRA sync engine")
+    parser.add_argument("--cases", nargs="+", choices=CASES, default=CASES)
+    parser.add_argument("--scale", type=float, default=0.01, help="tree size factor (1 = full size)")
+    parser.add_argument("--workers", type=int, default=4, help="copy workers (default 4)")
+    parser.add_argument("--output", help="write the JSON report here (default: stdout)")
+    parser.add_argument("--tmpdir", help="where to build the trees (default: system temp)")
+    parser.add_argument("--run-case", help=argparse.SUPPRESS)  # internal: one case in this process
+    args = parser.parse_args(argv)
+
+    if args.run_case:
+        workdir = tempfile.mkdtemp(prefix="astra-bench-", dir=args.tmpdir)
+        try:
+            result = run_case(args.run_case, args.scale, workdir, args.workers)
+        finally:
+            shutil.rmtree(workdir, ignore_errors=True)
+        json.dump(result, sys.stdout)
+        return 0
+
+    results = []
+    for name in args.cases:
+        cmd = [sys.executable, os.path.abspath(__file__), "--run-case", name,
+               "--scale", str(args.scale), "--workers", str(args.workers)]
+        if args.tmpdir:
+            cmd += ["--tmpdir", args.tmpdir]
+        proc = subprocess.run(cmd, capture_output=True, text=True)
+        if proc.returncode != 0:
+            print(f"{name}: failed\n{proc.stderr}", file=sys.stderr)
+            results.append({"case": name, "error": proc.stderr.strip().splitlines()[-1:]})
+            continue
+        result = json.loads(proc.stdout)
+        results.append(result)
+        print(f"{name:>7}: {result['files']} files in {result['seconds']:.2f}s, "
+              f"{result['files_per_s']} files/s, {result['mb_per_s']} MB/s, "
+              f"peak RSS {result['peak_rss_kb']} KB", file=sys.stderr)
+
+    report = {
+        "timestamp": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpu_count": os.cpu_count(),
+        "results": results,
+    }
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+    else:
+        json.dump(report, sys.stdout, indent=2)
+        print()
+    return 1 if any("error" in r for r in results) else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,259 @@
+# replay_trace.py
+"""
+Replay a workload trace (astra_cli.py --trace) against scratch directories and
+measure how the watcher and the incremental sync keep up:
+
+    python benchmarks/replay_trace.py storm.trace.gz                 at the recorded pace
+    python benchmarks/replay_trace.py storm.trace.gz --speed 10      ten times faster
+    python benchmarks/replay_trace.py storm.trace.gz --speed 0       as fast as possible
+
+The recorded events are turned back into file operations (files are written
+with their recorded sizes, deleted, moved) in an empty scratch source that a
+SyncEngine watches, exactly as in watch mode. Once the operations are applied
+the tool waits for the destination to settle and writes a JSON report: how far
+the replay fell behind the trace, how many syncs ran and how long they took,
+the largest dirty-path backlog, and the recording's own sync times for
+comparison. '--record' traces the replay itself.
+"""
+import argparse
+import json
+import os
+import platform
+import queue
+import shutil
+import sys
+import tempfile
+import time
+from datetime import datetime, timezone
+
+SRC_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir, "src")
+sys.path.insert(0, os.path.abspath(SRC_DIR))
+
+from workload_trace import read_trace  # noqa: E402
+
+CHUNK = 1024 * 1024
+
+
+# -------------------------
+# Turning events back into file operations
+# -------------------------
+def _write(path, size, fill):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    block = bytes([fill % 256]) * min(size, CHUNK)
+    with open(path, "wb") as f:
+        while size > 0:
+            n = min(size, CHUNK)
+            f.write(block[:n])
+            size -= n
+
+
+def apply_event(root, record, serial):
+    """Perform one ["E", ...] record under 'root'. Returns False if there was nothing to do."""
+    _, _, kind, rel, is_dir, size, dest_rel = record
+    path = os.path.join(root, rel)
+    if kind in ("created", "modified"):
+        if is_dir:
+            os.makedirs(path, exist_ok=True)
+            return kind == "created"
+        # the content is made up; a changing fill byte makes every write a real change
+        _write(path, size or 0, serial)
+        return True
+    if kind == "deleted":
+        if os.path.isdir(path) and not os.path.islink(path):
+            shutil.rmtree(path, ignore_errors=True)
+        elif os.path.lexists(path):
+            os.remove(path)
+        else:
+            return False
+        return True
+    if kind == "moved" and dest_rel:
+        target = os.path.join(root, dest_rel)
+        if not os.path.lexists(path):
+            return False
+        os.makedirs(os.path.dirname(target), exist_ok=True)
+        os.replace(path, target)
+        return True
+    return False
+
+
+def summarize_recording(records):
+    """Split a trace into its events and the recorded syncs' durations."""
+    events, syncs = [], []
+    for record in records:
+        if record[0] == "E":
+            events.append(record)
+        elif record[0] == "F":
+            syncs.append(record[3])
+    return events, syncs
+
+
+# -------------------------
+# Replay
+# -------------------------
+def _drain(engine, counts):
+    while True:
+        try:
+            mtype, _ = engine.msg_queue.get_nowait()
+        except queue.Empty:
+            return
+        counts[mtype] = counts.get(mtype, 0) + 1
+
+
+def replay(trace_path, speed, workdir, workers, debounce, settle_timeout, record=None):
+    from engine import SyncEngine
+
+    header, records = read_trace(trace_path)
+    events, recorded_syncs = summarize_recording(records)
+    source = os.path.join(workdir, "source")
+    destination = os.path.join(workdir, "destination")
+    os.makedirs(source)
+    os.makedirs(destination)
+
+    engine = SyncEngine(last_backup_file=os.path.join(workdir, "last_backup.txt"))
+    engine.copy_workers = workers
+    if debounce is not None:
+        engine.dirty_paths.debounce = debounce
+    watch_lines = [0]
+
+    def count_line(line):
+        watch_lines[0] += 1
+
+    if record:
+        engine.start_trace(record, source)
+    engine.start_watch(source, destination, logger=count_line)
+    time.sleep(0.5)  # let the observer settle before the first operation
+
+    counts = {}
+    syncs = []
+    max_dirty = 0
+    applied = skipped = 0
+    max_lag = 0.0
+    was_running = False
+
+    def poll():
+        nonlocal max_dirty, was_running
+        running = engine.is_running()
+        if was_running and not running:
+            syncs.append(engine.metrics.seconds)
+        was_running = running
+        if not running:
+            engine.sync_dirty_paths(source, destination)
+            was_running = engine.is_running()
+        max_dirty = max(max_dirty, len(engine.dirty_paths))
+        _drain(engine, counts)
+
+    start = time.monotonic()
+    last_poll = 0.0
+    for serial, event in enumerate(events):
+        if speed > 0:
+            due = start + event[1] / 1000.0 / speed
+            while True:
+                now = time.monotonic()
+                if now - last_poll >= 0.1:
+                    poll()
+                    last_poll = now
+                if now >= due:
+                    break
+                time.sleep(min(0.05, due - now))
+            max_lag = max(max_lag, time.monotonic() - due)
+        elif time.monotonic() - last_poll >= 0.1:
+            poll()
+            last_poll = time.monotonic()
+        try:
+            if apply_event(source, event, serial):
+                applied += 1
+            else:
+                skipped += 1
+        except OSError:
+            skipped += 1
+    applied_at = time.monotonic()
+
+    # wait until every change has made it through the debounce and a sync
+    deadline = applied_at + settle_timeout
+    settled = False
+    while time.monotonic() < deadline:
+        poll()
+        if not len(engine.dirty_paths) and not engine.is_running():
+            # one more debounce period: late events may still arrive
+            time.sleep(engine.dirty_paths.debounce + 0.2)
+            poll()
+            if not len(engine.dirty_paths) and not engine.is_running():
+                settled = True
+                break
+        time.sleep(0.1)
+    finished_at = time.monotonic()
+    engine.stop_watch()
+    engine.cancel()
+    if engine.sync_thread:
+        engine.sync_thread.join()
+    if record:
+        engine.stop_trace()
+    _drain(engine, counts)
+
+    return {
+        "trace": os.path.abspath(trace_path),
+        "recorded_source": header.get("source"),
+        "recorded_seconds": round(events[-1][1] / 1000.0, 3) if events else 0,
+        "speed": speed,
+        "events": len(events),
+        "operations_applied": applied,
+        "operations_skipped": skipped,
+        "apply_seconds": round(applied_at - start, 3),
+        "max_lag_seconds": round(max_lag, 3),
+        "settled": settled,
+        "settle_seconds": round(finished_at - applied_at, 3),
+        "watch_log_lines": watch_lines[0],
+        "max_dirty_paths": max_dirty,
+        "syncs": len(syncs),
+        "sync_seconds_total": round(sum(s for s in syncs if s), 3),
+        "sync_seconds_max": round(max((s for s in syncs if s), default=0), 3),
+        "recorded_syncs": len(recorded_syncs),
+        "recorded_sync_seconds_total": round(sum(recorded_syncs), 3),
+        "errors": counts.get("error", 0),
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Replay an ASTRA workload trace and measure the sync")
+    parser.add_argument("trace", help="trace file written with astra_cli.py --trace")
+    parser.add_argument("--speed", type=float, default=1.0, help="time factor (default 1; 0 = no waiting)")
+    parser.add_argument("--workers", type=int, default=4, help="copy workers (default 4)")
+    parser.add_argument("--debounce", type=float, help="override the dirty-path debounce (seconds)")
+    parser.add_argument("--settle-timeout", type=float, default=300,
+                        help="give up waiting for the destination after this many seconds (default 300)")
+    parser.add_argument("--record", help="also trace the replay itself to this file")
+    parser.add_argument("--output", help="write the JSON report here (default: stdout)")
+    parser.add_argument("--tmpdir", help="where to create the scratch directories (default: system temp)")
+    parser.add_argument("--keep", action="store_true", help="keep the scratch directories")
+    args = parser.parse_args(argv)
+
+    workdir = tempfile.mkdtemp(prefix="astra-replay-", dir=args.tmpdir)
+    try:
+        result = replay(args.trace, args.speed, workdir, args.workers, args.debounce, args.settle_timeout,
+                        args.record)
+    finally:
+        if args.keep:
+            print(f"Scratch directories kept in {workdir}", file=sys.stderr)
+        else:
+            shutil.rmtree(workdir, ignore_errors=True)
+
+    report = {
+        "timestamp": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "result": result,
+    }
+    print(f"{result['operations_applied']} operations in {result['apply_seconds']:.2f}s "
+          f"(max lag {result['max_lag_seconds']:.2f}s), {result['syncs']} sync(s), "
+          f"settled after {result['settle_seconds']:.2f}s", file=sys.stderr)
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+    else:
+        json.dump(report, sys.stdout, indent=2)
+        print()
+    return 0 if result["settled"] and not result["errors"] else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,12 +1,14 @@
 # astra.py
+import multiprocessing
 import os
 import sys
 import tkinter as tk
 
-from PIL import ImageTk, Image
-
 from intro import IntroFrame
-from main import MainFrame
+from settings import load_settings
+
+SKIP_KEYS = ("<Button-1>", "<Return>", "<space>")
+
 
 def resource_path(relative_path):
     """Get absolute path to resource, works for dev and PyInstaller"""
@@ -18,32 +20,55 @@ def resource_path(relative_path):
     return os.path.join(base_path, relative_path)
 
 class App(tk.Tk):
-    def __init__(self):
+    def __init__(self, show_intro=True):
         super().__init__()
+        self.title("ASTRA – Advanced Sync & Tracking for Replication Automation")
+        self.attributes('-fullscreen', True)
+        self.bind("<Escape>", lambda e: self.destroy())
+        self.main_ui = None
+
+        if show_intro:
+            self.intro = IntroFrame(self, self.show_main)
+            self.intro.pack(fill='both', expand=True)
+            for key in SKIP_KEYS:
+                self.bind(key, lambda e: self.intro.skip())
+            # let the intro paint first; the main screen (PIL, engine, warm-up scan) is built behind it
+            self.after(50, self.build_main)
+        else:
+            self.intro = None
+            self.show_main()
+
+    def set_icon(self):
         # Use iconphoto() with Pillow to set the icon
         try:
+            from PIL import ImageTk, Image
+
             icon_image = Image.open(resource_path('logo.ico'))
-            icon_photo = ImageTk.PhotoImage(icon_image)
+            self.icon_photo = ImageTk.PhotoImage(icon_image)
             # 'False' is for setting icon for all windows, 'True' for this window only
-            self.iconphoto(False, icon_photo)
+            self.iconphoto(False, self.icon_photo)
         except Exception as e:
             # Fallback if there's an issue with the icon
             print(f"Failed to set window icon: {e}")
 
-        self.title("ASTRA – Advanced Sync & Tracking for Replication Automation")
-        self.attributes('-fullscreen', True)
-
-        self.intro = IntroFrame(self, self.show_main)
-        self.main_ui = MainFrame(self)
+    def build_main(self):
+        if self.main_ui is None:
+            from main import MainFrame
 
-        self.intro.pack(fill='both', expand=True)
-        self.bind("<Escape>", lambda e: self.destroy())
+            self.set_icon()
+            self.main_ui = MainFrame(self)
 
     def show_main(self):
-        self.intro.pack_forget()
+        self.build_main()
+        if self.intro is not None:
+            for key in SKIP_KEYS:
+                self.unbind(key)
+            self.intro.pack_forget()
         self.main_ui.pack(fill='both', expand=True)
 
 
 if __name__ == "__main__":
-    app = App()
+    multiprocessing.freeze_support()  # compression worker processes in a frozen build
+    show_intro = "--no-intro" not in sys.argv[1:] and load_settings().get("show_intro", True)
+    app = App(show_intro=show_intro)
     app.mainloop()
@@ -0,0 +1,303 @@
+# astra_cli.py
+"""
+Headless ASTRA: run backups without Tk, e.g. on a server or under systemd.
+
+    python astra_cli.py SOURCE DEST                  one sync, then exit
+    python astra_cli.py SOURCE DEST --interval 60    full sync every 60 minutes
+    python astra_cli.py SOURCE DEST --schedule "0 2 * * *"   every night at 02:00
+    python astra_cli.py SOURCE DEST --watch          copy changes as they happen,
+                                                     full sync every --interval minutes
+    python astra_cli.py --jobs jobs.json             many source/destination pairs, see jobs.load_jobs()
+"""
+import argparse
+import os
+import queue
+import signal
+import sys
+import threading
+import time
+
+from engine import SyncEngine, human_readable
+from jobs import JobScheduler, load_jobs
+from schedule import BackupScheduler, CronExpression, Interval
+from compress import SUFFIXES
+from throttle import MB, RateLimiter, parse_rate_schedule
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="ASTRA headless backup")
+    parser.add_argument("source", nargs="?", help="directory to back up")
+    parser.add_argument("destination", nargs="?", help="directory to back up into")
+    parser.add_argument("--jobs", help="JSON file with several backup jobs, run concurrently per device")
+    parser.add_argument("--interval", type=float, default=0,
+                        help="minutes between full syncs; 0 runs once and exits (default)")
+    parser.add_argument("--schedule", type=CronExpression, metavar="CRON",
+                        help='run at the times of a cron expression instead, e.g. "0 2 * * *" or @daily; '
+                             "a run missed while the machine was off or asleep is caught up once")
+    parser.add_argument("--watch", action="store_true",
+                        help="also copy changes as watchdog reports them (needs --interval as safety net)")
+    parser.add_argument("--verify", action="store_true",
+                        help="instead of syncing, hash source and destination and report files that differ")
+    parser.add_argument("--force", action="store_true", help="recopy files even if they look unchanged")
+    parser.add_argument("--workers", type=int, default=4, help="parallel file copies (default 4)")
+    parser.add_argument("--object-store", action="store_true",
+                        help="deduplicate contents in a hardlinked object store under the destination")
+    parser.add_argument("--compress", choices=sorted(SUFFIXES), default=None,
+                        help="store files compressed with this codec (already compressed data is copied as is)")
+    parser.add_argument("--compress-level", type=int, default=6, help="compression level (default 6)")
+    parser.add_argument("--exclude", action="append", default=[], metavar="PATTERN",
+                        help="gitignore-style rule, repeatable (e.g. node_modules/, '*.tmp', '!keep.tmp'); "
+                             "the source's .astraignore is read as well")
+    parser.add_argument("--exclude-from", metavar="FILE", help="read more rules from FILE, one per line")
+    parser.add_argument("--mirror", action="store_true",
+                        help="also apply renames and deletions in the source to the destination")
+    parser.add_argument("--trash-days", type=float, default=30,
+                        help="with --mirror, keep deleted files in .astra_trash this many days (0 = delete at once)")
+    parser.add_argument("--snapshot", action="store_true",
+                        help="write each run as a new snapshot under DEST/snapshots, hardlinking unchanged "
+                             "files from the previous one")
+    parser.add_argument("--keep-last", type=int, default=3, help="with --snapshot, newest snapshots always kept")
+    parser.add_argument("--keep-hourly", type=int, default=24, help="with --snapshot, hours to keep one snapshot of")
+    parser.add_argument("--keep-daily", type=int, default=7, help="with --snapshot, days to keep one snapshot of")
+    parser.add_argument("--keep-weekly", type=int, default=8, help="with --snapshot, weeks to keep one snapshot of "
+                                                                   "(all four 0: keep every snapshot)")
+    parser.add_argument("--physical-order", nargs="?", const="inode", choices=["inode", "fiemap"],
+                        help="copy files in on-disk order (by inode, or by FIEMAP extent) with readahead hints; "
+                             "for spinning-disk sources, best with --workers 1")
+    parser.add_argument("--max-rate", type=float, default=0,
+                        help="cap on the combined copy rate in MB/s (default: unlimited)")
+    parser.add_argument("--rate-schedule", default="",
+                        help='time-of-day caps overriding --max-rate, e.g. "9-18=20,18-9=0" (0 = unlimited)')
+    parser.add_argument("--metrics-json", help="write a timing/throughput report (JSON) here after every sync")
+    parser.add_argument("--metrics-prom",
+                        help="write sync metrics as a Prometheus textfile (e.g. into the node exporter's "
+                             "textfile directory, name ending in .prom); with --jobs, {job} is the job name")
+    parser.add_argument("--trace", metavar="FILE",
+                        help="record watchdog events and sync decisions to FILE (gzipped), "
+                             "for benchmarks/replay_trace.py")
+    parser.add_argument("--last-backup-file", default="last_backup.txt",
+                        help="where to record the time of the last finished sync")
+    parser.add_argument("--quiet", action="store_true", help="only print errors and the final summary")
+    args = parser.parse_args(argv)
+    if args.jobs:
+        if args.source or args.destination or args.watch:
+            parser.error("--jobs cannot be combined with SOURCE/DEST or --watch")
+    elif not (args.source and args.destination):
+        parser.error("SOURCE and DEST are required (or use --jobs)")
+    if args.snapshot and (args.mirror or args.watch):
+        parser.error("--snapshot cannot be combined with --mirror or --watch")
+    if args.trace and args.jobs:
+        parser.error("--trace cannot be combined with --jobs")
+    if args.verify and (args.jobs or args.watch):
+        parser.error("--verify cannot be combined with --jobs or --watch")
+    if args.schedule and args.interval > 0:
+        parser.error("use either --interval or --schedule")
+    if args.watch and args.interval <= 0 and not args.schedule:
+        parser.error("--watch needs --interval (or --schedule) for the periodic full scan")
+    return args
+
+
+class HeadlessRunner:
+    """Drives a SyncEngine (or a JobScheduler) on a plain loop: scheduled syncs, watch mode and message printing."""
+
+    def __init__(self, engine, args, out=sys.stdout, scheduler=None):
+        self.engine = engine
+        self.scheduler = scheduler
+        self.msg_queue = scheduler.msg_queue if scheduler else engine.msg_queue
+        self.args = args
+        self.out = out
+        self.shutdown = threading.Event()
+        self.errors = 0
+        self._last_progress = None
+
+    def request_shutdown(self, *_):
+        self.shutdown.set()
+        if self.scheduler:
+            self.scheduler.cancel_all()
+        else:
+            self.engine.cancel()
+
+    def run(self):
+        if self.scheduler:
+            return self._run_jobs()
+        args = self.args
+        source = os.path.abspath(args.source)
+        destination = os.path.abspath(args.destination)
+        if not os.path.isdir(source) or not os.path.isdir(destination):
+            print("Invalid source or destination.", file=self.out)
+            return 2
+
+        if args.trace:
+            self.engine.start_trace(args.trace, source)
+        if args.watch:
+            self.engine.start_watch(source, destination, logger=self._log_watch)
+
+        # an interval starts with a full sync right away; a cron schedule waits for its
+        # time, unless a run was missed since the last backup
+        scheduler = None
+        first = True
+        if args.schedule:
+            scheduler = BackupScheduler(args.schedule, last_run=self.engine.last_backup_time())
+            first = False
+        elif args.interval > 0:
+            scheduler = BackupScheduler(Interval(args.interval))
+        try:
+            while not self.shutdown.is_set():
+                due = first or (scheduler is not None and scheduler.due())
+                if due and not self.engine.is_running():
+                    if scheduler is not None and scheduler.due():
+                        missed = scheduler.consume()
+                        if missed:
+                            print(f"Catching up: {missed} scheduled run(s) were missed.", file=self.out, flush=True)
+                    if args.verify:
+                        self.engine.start_verify(source, destination)
+                    else:
+                        # scheduled runs do nothing if the source has not changed since the last one
+                        self.engine.start(source, destination, force=args.force,
+                                          skip_unchanged=not first and not args.force)
+                    first = False
+                elif args.watch:
+                    self.engine.sync_dirty_paths(source, destination)
+
+                self._pump_messages(timeout=0.5)
+
+                if scheduler is None and not first and not self.engine.is_running():
+                    break
+        finally:
+            self.engine.stop_watch()
+            self.engine.cancel()
+            if self.engine.sync_thread:
+                self.engine.sync_thread.join()
+            if args.trace:
+                print(f"Trace: {self.engine.stop_trace()} record(s) written to {args.trace}", file=self.out)
+            self._pump_messages(timeout=0)
+        return 1 if self.errors else 0
+
+    def _run_jobs(self):
+        try:
+            while not self.shutdown.is_set():
+                self.scheduler.tick()
+                self._pump_messages(timeout=0.5)
+                if self.scheduler.finished():
+                    break
+        finally:
+            self.scheduler.cancel_all()
+            self.scheduler.join()
+            self._pump_messages(timeout=0)
+        return 1 if self.errors else 0
+
+    def _log_watch(self, line):
+        if not self.args.quiet:
+            self.engine.msg_queue.put(("log", line))
+
+    def _pump_messages(self, timeout):
+        try:
+            msg = self.msg_queue.get(timeout=timeout) if timeout else self.msg_queue.get_nowait()
+            while True:
+                self._print_message(msg)
+                msg = self.msg_queue.get_nowait()
+        except queue.Empty:
+            pass
+
+    def _print_message(self, msg):
+        mtype, payload = msg if isinstance(msg, tuple) else ("log", str(msg))
+        if mtype == "progress":
+            # a status line every few seconds is plenty for a log file / journal
+            now = time.monotonic()
+            if self.args.quiet or (self._last_progress and now - self._last_progress < 5):
+                return
+            self._last_progress = now
+            b_copied, b_total, f_done, f_total = payload
+            print(f"Progress: {f_done}/{f_total} files, {human_readable(b_copied)}/{human_readable(b_total)}",
+                  file=self.out, flush=True)
+        elif mtype == "error":
+            self.errors += 1
+            print("ERROR: " + payload, file=self.out, flush=True)
+        elif mtype == "done" or not self.args.quiet:
+            print(payload, file=self.out, flush=True)
+
+
+def configure_compression(engine, args):
+    if args.compress:
+        engine.use_compression = True
+        engine.compression_codec = args.compress
+        engine.compression_level = args.compress_level
+
+
+def configure_mirror(engine, args):
+    engine.mirror_mode = args.mirror
+    engine.trash_retention_days = args.trash_days
+
+
+def configure_snapshots(engine, args):
+    engine.snapshot_mode = args.snapshot
+    engine.snapshot_retention = {"last": args.keep_last, "hourly": args.keep_hourly, "daily": args.keep_daily,
+                                 "weekly": args.keep_weekly}
+
+
+def configure_order(engine, args):
+    if args.physical_order:
+        engine.physical_order = True
+        engine.physical_order_fiemap = args.physical_order == "fiemap"
+
+
+def configure_metrics(engine, args, job_name=None):
+    def path_for(path):
+        if not path or job_name is None:
+            return path
+        if "{job}" in path:
+            return path.replace("{job}", job_name)
+        # one file per job, or they would overwrite each other
+        base, ext = os.path.splitext(path)
+        return f"{base}_{job_name}{ext}"
+
+    engine.metrics_json = path_for(args.metrics_json)
+    engine.metrics_prom = path_for(args.metrics_prom)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    # one limiter for everything this process copies, jobs included
+    rules = list(args.exclude)
+    if args.exclude_from:
+        with open(args.exclude_from, encoding="utf-8") as f:
+            rules += f.read().splitlines()
+    limiter = RateLimiter(parse_rate_schedule(args.rate_schedule), args.max_rate * MB if args.max_rate > 0 else None)
+    if args.jobs:
+        jobs, max_per_device = load_jobs(args.jobs)
+        scheduler = JobScheduler(max_per_device=max_per_device)
+        for job in jobs:
+            job.engine.copy_workers = args.workers
+            job.engine.use_object_store = args.object_store
+            configure_compression(job.engine, args)
+            configure_mirror(job.engine, args)
+            configure_order(job.engine, args)
+            configure_snapshots(job.engine, args)
+            configure_metrics(job.engine, args, job.name)
+            job.engine.filter_rules = job.engine.filter_rules + rules
+            job.engine.rate_limiter = limiter
+            job.force = job.force or args.force
+            scheduler.add(job)
+        runner = HeadlessRunner(None, args, scheduler=scheduler)
+    else:
+        engine = SyncEngine(last_backup_file=args.last_backup_file)
+        engine.copy_workers = args.workers
+        engine.verify_workers = args.workers
+        engine.use_object_store = args.object_store
+        configure_compression(engine, args)
+        configure_mirror(engine, args)
+        configure_order(engine, args)
+        configure_snapshots(engine, args)
+        configure_metrics(engine, args)
+        engine.filter_rules = rules
+        engine.rate_limiter = limiter
+        runner = HeadlessRunner(engine, args)
+
+    signal.signal(signal.SIGINT, runner.request_shutdown)
+    if hasattr(signal, "SIGTERM"):
+        signal.signal(signal.SIGTERM, runner.request_shutdown)
+    return runner.run()
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,129 @@
+# compress.py
+import bz2
+import lzma
+import math
+import multiprocessing
+import os
+import zlib
+from concurrent.futures import ProcessPoolExecutor
+
+# codec -> destination suffix. Every chunk is compressed as its own stream; gzip, xz
+# and bzip2 all accept concatenated streams, so the result opens with the usual tools.
+SUFFIXES = {"gzip": ".gz", "xz": ".xz", "bz2": ".bz2"}
+
+# already compressed (or encrypted) formats: compressing them again only burns CPU
+COMPRESSED_EXTENSIONS = {
+    ".gz", ".tgz", ".xz", ".txz", ".bz2", ".tbz2", ".zst", ".lz4", ".lzma", ".zip", ".7z", ".rar",
+    ".jpg", ".jpeg", ".png", ".gif", ".webp", ".heic", ".avif",
+    ".mp3", ".aac", ".ogg", ".opus", ".flac", ".m4a",
+    ".mp4", ".m4v", ".mkv", ".mov", ".avi", ".webm",
+    ".pdf", ".docx", ".xlsx", ".pptx", ".odt", ".ods", ".epub", ".jar", ".apk", ".gpg", ".age",
+}
+
+SAMPLE_BYTES = 16 * 1024  # read at the start, middle and end of a file
+ENTROPY_LIMIT = 7.5  # bits per byte; random data is ~8
+MIN_SIZE = 4096  # below this the stream headers eat most of the gain
+
+
+def _gzip_member(data, level):
+    c = zlib.compressobj(level, zlib.DEFLATED, 31)  # wbits 31 = gzip header/trailer
+    return c.compress(data) + c.flush()
+
+
+def compress_chunk(codec, level, data):
+    """Compress one chunk as a complete stream. Runs in a worker process."""
+    if codec == "gzip":
+        return _gzip_member(data, level)
+    if codec == "xz":
+        return lzma.compress(data, preset=level)
+    if codec == "bz2":
+        return bz2.compress(data, compresslevel=level)
+    raise ValueError(f"Unknown codec: {codec}")
+
+
+def sample_entropy(path, size=None):
+    """Shannon entropy (bits/byte) of a few samples from the file."""
+    if size is None:
+        size = os.path.getsize(path)
+    offsets = sorted({0, max(0, size // 2 - SAMPLE_BYTES // 2), max(0, size - SAMPLE_BYTES)})
+    with open(path, "rb") as f:
+        sample = b""
+        for offset in offsets:
+            f.seek(offset)
+            sample += f.read(SAMPLE_BYTES)
+    if not sample:
+        return 0.0
+    total = len(sample)
+    entropy = 0.0
+    for value in range(256):
+        count = sample.count(value)
+        if count:
+            p = count / total
+            entropy -= p * math.log2(p)
+    return entropy
+
+
+def worth_compressing(path, size=None):
+    """False for tiny files, known compressed formats and data that samples as near-random."""
+    if size is None:
+        size = os.path.getsize(path)
+    if size < MIN_SIZE or os.path.splitext(path)[1].lower() in COMPRESSED_EXTENSIONS:
+        return False
+    return sample_entropy(path, size) < ENTROPY_LIMIT
+
+
+class Compressor:
+    """
+    Compresses files chunk by chunk on a process pool, so the GIL does not
+    serialize the work of several copy workers (or of one big file).
+
+    Each file being compressed holds at most 'window_bytes' of chunks in memory
+    (at least one chunk, at most two per process); the engine gives every copy
+    worker its share of the in-flight byte budget.
+    """
+
+    def __init__(self, codec="gzip", level=6, processes=None, chunk_size=4 * 1024 * 1024,
+                 window_bytes=64 * 1024 * 1024):
+        if codec not in SUFFIXES:
+            raise ValueError(f"Unknown codec: {codec}")
+        self.codec = codec
+        self.level = level
+        self.suffix = SUFFIXES[codec]
+        self.chunk_size = chunk_size
+        self.processes = processes or os.cpu_count() or 1
+        self.window = max(1, min(self.processes * 2, window_bytes // chunk_size))
+        # spawn, not fork: the sync runs next to Tk and other threads whose locks a fork would copy
+        self._pool = ProcessPoolExecutor(max_workers=self.processes, mp_context=multiprocessing.get_context("spawn"))
+
+    def compress_file(self, fsrc, fdst, on_progress=None, stop_event=None):
+        """
+        Stream 'fsrc' compressed into 'fdst', with up to 'window' chunks in flight
+        at a time. Returns (bytes_in, bytes_out), or None if cancelled.
+        """
+        window = []
+        bytes_in = bytes_out = 0
+        eof = False
+        while window or not eof:
+            while not eof and len(window) < self.window:
+                data = fsrc.read(self.chunk_size)
+                if not data:
+                    eof = True
+                    break
+                window.append((len(data), self._pool.submit(compress_chunk, self.codec, self.level, data)))
+            if not window:
+                break
+            if stop_event is not None and stop_event.is_set():
+                for _, future in window:
+                    future.cancel()
+                return None
+            raw_len, future = window.pop(0)
+            out = future.result()
+            fdst.write(out)
+            bytes_in += raw_len
+            bytes_out += len(out)
+            if on_progress:
+                on_progress(raw_len)
+        return bytes_in, bytes_out
+
+    def shutdown(self):
+        self._pool.shutdown(wait=True, cancel_futures=True)
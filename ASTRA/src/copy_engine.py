@@ -0,0 +1,84 @@
+# copy_engine.py
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+
+class CopyEngine:
+    """
+    Runs file copies on a pool of worker threads.
+
+    'copy_func(src, dst)' does the actual copy and returns True/False.
+    'max_inflight_bytes' caps how many bytes may be queued or copying at
+    once, so a huge tree does not pile up thousands of pending jobs.
+    A single file bigger than the cap is still allowed, it just runs alone.
+    An exception from a copy counts as a failed copy and is handed to
+    'on_error(src, dst, exc)', so it is not mistaken for a cancellation.
+    """
+
+    def __init__(self, copy_func, workers=4, max_inflight_bytes=256 * 1024 * 1024, stop_event=None,
+                 on_error=None):
+        self.copy_func = copy_func
+        self.on_error = on_error
+        self.workers = max(1, int(workers))
+        self.max_inflight_bytes = max(1, int(max_inflight_bytes))
+        self.stop_event = stop_event or threading.Event()
+
+        self._executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="astra-copy")
+        self._budget = threading.Condition()
+        self._inflight_bytes = 0
+        self._inflight_jobs = 0
+
+    @property
+    def inflight_bytes(self):
+        with self._budget:
+            return self._inflight_bytes
+
+    def submit(self, src, dst, size, on_done=None, copy_func=None):
+        """
+        Queue a copy. Blocks while the in-flight budget is used up.
+        Returns False if cancellation was requested before the job could start.
+        'on_done(src, dst, ok)' is called from the worker thread afterwards.
+        'copy_func' overrides the engine's default copy for this one job.
+        """
+        size = max(0, int(size))
+        with self._budget:
+            while self._inflight_jobs and self._inflight_bytes + size > self.max_inflight_bytes:
+                if self.stop_event.is_set():
+                    return False
+                self._budget.wait(0.2)
+            if self.stop_event.is_set():
+                return False
+            self._inflight_bytes += size
+            self._inflight_jobs += 1
+
+        self._executor.submit(self._run, copy_func or self.copy_func, src, dst, size, on_done)
+        return True
+
+    def _run(self, copy_func, src, dst, size, on_done):
+        ok = False
+        try:
+            if not self.stop_event.is_set():
+                ok = copy_func(src, dst)
+        except Exception as e:
+            ok = False
+            if self.on_error:
+                self.on_error(src, dst, e)
+        try:
+            # report before releasing the budget so wait() sees final counters
+            if on_done:
+                on_done(src, dst, ok)
+        finally:
+            with self._budget:
+                self._inflight_bytes -= size
+                self._inflight_jobs -= 1
+                self._budget.notify_all()
+
+    def wait(self):
+        """Block until every submitted job has finished (or was cancelled)."""
+        with self._budget:
+            while self._inflight_jobs:
+                self._budget.wait(0.2)
+
+    def shutdown(self):
+        self.wait()
+        self._executor.shutdown(wait=True)
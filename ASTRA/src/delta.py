@@ -0,0 +1,101 @@
+# delta.py
+import hashlib
+import os
+
+DEFAULT_BLOCK_SIZE = 256 * 1024
+# one 16-byte blake2b per block; blocks are only compared at the same offset, so there is
+# no rolling search for a weak checksum to speed up
+SIG_SIZE = 16
+
+
+def _strong(block):
+    return hashlib.blake2b(block, digest_size=SIG_SIZE).digest()
+
+
+def _mark_stale(fdst, dst):
+    """Flush what was written to 'dst', then reset its mtime to 0 (the epoch)."""
+    fdst.flush()
+    os.utime(dst, (0, 0))
+
+
+def block_signatures(fobj, block_size=DEFAULT_BLOCK_SIZE):
+    """Read 'fobj' from its current position and return the signature of each block."""
+    sigs = []
+    while True:
+        block = fobj.read(block_size)
+        if not block:
+            return sigs
+        sigs.append(_strong(block))
+
+
+def pack_signatures(sigs):
+    return b"".join(sigs)
+
+
+def unpack_signatures(blob):
+    """Signatures packed by pack_signatures(), or None if 'blob' is not in that format."""
+    if len(blob) % SIG_SIZE:
+        return None
+    return [blob[i:i + SIG_SIZE] for i in range(0, len(blob), SIG_SIZE)]
+
+
+class DeltaResult:
+    """Outcome of delta_copy(): how much was rewritten vs. left alone."""
+
+    def __init__(self):
+        self.bytes_total = 0      # size of the source file
+        self.bytes_written = 0    # bytes actually rewritten in the destination
+        self.completed = False
+        self.signatures = []      # signatures of the destination as it is now
+
+    @property
+    def bytes_saved(self):
+        return self.bytes_total - self.bytes_written
+
+
+def delta_copy(src, dst, block_size=DEFAULT_BLOCK_SIZE, signatures=None, on_progress=None, stop_event=None):
+    """
+    Update 'dst' in place so it matches 'src', rewriting only blocks that changed.
+
+    Each source block's blake2b signature is compared with the destination
+    block at the same offset and only blocks that differ are written, so appends and
+    in-place patches cost just the changed bytes. 'signatures' are the destination's
+    block signatures from a previous run; without them they are computed by reading
+    'dst'. The destination is truncated if the source shrank, and the new signatures
+    are returned so the next run does not need to read the destination at all.
+
+    'on_progress(nbytes)' is called per block processed. Writing sets the destination's
+    mtime to now, which would make a half-patched file look newer than its source, so the
+    mtime is set back to 0 after every block written and after a truncate; only the
+    caller's copystat() after a completed run gives it a real one. If the run is cancelled,
+    fails or the process dies, the next sync sees a stale copy and updates it again.
+    """
+    result = DeltaResult()
+    with open(src, "rb") as fsrc, open(dst, "r+b") as fdst:
+        if signatures is None:
+            signatures = block_signatures(fdst, block_size)
+        offset = 0
+        index = 0
+        while True:
+            if stop_event is not None and stop_event.is_set():
+                break
+            block = fsrc.read(block_size)
+            if not block:
+                if offset != os.fstat(fdst.fileno()).st_size:
+                    fdst.truncate(offset)
+                    _mark_stale(fdst, dst)
+                result.completed = True
+                break
+            sig = _strong(block)
+            if not (index < len(signatures) and signatures[index] == sig):
+                fdst.seek(offset)
+                fdst.write(block)
+                _mark_stale(fdst, dst)
+                result.bytes_written += len(block)
+            result.signatures.append(sig)
+            offset += len(block)
+            index += 1
+            if on_progress:
+                on_progress(len(block))
+        result.bytes_total = offset
+    return result
@@ -0,0 +1,83 @@
+# dest_cache.py
+import os
+import time
+from collections import OrderedDict
+
+
+class DestDirCache:
+    """
+    Listings of destination directories, each read with a single scandir.
+
+    Deciding whether a file needs copying used to cost an exists() and a stat()
+    per file, and an exists() per directory; on an NFS/SMB destination each is a
+    network round trip. Here a directory is listed once and every later question
+    about it is answered from memory: a missing file costs nothing, and the
+    size/mtime of an existing one come from the DirEntry (free on Windows; on NFS
+    the listing is a READDIRPLUS that fills the client's attribute cache).
+
+    The scanner hands out a directory's files together, so only the most recently
+    used 'max_dirs' listings are kept. A listing is a snapshot: it is meant for
+    one sync, where every path is decided once. Used from the sync thread only.
+    """
+
+    def __init__(self, max_dirs=256):
+        self.max_dirs = max_dirs
+        self.listed = 0  # scandir calls made
+        self.seconds = 0.0  # spent listing
+        self._dirs = OrderedDict()  # folder -> {name: DirEntry}, or None if unreadable
+
+    def _listing(self, folder):
+        if folder in self._dirs:
+            self._dirs.move_to_end(folder)
+            return self._dirs[folder]
+        start = time.perf_counter()
+        try:
+            with os.scandir(folder) as it:
+                listing = {entry.name: entry for entry in it}
+            self.listed += 1
+        except (FileNotFoundError, NotADirectoryError):
+            listing = {}
+        except OSError:
+            listing = None  # e.g. no permission to list: ask per path instead
+        self.seconds += time.perf_counter() - start
+        self._dirs[folder] = listing
+        if len(self._dirs) > self.max_dirs:
+            self._dirs.popitem(last=False)
+        return listing
+
+    def _entry(self, path):
+        folder, name = os.path.split(path)
+        listing = self._listing(folder)
+        if listing is None:
+            return False  # unknown
+        return listing.get(name)
+
+    def exists(self, path):
+        """Like os.path.lexists()."""
+        entry = self._entry(path)
+        if entry is False:
+            return os.path.lexists(path)
+        return entry is not None
+
+    def stat(self, path):
+        """os.stat() of 'path' (symlinks followed), or None if there is nothing there."""
+        entry = self._entry(path)
+        try:
+            if entry is False:
+                return os.stat(path)
+            return entry.stat() if entry is not None else None
+        except FileNotFoundError:
+            return None  # e.g. a dangling symlink
+
+    def is_dir(self, path):
+        entry = self._entry(path)
+        if entry is False:
+            return os.path.isdir(path)
+        return entry is not None and entry.is_dir()
+
+    def created(self, folder):
+        """'folder' was just made (with any missing parents), so it is empty: no need to list it."""
+        self._dirs[folder] = {}
+        self._dirs.move_to_end(folder)
+        if len(self._dirs) > self.max_dirs:
+            self._dirs.popitem(last=False)
@@ -0,0 +1,43 @@
+# dirty_paths.py
+import threading
+import time
+
+
+class DirtyPathSet:
+    """
+    Thread-safe set of changed source paths fed by watchdog events.
+
+    Repeated events for the same path are collapsed into one entry, and a path
+    is only handed out once it has been quiet for 'debounce' seconds, so a file
+    that is still being written is not copied half-way through.
+    """
+
+    def __init__(self, debounce=2.0):
+        self.debounce = debounce
+        self._lock = threading.Lock()
+        self._last_event = {}  # path -> monotonic time of the latest event
+
+    def __len__(self):
+        with self._lock:
+            return len(self._last_event)
+
+    def add(self, path):
+        with self._lock:
+            self._last_event[path] = time.monotonic()
+
+    def discard(self, path):
+        with self._lock:
+            self._last_event.pop(path, None)
+
+    def clear(self):
+        with self._lock:
+            self._last_event.clear()
+
+    def drain_ready(self):
+        """Remove and return the paths that have settled for at least 'debounce' seconds."""
+        cutoff = time.monotonic() - self.debounce
+        with self._lock:
+            ready = [p for p, t in self._last_event.items() if t <= cutoff]
+            for p in ready:
+                del self._last_event[p]
+        return ready
@@ -0,0 +1,1237 @@
+# engine.py
+import os
+import queue
+import shutil
+import threading
+import time
+from datetime import datetime
+
+from copy_engine import CopyEngine
+from manifest import SyncManifest
+from dirty_paths import DirtyPathSet
+from scanner import TreeScanner, scan_tree
+import fastcopy
+import delta
+from object_store import ObjectStore
+from throttle import RateLimiter, AdaptiveChunker
+from resume import PartialCopy
+import compress
+from metrics import SyncMetrics, write_json, write_prometheus
+from filters import PathFilter
+from verify import HashCache, codec_for, hash_file
+from mirror import Trash, dest_variants, move_dest, prune_empty_dirs
+from dest_cache import DestDirCache
+from file_table import FileTable
+from physical_order import CopyBatch, advise_sequential
+from snapshots import SnapshotSet
+from workload_trace import TraceRecorder
+
+
+def human_readable(bytes_val):
+    # simple function for readable sizes
+    for unit in ['B', 'KB', 'MB', 'GB', 'TB']:
+        if bytes_val < 1024.0:
+            return f"{bytes_val:3.1f} {unit}"
+        bytes_val /= 1024.0
+    return f"{bytes_val:.1f} PB"
+
+
+class _SubtreeFilter:
+    """A PathFilter for scan_tree() started below the source root, at 'prefix'."""
+
+    def __init__(self, path_filter, prefix):
+        self.path_filter = path_filter
+        self.prefix = prefix
+
+    def excluded(self, rel, is_dir=False):
+        return self.path_filter.excluded(os.path.join(self.prefix, rel), is_dir)
+
+
+class SyncEngine:
+    """
+    The backup engine, free of any Tk code so it also runs headless (see astra_cli.py).
+
+    Everything it has to say goes to 'msg_queue' as ("log" | "progress" | "done" | "error", payload)
+    tuples; MainFrame shows them in the terminal, the CLI prints them.
+    """
+
+    def __init__(self, msg_queue=None, last_backup_file="last_backup.txt"):
+        self.msg_queue = msg_queue if msg_queue is not None else queue.Queue()
+        self.last_backup_file = last_backup_file
+
+        self.stop_event = threading.Event()  # to request cancellation
+        self.sync_thread = None  # background sync thread
+        self.total_bytes_to_copy = 0
+        self.bytes_copied = 0
+        self.total_files_to_process = 0
+        self.files_processed = 0
+        self._counter_lock = threading.Lock()  # guards bytes_copied / files_processed across copy workers
+        self.copy_workers = 4  # parallel file copies per sync
+        self.max_inflight_bytes = 256 * 1024 * 1024  # cap on bytes queued or copying at once
+        self.manifest = None  # SyncManifest of the destination while a sync runs
+        self.dest_cache = None  # DestDirCache of the destination while a sync runs
+        # watchdog changes waiting to be copied; the scheduled full sync is the safety net
+        self.dirty_paths = DirtyPathSet(debounce=2.0)
+        self.observer = None  # watchdog Observer while watching
+        self.scan_queue_size = 1000  # scanned entries buffered ahead of the copy decisions
+        self.use_kernel_copy = True  # let fastcopy move data in-kernel where the OS supports it
+        self.use_delta = True  # rewrite only changed blocks of large updated files
+        self.delta_min_size = 64 * 1024 * 1024
+        self.delta_block_size = delta.DEFAULT_BLOCK_SIZE
+        self.delta_bytes_total = 0  # size of files updated by delta this sync
+        self.delta_bytes_saved = 0  # bytes those updates did not have to write
+        self.use_object_store = False  # store contents once by hash and hardlink them into the tree
+        self.object_store = None  # ObjectStore of the destination while a sync runs
+        self.dedup_files = 0  # files whose content was already in the store this sync
+        self.dedup_bytes_saved = 0
+        self.progress_interval = 0.1  # seconds between queued progress updates
+        self.rate_limiter = RateLimiter()  # unlimited unless given rules / a default rate
+        self.chunker = AdaptiveChunker()  # buffered copy chunk size, tuned from measured throughput
+        self.adaptive_chunks = True
+        self.resume_min_size = 64 * 1024 * 1024  # files this big keep a resume record while copying
+        self.resume_checkpoint_bytes = 64 * 1024 * 1024  # fsync + record progress this often
+        self.use_compression = False  # store files compressed (name + codec suffix) where it pays off
+        self.compression_codec = "gzip"  # "gzip" | "xz" | "bz2", see compress.SUFFIXES
+        self.compression_level = 6
+        self.compression_processes = None  # compression worker processes, default one per CPU
+        self.compressor = None  # compress.Compressor while a sync runs
+        self.compress_bytes_in = 0  # source bytes stored compressed this sync
+        self.compress_bytes_out = 0  # what they take on the destination
+        self.mirror_mode = False  # also carry renames and deletions over to the destination
+        self.trash_retention_days = 30  # mirror deletions wait this long in .astra_trash; 0 deletes right away
+        self.trash = None  # mirror.Trash while a mirror sync runs
+        self.files_moved = 0
+        self.files_deleted = 0
+        self.snapshot_mode = False  # each full sync writes a new hardlinked snapshot, see snapshots.SnapshotSet
+        self.snapshot_retention = {"last": 3, "hourly": 24, "daily": 7, "weekly": 8}  # all 0 keeps every snapshot
+        self.snapshot = None  # snapshots.SnapshotRun while a snapshot sync runs
+        self._roots = None  # (source, destination) of the running sync
+        self.file_table = None  # FileTable of the paths the running full scan has found (mirror and snapshot mode)
+        self._scan_errors = 0
+        self.metrics = SyncMetrics()  # timings of the running (or last) sync
+        self.metrics_interval = 1.0  # seconds between throughput / queue depth samples
+        self.metrics_json = None  # write the end-of-run report here (JSON)
+        self.metrics_prom = None  # and/or here, as a Prometheus textfile
+        self.metrics_labels = {}  # extra Prometheus labels, e.g. {"job": name}
+        self.filter_rules = []  # gitignore-style rules on top of filters.DEFAULT_RULES (and .astraignore)
+        self.path_filter = None  # compiled rules of the running sync / watch
+        self.verify_workers = 4  # files hashed at once by verify()
+        self.verify_recheck_days = 30  # re-read destination files whose cached hash is older; 0 = every time
+        self.hash_cache = None  # verify.HashCache while verifying
+        self.verify_counts = {}  # "ok" / "mismatch" / "missing" / "pending" / "cached" of the last verify
+        self.prewarm_result = None  # what the last prewarm() found, see _prewarm()
+        self._prewarm_thread = None
+        self._prewarm_stop = threading.Event()
+        self.physical_order = False  # queue copies in on-disk order (spinning-disk sources), see CopyBatch
+        self.physical_order_fiemap = False  # order by FIEMAP extent offsets instead of inode numbers
+        self.physical_batch_files = 4096  # copies sorted together
+        self._batch = None  # CopyBatch of the running sync
+        self.trace = None  # workload_trace.TraceRecorder while recording, see start_trace()
+        self._pool = None  # CopyEngine / TreeScanner of the running sync, for queue depth samples
+        self._scanner = None
+        self._last_progress_put = 0.0
+
+    # -------------------------
+    # Thread-safe copy helper
+    # -------------------------
+    def _add_copied(self, nbytes):
+        """Count copied bytes and report progress. Safe to call from any copy worker."""
+        with self._counter_lock:
+            self.bytes_copied += nbytes
+            progress = (self.bytes_copied, self.total_bytes_to_copy, self.files_processed,
+                        self.total_files_to_process)
+        self._put_progress(progress)
+
+    def _put_progress(self, progress):
+        """Send progress update occasionally: at most one per progress_interval."""
+        now = time.monotonic()
+        if self.total_bytes_to_copy and now - self._last_progress_put >= self.progress_interval:
+            self._last_progress_put = now
+            self.msg_queue.put(("progress", progress))
+
+    def _copy_progress(self, nbytes):
+        """Progress callback for copy loops that move real data: count it, then apply the rate cap."""
+        self._add_copied(nbytes)
+        if self.rate_limiter.active:
+            with self.metrics.phase("throttle"):
+                self.rate_limiter.consume(nbytes, self.stop_event)
+
+    def _copy_file_chunked(self, src, dst, chunk_size=None):
+        """
+        Copy a file in chunks and update bytes_copied. Called from worker thread.
+        Without 'chunk_size' the chunker picks (and keeps tuning) the size.
+
+        The data goes to a hidden part file that replaces 'dst' only when complete
+        (so a hardlinked destination is never written through either). Big files
+        checkpoint their progress, and a cancelled or crashed copy of an unchanged
+        source resumes from the last checkpoint next time.
+        """
+        partial = None
+        try:
+            os.makedirs(os.path.dirname(dst), exist_ok=True)
+            with open(src, "rb") as fsrc:
+                if self.physical_order:
+                    advise_sequential(fsrc.fileno())
+                src_st = os.fstat(fsrc.fileno())
+                partial = PartialCopy(dst, src_st)
+                resumable = src_st.st_size >= self.resume_min_size
+                offset = partial.resume_offset(fsrc) if resumable else 0
+                if offset:
+                    self.msg_queue.put(("log", f"Resuming {src} at {human_readable(offset)}"))
+                    self._add_copied(offset)
+
+                with open(partial.part, "r+b" if offset else "wb") as fdst:
+                    fdst.truncate(offset)
+                    checkpoint = [offset + self.resume_checkpoint_bytes]
+
+                    def progress(nbytes, position):
+                        self._copy_progress(nbytes)
+                        if resumable and position >= checkpoint[0]:
+                            partial.checkpoint(fdst, position)
+                            checkpoint[0] = position + self.resume_checkpoint_bytes
+
+                    if self.use_kernel_copy:
+                        # reflink / copy_file_range / sendfile: no bytes pass through Python
+                        done = [offset]
+
+                        def kernel_progress(nbytes):
+                            done[0] += nbytes
+                            progress(nbytes, done[0])
+
+                        # small segments while throttled so the cap is applied smoothly
+                        segment = self.chunker.chunk_size if self.rate_limiter.active else 8 * 1024 * 1024
+                        offset = fastcopy.kernel_copy(fsrc.fileno(), fdst.fileno(), src_st.st_size,
+                                                      kernel_progress, self.stop_event, segment, offset)
+                    if self.stop_event.is_set():
+                        self._keep_partial(partial, fdst, offset, resumable)
+                        return False
+                    # whatever the kernel could not do (or data appended since) goes through the loop below
+                    fsrc.seek(offset)
+                    fdst.seek(offset)
+                    while True:
+                        if self.stop_event.is_set():
+                            # cancellation requested
+                            self._keep_partial(partial, fdst, offset, resumable)
+                            return False
+                        size = chunk_size or self.chunker.chunk_size
+                        started = time.monotonic()
+                        chunk = fsrc.read(size)
+                        if not chunk:
+                            break
+                        fdst.write(chunk)
+                        offset += len(chunk)
+                        if self.adaptive_chunks and not chunk_size:
+                            self.chunker.record(len(chunk), time.monotonic() - started)
+                        progress(len(chunk), offset)
+            # preserve metadata, then put the finished copy in place
+            with self.metrics.phase("copystat"):
+                shutil.copystat(src, partial.part)
+                partial.commit()
+            return True
+        except Exception as e:
+            if partial:
+                partial.discard()
+            self.msg_queue.put(("error", f"Failed copying {src} -> {dst}: {e}"))
+            return False
+
+    @staticmethod
+    def _keep_partial(partial, fdst, offset, resumable):
+        """On cancellation: record how far a big copy got, throw small ones away."""
+        if resumable and offset:
+            partial.checkpoint(fdst, offset)
+        else:
+            partial.discard()
+
+    def _copy_file_delta(self, src, dst, rel_file, st):
+        """
+        Rewrite only the changed blocks of an existing large destination file. Called from worker thread.
+        The file is patched in place, so until it is done it is marked twice over: delta_copy keeps
+        its mtime at 0, and the manifest row says "patching" so it is copied whole if it still
+        looks current afterwards.
+        Without the destination's block signatures in the manifest the file is copied whole:
+        reading it all back to compare costs about as much as rewriting it (network shares).
+        """
+        try:
+            block_size = self.delta_block_size
+            signatures = None
+            if self.manifest:
+                blob = self.manifest.get_signatures(rel_file, block_size, os.stat(dst))
+                if blob is not None:
+                    signatures = delta.unpack_signatures(blob)
+            if signatures is None:
+                return self._copy_file_signed(src, dst, rel_file)
+            self.manifest.mark_patching(rel_file, st)
+            result = delta.delta_copy(src, dst, block_size, signatures, self._copy_progress, self.stop_event)
+            if not result.completed:
+                return False
+            with self.metrics.phase("copystat"):
+                shutil.copystat(src, dst)
+            if self.manifest:
+                self.manifest.put_signatures(rel_file, block_size, os.stat(dst),
+                                             delta.pack_signatures(result.signatures))
+            with self._counter_lock:
+                self.delta_bytes_total += result.bytes_total
+                self.delta_bytes_saved += result.bytes_saved
+            return True
+        except Exception as e:
+            self.msg_queue.put(("error", f"Failed delta update {src} -> {dst}: {e}"))
+            return False
+
+    def _copy_file_signed(self, src, dst, rel_file):
+        """
+        Copy a large file whole, then record its block signatures so the next update can be
+        a delta. They are taken from the source, whose pages the copy just read, not from the
+        destination; if the source changed meanwhile, nothing is recorded.
+        """
+        before = os.stat(src)
+        if not self._copy_file_chunked(src, dst):
+            return False
+        if not self.manifest:
+            return True
+        try:
+            with open(src, "rb") as f:
+                signatures = delta.block_signatures(f, self.delta_block_size)
+            after, dest_st = os.stat(src), os.stat(dst)
+            if (before.st_size, before.st_mtime_ns) == (after.st_size, after.st_mtime_ns) == \
+                    (dest_st.st_size, dest_st.st_mtime_ns):
+                self.manifest.put_signatures(rel_file, self.delta_block_size, dest_st,
+                                             delta.pack_signatures(signatures))
+        except OSError:
+            pass  # the copy is done; the next update just copies whole again
+        return True
+
+    def _copy_file_dedup(self, src, dst):
+        """Copy via the object store: only content it has not seen yet is copied. Called from worker thread."""
+        store = self.object_store
+        try:
+            digest = store.hash_file(src, self.stop_event)
+            if digest is None:
+                return False
+            with store.lock(digest):
+                if store.has(digest):
+                    size = os.path.getsize(src)
+                    with self._counter_lock:
+                        self.dedup_files += 1
+                        self.dedup_bytes_saved += size
+                    self._add_copied(size)
+                else:
+                    copied = store.copy_in(src, self.stop_event, self._copy_progress)
+                    if copied is None:
+                        return False
+                    tmp, copied_digest = copied
+                    if copied_digest != digest:
+                        # changed between hashing and copying: the object would not match its name
+                        os.remove(tmp)
+                        self.msg_queue.put(("error", f"{src} changed while it was being stored; "
+                                                     f"it will be copied again next time."))
+                        return False
+                    store.commit(tmp, digest)
+                store.link(digest, dst)
+            return True
+        except Exception as e:
+            self.msg_queue.put(("error", f"Failed storing {src} -> {dst}: {e}"))
+            return False
+
+    def _copy_file_compressed(self, src, dst):
+        """
+        Store 'src' as 'dst' + codec suffix, compressed on the process pool. Content
+        that would not shrink (known compressed formats, near-random samples) is
+        copied raw as 'dst' instead. Called from worker thread.
+        """
+        compressor = self.compressor
+        packed = dst + compressor.suffix
+        partial = None
+        try:
+            # a source that already has a 'name.gz' sibling keeps its name free
+            if os.path.exists(src + compressor.suffix) or not compress.worth_compressing(src):
+                if not self._copy_file_chunked(src, dst):
+                    return False
+                if not os.path.exists(src + compressor.suffix):
+                    self._remove_stale(packed)
+                return True
+
+            os.makedirs(os.path.dirname(dst), exist_ok=True)
+            with open(src, "rb") as fsrc:
+                partial = PartialCopy(packed, os.fstat(fsrc.fileno()))
+                with open(partial.part, "wb") as fdst:
+                    result = compressor.compress_file(fsrc, fdst, self._copy_progress, self.stop_event)
+            if result is None:
+                partial.discard()
+                return False
+            # the packed file carries the source's mtime, which is what the next sync compares
+            with self.metrics.phase("copystat"):
+                shutil.copystat(src, partial.part)
+                partial.commit()
+            self._remove_stale(dst)
+            with self._counter_lock:
+                self.compress_bytes_in += result[0]
+                self.compress_bytes_out += result[1]
+            return True
+        except Exception as e:
+            if partial:
+                partial.discard()
+            self.msg_queue.put(("error", f"Failed compressing {src} -> {packed}: {e}"))
+            return False
+
+    @staticmethod
+    def _remove_stale(path):
+        """Drop the other form (raw or packed) of a file that was just stored."""
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            pass
+
+    # -------------------------
+    # The worker: incremental, single-pass
+    # -------------------------
+    def sync(self, source, destination, force=False, paths=None, skip_unchanged=False):
+        """
+        Blocking sync (run on the sync thread by start()): scans source and copies
+        new/updated files as they are found.
+        'force' -> copy even if timestamps equal (used by Backup Now)
+        'paths' -> only check these source files (changes seen by watchdog) instead of walking
+        'skip_unchanged' -> first walk the source against the manifest only, and stop there if
+                            nothing changed (scheduled runs: an idle folder costs one metadata walk)
+        In snapshot mode every run is a full one into a new snapshot under the destination.
+        """
+        if self.snapshot_mode and paths is not None:
+            # a snapshot is a whole tree; a handful of changed paths cannot make one
+            self.msg_queue.put(("log", "Snapshot mode: taking a full snapshot instead of syncing single paths."))
+            paths = None
+        self.metrics = SyncMetrics(source, destination, mode="full" if paths is None else "paths",
+                                   labels=self.metrics_labels)
+        self.metrics.start_sampler(self._metrics_sample, self.metrics_interval)
+        if self.trace is not None:
+            self.trace.sync_start(self.metrics.mode, len(paths) if paths is not None else None)
+        try:
+            # reset counters
+            self.stop_event.clear()
+            self.bytes_copied = 0
+            self.files_processed = 0
+            self.total_bytes_to_copy = 0
+            self.total_files_to_process = 0
+            self.delta_bytes_total = 0
+            self.delta_bytes_saved = 0
+            self.files_moved = 0
+            self.files_deleted = 0
+            self._scan_errors = 0
+            self._roots = (source, destination)
+            # only deletion detection needs to know every scanned path
+            self.file_table = FileTable() if paths is None and (self.mirror_mode or self.snapshot_mode) else None
+            if self.snapshot_mode and self.mirror_mode:
+                self.msg_queue.put(("error", "Mirror mode and snapshot mode cannot be combined."))
+                return
+            self.trash = Trash(destination, self.trash_retention_days) \
+                if self.mirror_mode and self.trash_retention_days > 0 else None
+            # compiled once; the scanner prunes excluded directories instead of walking them
+            self.path_filter = PathFilter.for_source(source, self.filter_rules)
+
+            missing = []
+            if paths is not None:
+                # ignore anything outside the source tree
+                paths = [p for p in paths if not os.path.relpath(p, source).startswith(os.pardir)]
+                paths, missing = self._expand_dirty_paths(source, paths)
+                for fp in paths:
+                    try:
+                        self.total_bytes_to_copy += os.path.getsize(fp)
+                        self.total_files_to_process += 1
+                    except Exception:
+                        pass
+                self.msg_queue.put(("log", f"Syncing {len(paths)} changed path(s)."))
+
+            # Manifest of the last synced state lets unchanged files skip every destination stat
+            try:
+                self.manifest = SyncManifest(destination)
+            except Exception as e:
+                self.manifest = None
+                self.msg_queue.put(("log", f"Manifest unavailable, falling back to full checks: {e}"))
+
+            if skip_unchanged and paths is None and not force and self.manifest \
+                    and not self._snapshot_pending(destination) and not self._source_changed(source):
+                self.manifest.close()
+                self.manifest = None
+                if self.stop_event.is_set():
+                    self.msg_queue.put(("log", "Sync cancelled."))
+                    return
+                self.metrics.status = "finished"
+                self.msg_queue.put(("done", "Nothing changed since the last backup."))
+                self.save_last_backup_time()
+                return
+
+            self.object_store = None
+            self.dedup_files = 0
+            self.dedup_bytes_saved = 0
+            if self.use_object_store:
+                try:
+                    self.object_store = ObjectStore(destination)
+                except Exception as e:
+                    self.msg_queue.put(("error", f"Object store unavailable, copying normally: {e}"))
+
+            self.compressor = None
+            self.compress_bytes_in = 0
+            self.compress_bytes_out = 0
+            if self.use_compression:
+                if self.object_store:
+                    self.msg_queue.put(("log", "Compression is not used together with the object store."))
+                else:
+                    try:
+                        # chunks being compressed count against the copy workers' in-flight budget
+                        self.compressor = compress.Compressor(
+                            self.compression_codec, self.compression_level, self.compression_processes,
+                            window_bytes=self.max_inflight_bytes // max(1, self.copy_workers))
+                    except Exception as e:
+                        self.msg_queue.put(("error", f"Compression unavailable, copying normally: {e}"))
+
+            # In snapshot mode files go into a new snapshot directory, linked from the last one
+            tree = destination
+            if self.snapshot_mode:
+                self.snapshot = SnapshotSet(destination).begin()
+                tree = self.snapshot.path
+                base = self.snapshot.base
+                self.msg_queue.put(("log", f"Snapshot {os.path.basename(self.snapshot.final)}: "
+                                           + (f"unchanged files linked from {os.path.basename(base)}."
+                                              if base else "full copy.")))
+
+            # Hand new/updated files to the copy pool
+            pool = CopyEngine(self._copy_file_chunked, workers=self.copy_workers,
+                                max_inflight_bytes=self.max_inflight_bytes, stop_event=self.stop_event,
+                                on_error=self._copy_error)
+            self._pool = pool
+            self.dest_cache = DestDirCache()
+            if self.snapshot:
+                self.dest_cache.created(tree)
+            self._batch = CopyBatch(pool, self.physical_order_fiemap, self.physical_batch_files) \
+                if self.physical_order else None
+            try:
+                if paths is not None:
+                    for src_file in paths:
+                        if not os.path.isfile(src_file):
+                            # gone again before we got to it
+                            missing.append(src_file)
+                            continue
+                        rel = os.path.relpath(src_file, source)
+                        if not self._sync_file(pool, src_file, os.path.join(tree, rel), rel, force):
+                            self.msg_queue.put(("log", "Sync cancelled."))
+                            return
+                    if not self._flush_batch():
+                        self.msg_queue.put(("log", "Sync cancelled."))
+                        return
+                    # deletions last, so a file moved elsewhere was renamed above rather than removed
+                    if self.mirror_mode and self.manifest:
+                        for src_file in missing:
+                            if self.stop_event.is_set():
+                                break
+                            self._mirror_remove(os.path.relpath(src_file, source))
+                else:
+                    # Single pass: the scanner lists the tree in the background and feeds a
+                    # bounded queue, so copying starts with the first file and totals grow as it goes
+                    scanner = TreeScanner(source, self.stop_event, on_file=self._count_scanned_file,
+                                          on_error=self._scan_error,
+                                          maxsize=self.scan_queue_size, path_filter=self.path_filter)
+                    self._scanner = scanner
+                    scanner.start()
+                    for kind, src_path, rel, st in scanner:
+                        dest_path = os.path.join(tree, rel) if rel != "." else tree
+                        if kind == "dir":
+                            if not self.dest_cache.is_dir(dest_path):
+                                try:
+                                    os.makedirs(dest_path, exist_ok=True)
+                                    self.dest_cache.created(dest_path)
+                                except Exception as e:
+                                    self.msg_queue.put(("error", f"Failed to create dir {dest_path}: {e}"))
+                            continue
+                        if not self._sync_file(pool, src_path, dest_path, rel, force, st):
+                            self.msg_queue.put(("log", "Sync cancelled."))
+                            return
+                    if not self._flush_batch():
+                        self.msg_queue.put(("log", "Sync cancelled."))
+                        return
+                    scanner.join()
+                    self.metrics.add("scan", scanner.elapsed)
+                    self.metrics.add("scan_blocked", scanner.blocked)
+                    if scanner.finished:
+                        self.msg_queue.put(("log",
+                                            f"Scanning done. {self.total_files_to_process} files, "
+                                            f"{human_readable(self.total_bytes_to_copy)} total."))
+                        if self.mirror_mode:
+                            self._propagate_deletions()
+                        elif self.snapshot:
+                            self._forget_unseen()
+            finally:
+                # let in-flight copies finish (or notice stop_event) before reporting
+                pool.shutdown()
+                self._pool = None
+                self._scanner = None
+                self.metrics.add("dest_list", self.dest_cache.seconds, self.dest_cache.listed)
+                self.dest_cache = None
+                self.file_table = None
+                self._batch = None
+                if self.compressor:
+                    self.compressor.shutdown()
+                    self.compressor = None
+                if self.manifest:
+                    self.manifest.close()
+                    self.manifest = None
+
+            if self.stop_event.is_set():
+                self.msg_queue.put(("log", "Sync cancelled."))
+                return
+
+            if self.snapshot:
+                self._finish_snapshot(destination)
+
+            if self.object_store:
+                if self.dedup_files:
+                    self.msg_queue.put(("log", f"Deduplicated {self.dedup_files} file(s), "
+                                               f"{human_readable(self.dedup_bytes_saved)} not copied."))
+                if paths is None:
+                    freed = self.object_store.prune_unreferenced()
+                    if freed:
+                        self.msg_queue.put(("log", f"Object store: freed {human_readable(freed)} of old versions."))
+                self.object_store = None
+
+            if self.files_moved or self.files_deleted:
+                where = f" (kept in {Trash.DIRNAME} for {self.trash_retention_days} days)" if self.trash else ""
+                self.msg_queue.put(("log", f"Mirror: {self.files_moved} file(s) moved, "
+                                           f"{self.files_deleted} deleted{where}."))
+            if self.trash and paths is None:
+                self.trash.purge()
+
+            if self.compress_bytes_in:
+                self.msg_queue.put(("log", f"Compressed {human_readable(self.compress_bytes_in)} to "
+                                           f"{human_readable(self.compress_bytes_out)}."))
+
+            if self.delta_bytes_total:
+                self.msg_queue.put(("log", f"Delta updates: {human_readable(self.delta_bytes_saved)} of "
+                                           f"{human_readable(self.delta_bytes_total)} left unchanged."))
+
+            # finished; the last progress update may have been throttled away
+            if self.total_bytes_to_copy:
+                self.msg_queue.put(("progress", (self.bytes_copied, self.total_bytes_to_copy,
+                                                 self.files_processed, self.total_files_to_process)))
+            self.metrics.status = "finished"
+            self.msg_queue.put(("done", "Sync finished."))
+            # update last backup time and persist
+            self.save_last_backup_time()
+        except Exception as e:
+            self.msg_queue.put(("error", f"Worker crashed: {e}"))
+        finally:
+            self.snapshot = None  # an unfinished one stays .partial and is discarded by the next run
+            self._finish_metrics()
+
+    # -------------------------
+    # Snapshots
+    # -------------------------
+    def _snapshot_pending(self, destination):
+        """In snapshot mode: is there no complete snapshot to stand for the manifest's state?"""
+        if not self.snapshot_mode:
+            return False
+        snapshots = SnapshotSet(destination)
+        return snapshots.latest() is None or bool(snapshots.partials())
+
+    def _finish_snapshot(self, destination):
+        """Make the written snapshot visible, then thin out old ones per snapshot_retention."""
+        snapshot = self.snapshot
+        snapshot.commit()
+        removed = SnapshotSet(destination).prune(workers=self.copy_workers, **self.snapshot_retention)
+        pruned = f", {len(removed)} old snapshot(s) pruned" if removed else ""
+        self.msg_queue.put(("log", f"Snapshot {os.path.basename(snapshot.final)} done: "
+                                   f"{snapshot.linked} file(s) linked from the previous one{pruned}."))
+
+    def _forget_unseen(self):
+        """After a complete scan: drop manifest entries of files that are not in the new snapshot."""
+        if not self.manifest or self._scan_errors:
+            return
+        for rel in self.manifest.paths():
+            if rel not in self.file_table:
+                self.manifest.forget(rel)
+
+    def _metrics_sample(self):
+        """Sampler callback: progress so far, how full the queues are and the bytes in flight."""
+        gauges = {"ui_queue": self.msg_queue.qsize()}
+        scanner, pool = self._scanner, self._pool
+        if scanner is not None:
+            gauges["scan_queue"] = scanner.items.qsize()
+        if pool is not None:
+            gauges["copy_inflight_bytes"] = pool.inflight_bytes
+        return self.files_processed, self.bytes_copied, gauges
+
+    def _finish_metrics(self):
+        """Close the metrics of this sync and export them where configured."""
+        metrics = self.metrics
+        status = metrics.status or ("cancelled" if self.stop_event.is_set() else "failed")
+        metrics.finish(status, files=self.total_files_to_process, files_processed=self.files_processed,
+                       bytes_total=self.total_bytes_to_copy, bytes_copied=self.bytes_copied,
+                       files_moved=self.files_moved, files_deleted=self.files_deleted)
+        if self.trace is not None:
+            self.trace.sync_end(status, metrics.seconds, self.files_processed, self.bytes_copied)
+        try:
+            if self.metrics_json:
+                write_json(metrics, self.metrics_json)
+            if self.metrics_prom:
+                write_prometheus(metrics, self.metrics_prom)
+        except OSError as e:
+            self.msg_queue.put(("error", f"Cannot write metrics: {e}"))
+
+    def _source_changed(self, source):
+        """
+        Cheap "anything to do?" check: walk the source and compare with the manifest,
+        without touching the destination; stops at the first new or changed file.
+        """
+        seen = 0
+        for kind, _, rel, st in scan_tree(source, self.stop_event, self._scan_error, self.path_filter):
+            if kind != "file":
+                continue
+            seen += 1
+            if not self.manifest.is_unchanged(rel, st):
+                return True
+        if self._scan_errors:
+            return True  # cannot tell, do the real sync
+        # deleted files matter too when they have to disappear from the destination
+        return (self.mirror_mode or self.snapshot_mode) and seen != self.manifest.count()
+
+    def _scan_error(self, path, error):
+        self._scan_errors += 1
+        self.msg_queue.put(("error", f"Cannot scan {path}: {error}"))
+
+    def _expand_dirty_paths(self, source, paths):
+        """
+        Split watchdog paths into source files (directories expanded) and paths that
+        no longer exist. Excluded paths are dropped before they are counted.
+        """
+        files, missing = {}, []
+        for path in paths:
+            rel = os.path.relpath(path, source)
+            is_dir = os.path.isdir(path)
+            if self.path_filter.excluded_path(rel, is_dir):
+                continue
+            if is_dir:
+                # a directory created or moved in: everything below it is new here
+                for kind, src_path, _, _ in scan_tree(path, self.stop_event, self._scan_error,
+                                                      _SubtreeFilter(self.path_filter, rel)):
+                    if kind == "file":
+                        files[src_path] = None
+            elif os.path.isfile(path):
+                files[path] = None
+            else:
+                missing.append(path)
+        return list(files), missing
+
+    def _flush_batch(self):
+        """Queue the copies physical-order mode still holds back. False if cancelled."""
+        if self._batch is None:
+            return True
+        with self.metrics.phase("copy_wait"):
+            return self._batch.flush()
+
+    def _count_scanned_file(self, st):
+        """Grow the progress totals as the scanner finds files."""
+        with self._counter_lock:
+            self.total_bytes_to_copy += st.st_size
+            self.total_files_to_process += 1
+
+    def _sync_file(self, pool, src_file, dest_file, rel_file, force, st=None):
+        """
+        Decide whether one source file needs copying and queue it. Returns False once cancelled.
+        'st' is the source stat if the caller already has it (scanner DirEntry).
+        """
+        if self.stop_event.is_set():
+            return False
+
+        if self.file_table is not None:
+            self.file_table.add(rel_file)
+
+        try:
+            # Decide whether to copy
+            metrics = self.metrics
+            if st is None:
+                with metrics.phase("stat"):
+                    st = os.stat(src_file)
+            snapshot = self.snapshot
+            # a snapshot compares against the previous snapshot's files instead: the manifest
+            # can run ahead of it when a snapshot run was cancelled
+            if not force and self.manifest and snapshot is None:
+                with metrics.phase("manifest"):
+                    unchanged = self.manifest.is_unchanged(rel_file, st)
+                if unchanged:
+                    # same size/mtime/inode as last sync: nothing to check on the destination
+                    self._file_done(src_file, dest_file, "Skipped", True)
+                    return True
+            if self.mirror_mode and self.manifest and self._apply_move(src_file, dest_file, rel_file, st):
+                return True
+
+            dest_check = time.perf_counter()
+            dest_size = 0
+            dest_shared = False
+            check_file = dest_file if snapshot is None else snapshot.base_file(rel_file)
+            packed_file = check_file + self.compressor.suffix if self.compressor and check_file else None
+            # one scandir per destination directory instead of exists() + stat() per file
+            dest_st = self.dest_cache.stat(check_file) if check_file else None
+            packed_st = self.dest_cache.stat(packed_file) if packed_file and dest_st is None else None
+            if dest_st is not None:
+                dest_mtime = dest_st.st_mtime
+                dest_size = dest_st.st_size
+                # a hardlinked copy (object store) is shared, so it must be replaced rather than patched
+                dest_shared = dest_st.st_nlink > 1
+                if force or (st.st_mtime > dest_mtime or st.st_size != dest_size):
+                    action = "Updated"
+                elif self.manifest and self._failed_verify(rel_file):
+                    # looks current, but verify() found different content or a delta patch was cut short
+                    action = "Repaired"
+                else:
+                    action = "Skipped"
+            elif packed_st is not None:
+                # a compressed copy has its own size, but carries the source's mtime exactly
+                if force or packed_st.st_mtime != st.st_mtime:
+                    action = "Updated"
+                elif self.manifest and self._failed_verify(rel_file):
+                    action = "Repaired"
+                else:
+                    action = "Skipped"
+            else:
+                action = "Copied new"
+            metrics.add("dest_check", time.perf_counter() - dest_check)
+
+            copy_func = None
+            if self.object_store:
+                # never write through a hardlink: the object is shared with other paths
+                copy_func = self._copy_file_dedup
+            elif self.compressor:
+                copy_func = self._copy_file_compressed
+            elif (action == "Updated" and self.use_delta and dest_size and not dest_shared
+                  and snapshot is None and st.st_size >= self.delta_min_size and self.manifest
+                  and self.manifest.get_signatures(rel_file, self.delta_block_size, dest_st) is not None):
+                action = "Updated (delta)"
+                copy_func = lambda s, d, r=rel_file, t=st: self._copy_file_delta(s, d, r, t)
+            elif self.use_delta and self.manifest and snapshot is None and st.st_size >= self.delta_min_size:
+                # copied whole, but with its block signatures recorded so the next update can be a delta
+                copy_func = lambda s, d, r=rel_file: self._copy_file_signed(s, d, r)
+
+            if action == "Skipped" and snapshot is not None:
+                suffix = "" if dest_st is not None else self.compressor.suffix
+                with metrics.phase("link"):
+                    linked = snapshot.link(rel_file, dest_file, (suffix,))
+                if not linked:
+                    action = "Copied new"
+            if action == "Skipped":
+                self._file_done(src_file, dest_file, action, True, rel_file, st)
+                return True
+            copy_func = copy_func or self._copy_file_chunked
+            on_done = lambda s, d, ok, a=action, r=rel_file, t=st: self._file_done(s, d, a, ok, r, t)
+            timed_copy = lambda s, d, f=copy_func: self._timed_copy(f, s, d)
+            with metrics.phase("copy_wait"):
+                # time spent here means the copy workers are the bottleneck
+                if self._batch is not None:
+                    queued = self._batch.add(src_file, dest_file, st, on_done, timed_copy)
+                else:
+                    queued = pool.submit(src_file, dest_file, st.st_size, on_done, copy_func=timed_copy)
+            if not queued:
+                return False
+        except Exception as e:
+            self.msg_queue.put(("error", f"Error processing {src_file}: {e}"))
+        return True
+
+    # -------------------------
+    # Mirror mode: renames and deletions
+    # -------------------------
+    def _apply_move(self, src_file, dest_file, rel_file, st):
+        """
+        If 'rel_file' is new but its inode/size/mtime match a synced file that has
+        vanished from the source, it was renamed: rename the destination copy too
+        instead of copying the data again. Returns True if it did.
+        """
+        if self.manifest.lookup(rel_file) is not None:
+            return False
+        if any(self.dest_cache.exists(dest_file + suffix) for suffix in ("",) + tuple(compress.SUFFIXES.values())):
+            return False
+        source, destination = self._roots
+        for old_rel in self.manifest.find_moved(st):
+            if old_rel == rel_file or os.path.lexists(os.path.join(source, old_rel)):
+                continue  # still there: a hardlink or copy in the source, not a move
+            old_dest = os.path.join(destination, old_rel)
+            if not move_dest(old_dest, dest_file):
+                continue
+            self.manifest.rename(old_rel, rel_file)
+            with self._counter_lock:
+                self.files_moved += 1
+            self._add_copied(st.st_size)
+            self._file_done(old_dest, dest_file, "Moved", True, rel_file, st)
+            prune_empty_dirs(os.path.dirname(old_dest), destination, keep=self._in_source)
+            return True
+        return False
+
+    def _propagate_deletions(self):
+        """After a complete scan: remove what the manifest has synced but the scan no longer found."""
+        if not self.manifest:
+            self.msg_queue.put(("log", "Mirror: no manifest, deletions are not propagated."))
+            return
+        if self._scan_errors:
+            # an unreadable folder is not a deleted one
+            self.msg_queue.put(("log", "Mirror: scan had errors, deletions are not propagated this time."))
+            return
+        for rel in self.manifest.paths():
+            if self.stop_event.is_set():
+                return
+            # excluded since it was synced: left alone, like rsync without --delete-excluded
+            if rel not in self.file_table and not self.path_filter.excluded_path(rel):
+                self._mirror_remove(rel)
+
+    def _mirror_remove(self, rel):
+        """Delete (or move to the trash) the destination copy of the source file or directory 'rel'."""
+        source, destination = self._roots
+        for rel_file in self.manifest.paths(rel):
+            if os.path.lexists(os.path.join(source, rel_file)):
+                continue  # came back meanwhile
+            dest_file = os.path.join(destination, rel_file)
+            try:
+                for path in dest_variants(dest_file):
+                    if self.trash:
+                        self.trash.move(path, os.path.relpath(path, destination))
+                    else:
+                        os.remove(path)
+                self.manifest.forget(rel_file)
+                with self._counter_lock:
+                    self.files_deleted += 1
+                self.msg_queue.put(("log", f"{'Trashed' if self.trash else 'Deleted'}: {dest_file}"))
+                prune_empty_dirs(os.path.dirname(dest_file), destination, keep=self._in_source)
+            except Exception as e:
+                self.msg_queue.put(("error", f"Failed removing {dest_file}: {e}"))
+        dest_path = os.path.join(destination, rel)
+        if os.path.isdir(dest_path):
+            prune_empty_dirs(dest_path, destination, keep=self._in_source)
+
+    def _in_source(self, dest_dir):
+        """True if the destination directory 'dest_dir' still exists in the source."""
+        source, destination = self._roots
+        return os.path.isdir(os.path.join(source, os.path.relpath(dest_dir, destination)))
+
+    def _failed_verify(self, rel_file):
+        """Is the destination copy known bad: different content, or a delta patch that never finished?"""
+        row = self.manifest.lookup(rel_file)
+        return row is not None and row[3] in ("mismatch", "patching")
+
+    def _copy_error(self, src, dst, error):
+        """CopyEngine callback: a copy function raised instead of reporting failure itself."""
+        self.msg_queue.put(("error", f"Worker failed on {src} -> {dst}: {error!r}"))
+
+    def _timed_copy(self, copy_func, src, dst):
+        """Run one copy on a worker and record how long it took."""
+        started = time.perf_counter()
+        try:
+            return copy_func(src, dst)
+        finally:
+            elapsed = time.perf_counter() - started
+            self.metrics.add("copy", elapsed)
+            self.metrics.observe_copy(elapsed)
+
+    def _file_done(self, src_file, dest_file, action, ok, rel_file=None, st=None):
+        """Count a finished file and report it. Called from the sync thread or a copy worker."""
+        if ok and rel_file is not None and self.manifest:
+            with self.metrics.phase("manifest"):
+                self.manifest.record(rel_file, st)
+        with self._counter_lock:
+            self.files_processed += 1
+            progress = (self.bytes_copied, self.total_bytes_to_copy, self.files_processed,
+                        self.total_files_to_process)
+        trace = self.trace
+        # unchanged files of a full scan would only bloat the trace
+        if trace is not None and (action != "Skipped" or self.metrics.mode == "paths"):
+            trace.decision(rel_file or os.path.relpath(src_file, self._roots[0]), action, ok)
+        # log actions (avoid logging every skipped file if verbose)
+        if action != "Skipped" and ok:
+            self.msg_queue.put(("log", f"{action}: {src_file} -> {dest_file}"))
+        # also push periodic progress update
+        self._put_progress(progress)
+
+    # -------------------------
+    # Verification
+    # -------------------------
+    def verify(self, source, destination):
+        """
+        Blocking check that the destination holds the same content as the source:
+        both sides are hashed on 'verify_workers' threads and mismatches reported
+        as errors (and marked in the manifest, so the next sync copies them again).
+        Hashes are cached by (device, inode, size, mtime_ns), so unchanged source
+        files are read once; destination files are re-read after verify_recheck_days.
+        """
+        try:
+            self.stop_event.clear()
+            self.bytes_copied = 0
+            self.files_processed = 0
+            self.total_bytes_to_copy = 0
+            self.total_files_to_process = 0
+            self.verify_counts = dict.fromkeys(("ok", "mismatch", "missing", "pending", "cached"), 0)
+            self.path_filter = PathFilter.for_source(source, self.filter_rules)
+            try:
+                self.manifest = SyncManifest(destination)
+            except Exception as e:
+                self.manifest = None
+                self.msg_queue.put(("log", f"Manifest unavailable, verifying by timestamps: {e}"))
+            self.hash_cache = HashCache(destination)
+            tree = destination
+            if self.snapshot_mode:
+                tree = SnapshotSet(destination).latest() or destination
+
+            pool = CopyEngine(None, workers=self.verify_workers, max_inflight_bytes=self.max_inflight_bytes,
+                              stop_event=self.stop_event, on_error=self._copy_error)
+            try:
+                scanner = TreeScanner(source, self.stop_event, on_file=self._count_scanned_file,
+                                      on_error=self._scan_error, maxsize=self.scan_queue_size,
+                                      path_filter=self.path_filter)
+                scanner.start()
+                for kind, src_path, rel, st in scanner:
+                    if kind != "file":
+                        continue
+                    if not pool.submit(src_path, os.path.join(tree, rel), st.st_size,
+                                       copy_func=lambda s, d, r=rel, t=st: self._verify_file(s, d, r, t)):
+                        break
+                scanner.join()
+            finally:
+                pool.shutdown()
+                self.hash_cache.close()
+                self.hash_cache = None
+                if self.manifest:
+                    self.manifest.close()
+                    self.manifest = None
+
+            if self.stop_event.is_set():
+                self.msg_queue.put(("log", "Verify cancelled."))
+                return
+            counts = self.verify_counts
+            if self.total_bytes_to_copy:
+                self.msg_queue.put(("progress", (self.bytes_copied, self.total_bytes_to_copy,
+                                                 self.files_processed, self.total_files_to_process)))
+            self.msg_queue.put(("log", f"Verify: {counts['ok']} ok, {counts['mismatch']} mismatched, "
+                                       f"{counts['missing']} missing, {counts['pending']} not synced yet "
+                                       f"({counts['cached']} hash(es) from cache)."))
+            self.msg_queue.put(("done", "Verify finished." if not (counts["mismatch"] or counts["missing"])
+                                        else "Verify finished with problems."))
+        except Exception as e:
+            self.msg_queue.put(("error", f"Verify crashed: {e}"))
+
+    def _verify_file(self, src_file, dest_file, rel_file, st):
+        """Compare one source file with its destination copy. Called from worker thread."""
+        try:
+            outcome = self._verify_outcome(src_file, dest_file, rel_file, st)
+        except Exception as e:
+            outcome = None
+            self.msg_queue.put(("error", f"Cannot verify {src_file}: {e}"))
+        with self._counter_lock:
+            if outcome:
+                self.verify_counts[outcome] += 1
+            self.files_processed += 1
+        if outcome == "mismatch":
+            self.msg_queue.put(("error", f"Verify mismatch: {src_file} -> {dest_file}"))
+            if self.manifest:
+                self.manifest.record(rel_file, st, state="mismatch")
+        elif outcome == "missing":
+            self.msg_queue.put(("error", f"Verify: missing {dest_file}"))
+            if self.manifest:
+                self.manifest.record(rel_file, st, state="missing")
+        # hashed or not, the file is dealt with as far as progress goes
+        self._add_copied(st.st_size)
+        return outcome == "ok"
+
+    def _verify_outcome(self, src_file, dest_file, rel_file, st):
+        row = self.manifest.lookup(rel_file) if self.manifest else None
+        if row is not None and not self.manifest.is_unchanged(rel_file, st):
+            return "pending"  # changed since the last sync, the copy is expected to differ
+        variants = dest_variants(dest_file)
+        if not variants:
+            return "missing" if row is not None else "pending"
+        stored = variants[0]
+        dest_st = os.stat(stored)
+        if row is None and abs(dest_st.st_mtime - st.st_mtime) > 2:
+            return "pending"  # no record and not the same timestamp: not synced yet
+
+        cache = self.hash_cache
+        src_digest = cache.get(st)
+        if src_digest is None:
+            src_digest = hash_file(src_file, stop_event=self.stop_event)
+            if src_digest is None:
+                return None
+            cache.put(st, src_digest)
+        else:
+            with self._counter_lock:
+                self.verify_counts["cached"] += 1
+
+        dest_digest = None
+        if self.verify_recheck_days > 0:
+            dest_digest = cache.get(dest_st, max_age=self.verify_recheck_days * 86400)
+        if dest_digest is None:
+            dest_digest = hash_file(stored, codec_for(stored) if stored != dest_file else None, self.stop_event)
+            if dest_digest is None:
+                return None
+            cache.put(dest_st, dest_digest)
+        else:
+            with self._counter_lock:
+                self.verify_counts["cached"] += 1
+        return "ok" if src_digest == dest_digest else "mismatch"
+
+    # -------------------------
+    # Public start/stop helpers
+    # -------------------------
+    def is_running(self):
+        return bool(self.sync_thread and self.sync_thread.is_alive())
+
+    def start(self, source, destination, force=False, paths=None, skip_unchanged=False):
+        """
+        Start sync() in a background thread (non-blocking). Returns True if it started.
+        'paths' limits the sync to those changed source files.
+        'skip_unchanged' makes it a no-op when the source has not changed (scheduled runs).
+        """
+        if not self._can_start(source, destination):
+            return False
+
+        if paths is None:
+            # a full walk picks up everything watchdog has queued so far
+            self.dirty_paths.clear()
+
+        self._launch(self.sync, (source, destination, force, paths, skip_unchanged))
+        self.msg_queue.put(("log", "Background sync started."))
+        return True
+
+    def start_verify(self, source, destination):
+        """Start verify() in a background thread, on the same slot as a sync. Returns True if it started."""
+        if not self._can_start(source, destination):
+            return False
+        self._launch(self.verify, (source, destination))
+        self.msg_queue.put(("log", "Verification started."))
+        return True
+
+    def _can_start(self, source, destination):
+        if self.is_running():
+            self.msg_queue.put(("log", "Sync already running."))
+            return False
+        if not os.path.isdir(source) or not os.path.isdir(destination):
+            self.msg_queue.put(("log", "Invalid source or destination."))
+            return False
+        return True
+
+    def _launch(self, target, args):
+        # the real scan takes over from a warm-up still in progress
+        self._prewarm_stop.set()
+        self.stop_event.clear()
+        self.bytes_copied = 0
+        self.files_processed = 0
+        self.sync_thread = threading.Thread(target=target, args=args, daemon=True)
+        self.sync_thread.start()
+
+    def prewarm(self, source, destination):
+        """
+        Walk the source once in the background (at startup, while the intro plays)
+        so the first sync finds directory entries and the manifest in the OS cache,
+        and report how much changed since the last backup. Returns True if started.
+        """
+        if self.is_running() or (self._prewarm_thread and self._prewarm_thread.is_alive()):
+            return False
+        if not os.path.isdir(source) or not os.path.isdir(destination):
+            return False
+        self._prewarm_stop = threading.Event()
+        self._prewarm_thread = threading.Thread(target=self._prewarm, args=(source, destination, self._prewarm_stop),
+                                                daemon=True, name="astra-prewarm")
+        self._prewarm_thread.start()
+        return True
+
+    def _prewarm(self, source, destination, stop):
+        started = time.perf_counter()
+        files = total_bytes = changed = changed_bytes = 0
+        manifest = None
+        try:
+            path_filter = PathFilter.for_source(source, self.filter_rules)
+            if os.path.exists(os.path.join(destination, SyncManifest.FILENAME)):
+                manifest = SyncManifest(destination)
+            for kind, _, rel, st in scan_tree(source, stop, path_filter=path_filter):
+                if kind != "file":
+                    continue
+                files += 1
+                total_bytes += st.st_size
+                if manifest is None or not manifest.is_unchanged(rel, st):
+                    changed += 1
+                    changed_bytes += st.st_size
+        except Exception as e:
+            self.msg_queue.put(("log", f"Warm-up scan stopped: {e}"))
+            return
+        finally:
+            if manifest:
+                manifest.close()
+        if stop.is_set():
+            return
+        self.prewarm_result = {"source": source, "destination": destination, "files": files, "bytes": total_bytes,
+                               "changed": changed, "changed_bytes": changed_bytes,
+                               "seconds": time.perf_counter() - started}
+        self.msg_queue.put(("log", f"Ready: {files} files ({human_readable(total_bytes)}) in the source, "
+                                   f"{changed} new or changed since the last backup ({human_readable(changed_bytes)})."))
+
+    def cancel(self):
+        """Request cancellation. Worker will exit soon after next chunk/check."""
+        if self.is_running():
+            self.stop_event.set()
+            self.msg_queue.put(("log", "Cancellation requested."))
+
+    def save_last_backup_time(self):
+        backup_time = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+        with open(self.last_backup_file, "w") as f:
+            f.write(backup_time)
+
+    def last_backup_time(self):
+        """When the last backup finished (a datetime), or None if unknown."""
+        try:
+            with open(self.last_backup_file) as f:
+                return datetime.strptime(f.read().strip(), "%Y-%m-%d %H:%M:%S")
+        except (OSError, ValueError):
+            return None
+
+    # -------------------------
+    # Watch mode
+    # -------------------------
+    def is_watching(self):
+        return bool(self.observer and self.observer.is_alive())
+
+    def start_watch(self, source, destination, logger=None):
+        """Feed watchdog events for 'source' into dirty_paths. 'logger(line)' gets the event log."""
+        if self.is_watching():
+            return False
+        # imported here so plain scheduled runs never load watchdog
+        from watchdog.observers import Observer
+        from watcher import WatchHandler
+
+        handler = WatchHandler(source, destination, logger or (lambda line: self.msg_queue.put(("log", line))),
+                               dirty_paths=self.dirty_paths,
+                               path_filter=PathFilter.for_source(source, self.filter_rules),
+                               recorder=self.trace)
+        self.observer = Observer()
+        self.observer.schedule(handler, path=source, recursive=True)
+        self.observer.start()
+        return True
+
+    def stop_watch(self):
+        if self.is_watching():
+            self.observer.stop()
+            self.observer.join()
+            return True
+        return False
+
+    def start_trace(self, path, source):
+        """
+        Record watchdog events and sync decisions to 'path' (see workload_trace) until
+        stop_trace(). Call before start_watch() to capture the events as well.
+        """
+        self.stop_trace()
+        self.trace = TraceRecorder(path, source)
+
+    def stop_trace(self):
+        if self.trace is not None:
+            trace, self.trace = self.trace, None
+            trace.close()
+            return trace.records
+        return 0
+
+    def sync_dirty_paths(self, source, destination):
+        """Start an incremental sync of settled watchdog changes, if any and if idle."""
+        if self.is_running():
+            return False
+        paths = self.dirty_paths.drain_ready()
+        if not paths:
+            return False
+        return self.start(source, destination, paths=paths)
@@ -0,0 +1,107 @@
+# fastcopy.py
+import errno
+import os
+import sys
+import threading
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+
+FICLONE = 0x40049409  # from <linux/fs.h>, _IOW(0x94, 9, int)
+_IS_LINUX = sys.platform.startswith("linux")
+
+# errors meaning "this method doesn't work here", not "the copy failed"
+_UNSUPPORTED = {errno.ENOSYS, errno.EXDEV, errno.EINVAL, errno.EOPNOTSUPP, errno.ENOTTY,
+                errno.EBADF, errno.EPERM, errno.ETXTBSY}
+
+# flipped off the first time the kernel says a syscall does not exist at all
+_can_reflink = _IS_LINUX and fcntl is not None
+_can_copy_file_range = hasattr(os, "copy_file_range")
+_can_sendfile = _IS_LINUX and hasattr(os, "sendfile")
+
+# calls made per method since start, for benchmarks (/proc/self/io does not see FICLONE)
+_calls = {"ficlone": 0, "copy_file_range": 0, "sendfile": 0}
+_calls_lock = threading.Lock()
+
+
+def _count(method):
+    with _calls_lock:
+        _calls[method] += 1
+
+
+def call_counts():
+    """{method: calls} of the kernel copy syscalls made so far, failed attempts included."""
+    with _calls_lock:
+        return dict(_calls)
+
+
+def try_reflink(src_fd, dst_fd):
+    """Clone the whole file with FICLONE (btrfs, XFS, bcachefs...). True if it worked."""
+    global _can_reflink
+    if not _can_reflink:
+        return False
+    _count("ficlone")
+    try:
+        fcntl.ioctl(dst_fd, FICLONE, src_fd)
+        return True
+    except OSError as e:
+        if e.errno in (errno.ENOSYS, errno.ENOTTY):
+            _can_reflink = False
+        if e.errno in _UNSUPPORTED:
+            return False
+        raise
+
+
+def kernel_copy(src_fd, dst_fd, size, on_progress=None, stop_event=None, segment_size=8 * 1024 * 1024, offset=0):
+    """
+    Copy bytes 'offset'..'size' inside the kernel, trying FICLONE (whole files only),
+    copy_file_range and sendfile in turn.
+
+    Works in 'segment_size' steps so 'stop_event' is honoured and 'on_progress(nbytes)'
+    is called between segments. Returns the number of bytes copied; if that is less
+    than 'size' and no stop was requested, the caller should finish the rest itself
+    starting at that offset (seek both files first, their positions are not kept).
+    """
+    global _can_copy_file_range, _can_sendfile
+
+    if offset == 0 and size > 0 and try_reflink(src_fd, dst_fd):
+        if on_progress:
+            on_progress(size)
+        return size
+
+    for method in ("copy_file_range", "sendfile"):
+        if method == "copy_file_range" and not _can_copy_file_range:
+            continue
+        if method == "sendfile" and not _can_sendfile:
+            continue
+        while offset < size:
+            if stop_event is not None and stop_event.is_set():
+                return offset
+            count = min(segment_size, size - offset)
+            _count(method)
+            try:
+                if method == "copy_file_range":
+                    n = os.copy_file_range(src_fd, dst_fd, count, offset, offset)
+                else:
+                    os.lseek(dst_fd, offset, os.SEEK_SET)
+                    n = os.sendfile(dst_fd, src_fd, offset, count)
+            except OSError as e:
+                if e.errno not in _UNSUPPORTED:
+                    raise
+                if e.errno == errno.ENOSYS:
+                    if method == "copy_file_range":
+                        _can_copy_file_range = False
+                    else:
+                        _can_sendfile = False
+                break  # try the next method from the same offset
+            if n == 0:
+                # source shrank underneath us
+                return offset
+            offset += n
+            if on_progress:
+                on_progress(n)
+        if offset >= size:
+            break
+    return offset
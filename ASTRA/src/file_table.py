@@ -0,0 +1,106 @@
+# file_table.py
+import os
+from array import array
+
+_EMPTY = -1
+
+
+class FileTable:
+    """
+    Compact set of the relative paths a full scan has found, so mirror and
+    snapshot mode can tell which destination files no longer exist in the source.
+
+    A set of path strings costs well over a hundred bytes per file, GBs for a
+    10M-file tree. Here directory paths are stored once each (files refer to
+    theirs by index), file names are packed into one bytes buffer, and lookup
+    goes through an open-addressing hash index that is itself an array of ints.
+
+    Files are numbered in the order they were added. Not thread-safe: fill it
+    and read it from one thread.
+    """
+
+    def __init__(self):
+        self._dirs = []  # directory rel paths ("." for the root), each stored once
+        self._dir_index = {}  # rel -> index into _dirs
+        self._dir = array("I")  # per file: index into _dirs
+        self._name_end = array("Q")  # per file: end of its name in _names (start = previous end)
+        self._names = bytearray()
+        self._slots = array("i", [_EMPTY]) * 16  # hash index: file number or _EMPTY
+        self._last_dir = (None, 0)  # files arrive grouped by directory: skip the dict lookup
+
+    def __len__(self):
+        return len(self._dir)
+
+    # -------------------------
+    # Filling
+    # -------------------------
+    def add_dir(self, rel):
+        index = self._dir_index.get(rel)
+        if index is None:
+            index = len(self._dirs)
+            self._dirs.append(rel)
+            self._dir_index[rel] = index
+        return index
+
+    def add(self, rel):
+        """Add the file at 'rel' (relative path). Returns its number."""
+        folder, name = os.path.split(rel)
+        folder = folder or "."
+        if self._last_dir[0] == folder:
+            dir_index = self._last_dir[1]
+        else:
+            dir_index = self.add_dir(folder)
+            self._last_dir = (folder, dir_index)
+        number = len(self._dir)
+        self._dir.append(dir_index)
+        self._names += name.encode("utf-8", "surrogateescape")
+        self._name_end.append(len(self._names))
+        if 2 * (number + 1) > len(self._slots):
+            self._rehash(2 * len(self._slots))
+        else:
+            self._insert(number, hash((dir_index, name)))
+        return number
+
+    def _insert(self, number, h):
+        slots = self._slots
+        mask = len(slots) - 1
+        i = h & mask
+        while slots[i] != _EMPTY:
+            i = (i + 1) & mask
+        slots[i] = number
+
+    def _rehash(self, size):
+        self._slots = array("i", [_EMPTY]) * size
+        for number in range(len(self._dir)):
+            self._insert(number, hash((self._dir[number], self.name(number))))
+
+    # -------------------------
+    # Reading
+    # -------------------------
+    def name(self, number):
+        start = self._name_end[number - 1] if number else 0
+        return self._names[start:self._name_end[number]].decode("utf-8", "surrogateescape")
+
+    def rel(self, number):
+        folder = self._dirs[self._dir[number]]
+        name = self.name(number)
+        return name if folder == "." else os.path.join(folder, name)
+
+    def index_of(self, rel):
+        """Number of the file at 'rel', or None."""
+        folder, name = os.path.split(rel)
+        dir_index = self._dir_index.get(folder or ".")
+        if dir_index is None:
+            return None
+        slots = self._slots
+        mask = len(slots) - 1
+        i = hash((dir_index, name)) & mask
+        while slots[i] != _EMPTY:
+            number = slots[i]
+            if self._dir[number] == dir_index and self.name(number) == name:
+                return number
+            i = (i + 1) & mask
+        return None
+
+    def __contains__(self, rel):
+        return self.index_of(rel) is not None
@@ -0,0 +1,132 @@
+# filters.py
+import os
+import re
+
+IGNORE_FILE = ".astraignore"  # optional rules file in the source root
+
+# what ASTRA always skipped: hidden files, editor backups (name~) and Office/macOS
+# temp files (.sb-); hidden *directories* are still walked unless a rule says otherwise
+DEFAULT_RULES = [".*", "!.*/", "*~", "*.sb-*"]
+
+
+def _translate(pattern):
+    """Glob -> regex: '*' and '?' stay inside one path segment, '**' crosses them."""
+    out = []
+    i, n = 0, len(pattern)
+    while i < n:
+        c = pattern[i]
+        if pattern.startswith("**/", i):
+            out.append("(?:.*/)?")  # zero or more directories
+            i += 3
+            continue
+        if pattern.startswith("**", i):
+            out.append(".*")
+            i += 2
+            continue
+        if c == "*":
+            out.append("[^/]*")
+        elif c == "?":
+            out.append("[^/]")
+        elif c == "[":
+            end = pattern.find("]", i + 2 if pattern.startswith("[!", i) else i + 1)
+            if end == -1:
+                out.append(re.escape(c))
+            else:
+                body = pattern[i + 1:end]
+                if body.startswith("!"):
+                    body = "^" + body[1:]
+                out.append("[" + body.replace("\\", "\\\\") + "]")
+                i = end + 1
+                continue
+        elif c == "\\" and i + 1 < n:
+            out.append(re.escape(pattern[i + 1]))
+            i += 2
+            continue
+        else:
+            out.append(re.escape(c))
+        i += 1
+    return "".join(out)
+
+
+def parse_rule(line):
+    """
+    One gitignore-style line -> (regex source, negate, dir_only), or None for
+    blanks and comments. A pattern with a slash (other than a trailing one) is
+    relative to the source root, otherwise it matches the name at any depth.
+    """
+    line = line.rstrip("\n").rstrip()
+    if not line or line.startswith("#"):
+        return None
+    negate = line.startswith("!")
+    if negate:
+        line = line[1:]
+    elif line.startswith("\\"):
+        line = line[1:]  # "\#name" / "\!name"
+    dir_only = line.endswith("/")
+    line = line.rstrip("/")
+    if not line:
+        return None
+    anchored = "/" in line
+    regex = _translate(line.lstrip("/"))
+    if not anchored:
+        regex = "(?:.*/)?" + regex
+    return regex, negate, dir_only
+
+
+class PathFilter:
+    """
+    Compiled include/exclude rules with gitignore semantics: the last matching
+    rule wins, '!' re-includes, a trailing '/' only matches directories.
+
+    Rules are compiled once; consecutive rules of the same kind are merged into
+    a single regex, so a check costs a handful of matches however long the list
+    is. The scanner asks about every entry and prunes excluded directories
+    without listing them; excluded_path() also checks the parents, for paths
+    that come from elsewhere (watchdog events).
+    """
+
+    def __init__(self, rules=()):
+        self.rules = list(rules)
+        groups = []  # [(negate, dir_only, [regex, ...]), ...] in rule order
+        for line in self.rules:
+            parsed = parse_rule(line)
+            if parsed is None:
+                continue
+            regex, negate, dir_only = parsed
+            if groups and groups[-1][0] == negate and groups[-1][1] == dir_only:
+                groups[-1][2].append(regex)
+            else:
+                groups.append((negate, dir_only, [regex]))
+        # checked back to front, so the first hit is the last matching rule
+        self._groups = [(negate, dir_only, re.compile("(?:" + "|".join(regexes) + r")\Z"))
+                        for negate, dir_only, regexes in reversed(groups)]
+
+    @classmethod
+    def for_source(cls, source, extra_rules=()):
+        """DEFAULT_RULES, then 'extra_rules', then the source's .astraignore (later rules win)."""
+        rules = DEFAULT_RULES + list(extra_rules)
+        try:
+            with open(os.path.join(source, IGNORE_FILE), encoding="utf-8") as f:
+                rules += f.read().splitlines()
+        except FileNotFoundError:
+            pass
+        return cls(rules)
+
+    def excluded(self, rel, is_dir=False):
+        """Is the file/directory at 'rel' (relative to the source root) excluded itself?"""
+        if os.sep != "/":
+            rel = rel.replace(os.sep, "/")
+        for negate, dir_only, regex in self._groups:
+            if dir_only and not is_dir:
+                continue
+            if regex.match(rel):
+                return not negate
+        return False
+
+    def excluded_path(self, rel, is_dir=False):
+        """Like excluded(), but also true if any parent directory of 'rel' is excluded."""
+        parts = rel.replace(os.sep, "/").split("/")
+        for depth in range(1, len(parts)):
+            if self.excluded("/".join(parts[:depth]), True):
+                return True
+        return self.excluded(rel, is_dir)
@@ -12,6 +12,8 @@ class IntroFrame(tk.Frame):
         self.max_step = 100
         self.bg_step = 0
         self.bg_target_rgb = (53, 53, 53)
+        self._after_id = None  # the pending animation step, so skip() can cancel it
+        self._finished = False
 
         self.center_frame = tk.Frame(self, bg="black")
         self.center_frame.place(relx=0.5, rely=0.5, anchor="center")
@@ -43,9 +45,9 @@ class IntroFrame(tk.Frame):
             self.label.config(fg=color)
             self.subtitle.config(fg=color)
             self.fade_step += 1
-            self.after(20, self.fade_in_text)
+            self._after_id = self.after(20, self.fade_in_text)
         else:
-            self.after(1500, self.fade_out_text)
+            self._after_id = self.after(1500, self.fade_out_text)
 
     def fade_out_text(self):
         if self.fade_step >= 0:
@@ -54,7 +56,7 @@ class IntroFrame(tk.Frame):
             self.label.config(fg=color)
             self.subtitle.config(fg=color)
             self.fade_step -= 1
-            self.after(20, self.fade_out_text)
+            self._after_id = self.after(20, self.fade_out_text)
         else:
             self.label.destroy()
             self.subtitle.destroy()
@@ -69,6 +71,18 @@ class IntroFrame(tk.Frame):
             color = f'#{r:02x}{g:02x}{b:02x}'
             self.configure(bg=color)
             self.bg_step += 1
-            self.after(20, self.fade_in_background)
+            self._after_id = self.after(20, self.fade_in_background)
         else:
+            self._finish()
+
+    def skip(self):
+        """Jump straight to the main screen (click / Enter / Space during the intro)."""
+        if self._after_id is not None:
+            self.after_cancel(self._after_id)
+            self._after_id = None
+        self._finish()
+
+    def _finish(self):
+        if not self._finished:
+            self._finished = True
             self.switch_callback()
@@ -0,0 +1,190 @@
+# jobs.py
+import json
+import os
+import queue
+import time
+
+from engine import SyncEngine
+from schedule import BackupScheduler, CronExpression, Interval, parse_schedule
+
+
+def device_id(path):
+    """
+    Identify the physical device 'path' lives on.
+
+    On Linux partitions are mapped to their parent disk via /sys, so two
+    partitions of one drive count as the same device. Elsewhere (and for
+    network or virtual filesystems) the filesystem's st_dev is used.
+    """
+    st_dev = os.stat(path).st_dev
+    major, minor = os.major(st_dev), os.minor(st_dev)
+    sys_path = f"/sys/dev/block/{major}:{minor}"
+    try:
+        real = os.path.realpath(sys_path)
+        if os.path.exists(os.path.join(real, "partition")):
+            real = os.path.dirname(real)
+        return os.path.basename(real) if os.path.exists(real) else st_dev
+    except OSError:
+        return st_dev
+
+
+class BackupJob:
+    """
+    One source -> destination pair with its own interval (minutes; 0 = run once)
+    or cron 'schedule' (e.g. "30 1 * * *"), which takes precedence.
+    """
+
+    def __init__(self, name, source, destination, interval=60, force=False, last_backup_file=None, exclude=None,
+                 schedule=None):
+        self.name = name
+        self.source = source
+        self.destination = destination
+        self.interval = interval
+        self.schedule = parse_schedule(schedule) if schedule else (Interval(interval) if interval > 0 else None)
+        self.scheduler = None  # BackupScheduler: for an interval from the end of the first run on
+        self.force = force
+        self.engine = SyncEngine(queue.Queue(), last_backup_file=last_backup_file or f"last_backup_{name}.txt")
+        self.engine.metrics_labels = {"job": name}
+        self.engine.filter_rules = list(exclude or [])  # gitignore-style, see filters.PathFilter
+        self.next_run = time.monotonic()  # an interval or run-once job is due right away
+        if isinstance(self.schedule, CronExpression):
+            # as with astra_cli --schedule: wait for the first matching time, unless one was missed
+            self.scheduler = BackupScheduler(self.schedule, last_run=self.engine.last_backup_time())
+            self.next_run += self.scheduler.seconds_left()
+        self.running = False
+        self.devices = set()
+        self.runs = 0
+
+    @classmethod
+    def from_dict(cls, data):
+        return cls(data["name"], data["source"], data["destination"], interval=data.get("interval", 60),
+                   force=data.get("force", False), last_backup_file=data.get("last_backup_file"),
+                   exclude=data.get("exclude"), schedule=data.get("schedule"))
+
+    def reschedule(self, now):
+        """
+        Monotonic time of the next run, or None for a run-once job. Slots follow the
+        schedule from the first run on, so how long each run takes does not shift them.
+        """
+        if self.schedule is None:
+            return None
+        if self.scheduler is None:
+            self.scheduler = BackupScheduler(self.schedule)
+        return now + self.scheduler.seconds_left()
+
+    def take_slot(self):
+        """The job is about to run: move its scheduler on to the next slot."""
+        if self.scheduler is not None and self.scheduler.due():
+            missed = self.scheduler.consume()
+            if missed:
+                self.engine.msg_queue.put(("log", f"Catching up: {missed} scheduled run(s) were missed."))
+
+
+def load_jobs(path):
+    """Read a jobs file: {"max_jobs_per_device": 1, "jobs": [{"name", "source", "destination", "interval" or "schedule", "exclude"}, ...]}."""
+    with open(path) as f:
+        data = json.load(f)
+    return [BackupJob.from_dict(j) for j in data.get("jobs", [])], data.get("max_jobs_per_device", 1)
+
+
+class JobScheduler:
+    """
+    Runs many BackupJobs, each on its own SyncEngine.
+
+    Jobs on different devices run at the same time; a job only starts when both its
+    source and destination device have fewer than 'max_per_device' jobs running,
+    so two jobs never thrash the same disk while other disks sit idle. Call tick()
+    regularly (Tk after() or a plain loop); job messages are forwarded to 'msg_queue'
+    with the job name in front.
+    """
+
+    def __init__(self, msg_queue=None, max_per_device=1):
+        self.msg_queue = msg_queue if msg_queue is not None else queue.Queue()
+        self.max_per_device = max(1, int(max_per_device))
+        self.jobs = []
+        self._busy = {}  # device -> running job count
+
+    def add(self, job):
+        if any(j.name == job.name for j in self.jobs):
+            raise ValueError(f"Duplicate job name: {job.name}")
+        self.jobs.append(job)
+
+    def remove(self, name):
+        for job in self.jobs:
+            if job.name == name:
+                job.engine.cancel()
+                self.jobs.remove(job)
+                return True
+        return False
+
+    def running_jobs(self):
+        return [j for j in self.jobs if j.running]
+
+    def finished(self):
+        """True once every run-once job has run and nothing is running or scheduled."""
+        return all(not j.running and j.next_run is None for j in self.jobs)
+
+    def tick(self, now=None):
+        if now is None:
+            now = time.monotonic()
+
+        # finished jobs give their devices back
+        for job in self.jobs:
+            if job.running and not job.engine.is_running():
+                job.running = False
+                job.runs += 1
+                self._release(job)
+                job.next_run = job.reschedule(now)
+
+        # start due jobs, longest overdue first, as long as their devices have room
+        due = sorted((j for j in self.jobs if not j.running and j.next_run is not None and j.next_run <= now),
+                     key=lambda j: j.next_run)
+        for job in due:
+            job.take_slot()
+            try:
+                devices = {device_id(job.source), device_id(job.destination)}
+            except OSError as e:
+                self.msg_queue.put(("error", f"[{job.name}] {e}"))
+                job.next_run = job.reschedule(now)
+                continue
+            if any(self._busy.get(d, 0) >= self.max_per_device for d in devices):
+                continue  # waits for its disk; other jobs keep going
+            # after the first run, a job whose source did not change is skipped cheaply
+            if job.engine.start(job.source, job.destination, force=job.force,
+                                skip_unchanged=job.runs > 0 and not job.force):
+                job.running = True
+                job.devices = devices
+                for d in devices:
+                    self._busy[d] = self._busy.get(d, 0) + 1
+            else:
+                job.next_run = job.reschedule(now)
+
+        self._forward_messages()
+
+    def cancel_all(self):
+        for job in self.jobs:
+            job.engine.cancel()
+
+    def join(self):
+        for job in self.jobs:
+            if job.engine.sync_thread:
+                job.engine.sync_thread.join()
+        self._forward_messages()
+
+    def _release(self, job):
+        for d in job.devices:
+            self._busy[d] -= 1
+            if not self._busy[d]:
+                del self._busy[d]
+        job.devices = set()
+
+    def _forward_messages(self):
+        for job in self.jobs:
+            while True:
+                try:
+                    mtype, payload = job.engine.msg_queue.get_nowait()
+                except queue.Empty:
+                    break
+                if mtype in ("log", "done", "error"):
+                    payload = f"[{job.name}] {payload}"
+                self.msg_queue.put((mtype, payload))
@@ -0,0 +1,60 @@
+# log_buffer.py
+import logging
+import threading
+from collections import deque
+from logging.handlers import RotatingFileHandler
+
+
+class LogBuffer:
+    """
+    Thread-safe line buffer between the sync threads and the terminal widget.
+
+    Writers call write()/append() from any thread; the UI calls drain() once per
+    poll tick and inserts everything in one go. Only the newest 'max_lines' are
+    kept for display, so a huge burst costs a bounded amount of memory and widget
+    work. With 'log_file' set every line is also written to a rotating file.
+    """
+
+    def __init__(self, max_lines=2000, log_file=None, max_file_bytes=5 * 1024 * 1024, backup_count=3):
+        self.max_lines = max_lines
+        self._lock = threading.Lock()
+        self._pending = deque(maxlen=max_lines)
+        self._dropped = 0
+        self._partial = ""  # text written without a trailing newline yet
+
+        self._file_logger = None
+        if log_file:
+            handler = RotatingFileHandler(log_file, maxBytes=max_file_bytes, backupCount=backup_count,
+                                          encoding="utf-8")
+            handler.setFormatter(logging.Formatter("%(asctime)s %(message)s"))
+            self._file_logger = logging.getLogger(f"astra.terminal.{id(self)}")
+            self._file_logger.propagate = False
+            self._file_logger.setLevel(logging.INFO)
+            self._file_logger.addHandler(handler)
+
+    def append(self, line):
+        """Add one complete line."""
+        with self._lock:
+            if len(self._pending) == self._pending.maxlen:
+                self._dropped += 1
+            self._pending.append(line)
+        if self._file_logger:
+            self._file_logger.info(line)
+
+    def write(self, text):
+        """File-like write (used for the stdout/stderr redirect); splits into lines."""
+        with self._lock:
+            text = self._partial + text
+            lines = text.split("\n")
+            self._partial = lines.pop()
+        for line in lines:
+            self.append(line)
+
+    def drain(self):
+        """Return (new_lines, dropped) since the last call; 'dropped' lines were too old to display."""
+        with self._lock:
+            lines = list(self._pending)
+            dropped = self._dropped
+            self._pending.clear()
+            self._dropped = 0
+        return lines, dropped
@@ -5,14 +5,16 @@ from tkinter import ttk
 from PIL import Image, ImageTk
 import time
 import os
-from watchdog.observers import Observer
-from watchdog.events import FileSystemEventHandler
-import threading
 import shutil
 from datetime import datetime
 import queue
 import math
 
+from engine import SyncEngine, human_readable
+from log_buffer import LogBuffer
+from settings import load_settings, save_settings
+from schedule import BackupScheduler, parse_schedule
+
 
 class TitleBar(tk.Frame):
     def __init__(self, master):
@@ -46,57 +48,24 @@ class TitleBar(tk.Frame):
         return os.path.join(base_path, relative_path)
 
 
-class WatchHandler(FileSystemEventHandler):
-    def __init__(self, source_path, dest_path, logger):
-        super().__init__()
-        self.source_path = source_path
-        self.dest_path = dest_path
-        self.logger = logger
-
-        self.logger("Name                                                                       | Status    | Kind   | Size     | Date Modified")
-        self.logger("-" * 80)
-
-    def on_created(self, event):
-        if not event.is_directory:
-            self._log_file_info(event.src_path, status="New")
-
-    def on_modified(self, event):
-        if not event.is_directory:
-            self._log_file_info(event.src_path, status="Modified")
-
-    def _log_file_info(self, file_path, status):
-        try:
-            name = os.path.basename(file_path)
-            ext = os.path.splitext(name)[1] or "-"
-            size_bytes = os.path.getsize(file_path)
-            size_kb = f"{size_bytes / 1024:.1f} KB"
-            mtime = os.path.getmtime(file_path)
-            mod_time = datetime.fromtimestamp(mtime).strftime("%Y-%m-%d %H:%M:%S")
-
-            log_line = f"{name:<30}                                                                       | {status:<9} | {ext:<6} | {size_kb:<8} | {mod_time}"
-            self.logger(log_line)
-
-        except Exception as e:
-            self.logger(f"File in use {file_path}")
-
-
 class MainFrame(tk.Frame):
     def __init__(self, master):
         super().__init__(master, bg="#1E1E1E")
         self.master = master
-        self.backup_interval = 60
-        self.remaining_seconds = self.backup_interval * 60
-        self.observer = None
+        self.settings = load_settings()  # last used paths and interval
+        self.backup_interval = self.settings.get("interval", 60)  # minutes, or a cron expression
+        self.dest_path = None
+        self.scheduler = None  # BackupScheduler while monitoring
         self.timer_running = False
-        self.timer_paused = False
+        self._countdown_id = None
 
-        self.stop_event = threading.Event()  # to request cancellation
-        self.sync_thread = None  # background sync thread
         self.msg_queue = queue.Queue()  # thread-safe queue for UI messages
-        self.total_bytes_to_copy = 0
-        self.bytes_copied = 0
-        self.total_files_to_process = 0
-        self.files_processed = 0
+        # all sync work happens in the GUI-independent engine; it reports through msg_queue
+        self.engine = SyncEngine(self.msg_queue)
+        self.dirty_poll_ms = 1000  # how often watchdog changes are checked for an incremental sync
+        self.terminal_max_lines = self.settings.get("terminal_max_lines", 2000)  # lines kept in the terminal widget
+        # "log_file" in astra_settings.json: also spill the full log to a rotating file there
+        self.log_file_path = self.settings.get("log_file")
 
         screen_width = master.winfo_screenwidth()
         screen_height = master.winfo_screenheight()
@@ -132,11 +101,11 @@ class MainFrame(tk.Frame):
         backup_freq_label = tk.Label(backup_freq_frame, text="Backup every", font=("Arial", 14), bg="#1E1E1E")
         backup_freq_label.pack(side="left")
 
-        self.backup_interval_entry = tk.Entry(backup_freq_frame, width=5, font=("Arial", 14))
-        self.backup_interval_entry.insert(0, "60")
+        self.backup_interval_entry = tk.Entry(backup_freq_frame, width=12, font=("Arial", 14))
+        self.backup_interval_entry.insert(0, str(self.backup_interval))
         self.backup_interval_entry.pack(side="left", padx=5)
 
-        minutes_label = tk.Label(backup_freq_frame, text="minutes", font=("Arial", 14), bg="#1E1E1E")
+        minutes_label = tk.Label(backup_freq_frame, text="minutes (or cron)", font=("Arial", 14), bg="#1E1E1E")
         minutes_label.pack(side="left")
 
         button_frame = tk.Frame(self.sidebar, bg="#1E1E1E")
@@ -148,6 +117,9 @@ class MainFrame(tk.Frame):
         self.backup_now_button = ttk.Button(button_frame, text="Backup Now", style="Rounded.TButton", command=self.backup_now)
         self.backup_now_button.pack(side="left", pady=5, padx=5)
 
+        self.verify_button = ttk.Button(button_frame, text="Verify", style="Rounded.TButton", command=self.verify_backup)
+        self.verify_button.pack(side="left", pady=5, padx=5)
+
         self.last_backup_label_title = tk.Label(self.sidebar, text="Last Backup on:", font=("Helvetica", 16),
                                                 bg="#1e1e1e", fg="#d0d0d0", anchor="w", justify="left")
         self.last_backup_label_title.pack(pady=(30, 0), fill="x")
@@ -219,6 +191,19 @@ class MainFrame(tk.Frame):
 
         # scrollbar.config(command=self.terminal_output.yview)
 
+        # Single live status line for progress, instead of a terminal line per update
+        self.status_var = tk.StringVar(value="")
+        tk.Label(self.content_area, textvariable=self.status_var, bg="#1E1E1E", fg="#a0a0a0",
+                 font=("Courier New", 10), anchor="w").pack(side="bottom", fill="x", padx=15, pady=(0, 10),
+                                                             before=terminal_frame)
+
+        # Everything headed for the terminal goes through a bounded buffer flushed once per poll
+        try:
+            self.log_buffer = LogBuffer(max_lines=self.terminal_max_lines, log_file=self.log_file_path)
+        except OSError as e:
+            self.log_buffer = LogBuffer(max_lines=self.terminal_max_lines)
+            self.log_buffer.append(f"Cannot open log file {self.log_file_path}: {e}")
+
         # Redirect stdout and stderr
         sys.stdout = self
         sys.stderr = self
@@ -226,44 +211,81 @@ class MainFrame(tk.Frame):
         # Start periodic queue polling
         self.after(200, self._poll_msg_queue)
 
+        self.restore_session()
+
+    def restore_session(self):
+        """Put back the last used paths and warm up the source scan, so the first backup starts hot."""
+        source = self.settings.get("source")
+        destination = self.settings.get("destination")
+        if source and os.path.isdir(source):
+            self.path_var1.set(source)
+        if destination and os.path.isdir(destination):
+            self.path_var2.set(destination)
+            self.dest_path = destination
+            self.update_disk_health()
+        self.update_last_backup_label()
+        self.engine.prewarm(self.path_var1.get(), self.path_var2.get())
+
+    def save_session(self):
+        self.settings.update(source=self.path_var1.get(), destination=self.path_var2.get(),
+                             interval=self.backup_interval)
+        try:
+            save_settings(self.settings)
+        except OSError as e:
+            print(f"Could not save settings: {e}")
+
     def update_timer(self):
+        text = self.backup_interval_entry.get().strip()
         try:
-            new_interval = int(self.backup_interval_entry.get())
-            if new_interval <= 0:
-                raise ValueError("Time must be positive.")
-            self.backup_interval = new_interval
-            self.remaining_seconds = self.backup_interval * 60
-            self.update_backup_timer_label()
+            parse_schedule(text)
         except ValueError:
-            print("Invalid input. Please enter a valid number of minutes.")
+            print("Invalid input. Enter minutes, or a cron expression like '0 2 * * *'.")
+            return
+        self.backup_interval = int(text) if text.isdigit() else text
+        if self.timer_running:
+            self.scheduler = BackupScheduler(parse_schedule(self.backup_interval))
+        self.update_backup_timer_label()
+        self.save_session()
 
     def backup_now(self):
         if not self.validate_paths():
             return
 
         print("Manual backup triggered.")
-        self.perform_backup()
-        self.remaining_seconds = self.backup_interval * 60
-        self.update_backup_timer_label()
+        # a manual backup recopies everything; the schedule itself is not moved
+        self.start_sync_thread(force=True)
+
+    def verify_backup(self):
+        if not self.validate_paths():
+            return
+        # hashes both sides in the background; mismatches show up as errors in the terminal
+        self.engine.start_verify(self.path_var1.get(), self.path_var2.get())
 
     def countdown(self):
-        if self.timer_running and not self.timer_paused:
-            if self.remaining_seconds > 0:
-                mins, secs = divmod(self.remaining_seconds, 60)
-                hours, mins = divmod(mins, 60)
-                self.backup_timer_label.config(text=f"{hours:02}:{mins:02}:{secs:02}")
-                self.remaining_seconds -= 1
-                self.after(1000, self.countdown)
-            else:
-                self.timer_paused = True
-                self.backup_timer_label.config(text="00:00:00")
-                self.perform_backup()
-                self.remaining_seconds = self.backup_interval * 60
-                self.timer_paused = False
-                self.countdown()
+        """
+        Once a second: show the time left and start the backup when due. The ticks only
+        drive the display; when a backup is due comes from the scheduler's clock. A due
+        slot is only consumed once the engine is idle, so it is retried on the next tick.
+        """
+        self._countdown_id = None
+        if not self.timer_running:
+            return
+        if self.scheduler.due() and not self.engine.is_running():
+            missed = self.scheduler.consume()
+            if missed:
+                print(f"Catching up: {missed} scheduled backup(s) were missed (asleep or closed).")
+            self.perform_backup()
+        self.update_backup_timer_label()
+        self._countdown_id = self.after(1000, self.countdown)
 
     def update_backup_timer_label(self):
-        mins, secs = divmod(self.remaining_seconds, 60)
+        if self.scheduler is not None:
+            seconds = self.scheduler.seconds_left()
+        else:
+            schedule = parse_schedule(self.backup_interval)
+            now = datetime.now()
+            seconds = (schedule.next_after(now) - now).total_seconds()
+        mins, secs = divmod(int(seconds), 60)
         hours, mins = divmod(mins, 60)
         self.backup_timer_label.config(text=f"{hours:02}:{mins:02}:{secs:02}")
 
@@ -272,6 +294,8 @@ class MainFrame(tk.Frame):
         file_path = filedialog.askdirectory()
         if file_path:
             var.set(file_path)
+            self.save_session()
+            self.engine.prewarm(self.path_var1.get(), self.path_var2.get())
             return file_path
         return None
 
@@ -307,16 +331,19 @@ class MainFrame(tk.Frame):
             return
 
         self.timer_running = True
-        self.remaining_seconds = self.backup_interval * 60
+        # a backup missed since the last one (machine off, app closed) runs right away
+        self.scheduler = BackupScheduler(parse_schedule(self.backup_interval), last_run=self.engine.last_backup_time())
         self.update_backup_timer_label()
-        # start countdown normally; when it reaches 0 it will call perform_backup (modified below)
         self.countdown()
         print("Monitoring started.")
         self.start_watchdog()
 
     def stop_monitoring(self):
         self.timer_running = False
-        self.timer_paused = False
+        self.scheduler = None
+        if self._countdown_id is not None:
+            self.after_cancel(self._countdown_id)
+            self._countdown_id = None
         self.backup_timer_label.config(text="00:00:00")
         print("Monitoring stopped.")
         # cancel running sync (if any)
@@ -324,8 +351,8 @@ class MainFrame(tk.Frame):
         self.stop_watchdog()
 
     def perform_backup(self):
-        # start background sync (force=True when manual backup)
-        self.start_sync_thread(force=True)
+        # scheduled run: no forced recopy, and nothing at all if the source did not change
+        self.start_sync_thread(skip_unchanged=True)
 
     def validate_paths(self):
         source_dir = self.path_var1.get()
@@ -339,10 +366,8 @@ class MainFrame(tk.Frame):
         return True
 
     def write(self, message):
-        self.terminal_output.config(state="normal")
-        self.terminal_output.insert(tk.END, message)
-        self.terminal_output.see(tk.END)
-        self.terminal_output.config(state="disabled")
+        # may be called from any thread; the widget is only touched in _poll_msg_queue
+        self.log_buffer.write(message)
 
     def flush(self):
         pass  # Required for file-like behavior with stdout
@@ -351,38 +376,35 @@ class MainFrame(tk.Frame):
         if not self.validate_paths():
             return
 
-        if getattr(self, 'observer', None) and self.observer.is_alive():
+        if self.engine.is_watching():
             print("Watchdog is already running.")
             return
 
         source = self.path_var1.get()
         destination = self.path_var2.get()
 
-        handler = WatchHandler(source, destination, self.print_terminal)
-        self.observer = Observer()
-        self.observer.schedule(handler, path=source, recursive=True)
-        self.observer_thread = threading.Thread(target=self.observer.start, daemon=True)
-        self.observer_thread.start()
+        self.engine.start_watch(source, destination, self.print_terminal)
+        self.after(self.dirty_poll_ms, self._sync_dirty_paths)
 
         print("Watchdog monitoring started.")
 
+    def _sync_dirty_paths(self):
+        """Copy settled watchdog changes right away instead of waiting for the countdown."""
+        if not self.timer_running:
+            return
+        self.engine.sync_dirty_paths(self.path_var1.get(), self.path_var2.get())
+        self.after(self.dirty_poll_ms, self._sync_dirty_paths)
+
     def stop_watchdog(self):
-        if hasattr(self, 'observer') and self.observer.is_alive():
-            self.observer.stop()
-            self.observer.join()
+        if self.engine.stop_watch():
             print("Watchdog monitoring stopped.")
 
     def print_terminal(self, message):
         print(message)
 
-    def save_last_backup_time(self):
-        backup_time = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-        with open("last_backup.txt", "w") as f:
-            f.write(backup_time)
-
     def update_last_backup_label(self):
         try:
-            with open("last_backup.txt", "r") as f:
+            with open(self.engine.last_backup_file, "r") as f:
                 timestamp = f.read().strip()
                 self.last_backup_label.config(text=timestamp)
         except FileNotFoundError:
@@ -412,6 +434,7 @@ class MainFrame(tk.Frame):
 
     def _poll_msg_queue(self):
         """Poll queue and update UI. Run on main thread using after()."""
+        progress = None
         try:
             while True:
                 msg = self.msg_queue.get_nowait()
@@ -419,23 +442,34 @@ class MainFrame(tk.Frame):
                 if isinstance(msg, tuple):
                     mtype, payload = msg
                     if mtype == "log":
-                        self._append_terminal(payload)
+                        self.log_buffer.append(payload)
                     elif mtype == "progress":
                         # payload: (bytes_copied, total_bytes, files_processed, total_files)
-                        b_copied, b_total, f_done, f_total = payload
-                        self._update_progress_bar(b_copied, b_total)
-                        # optionally update a small status in terminal
-                        self._append_terminal(
-                            f"Progress: {f_done}/{f_total} files, {self._human_readable(b_copied)}/{self._human_readable(b_total)}")
+                        # only the latest one matters
+                        progress = payload
                     elif mtype == "done":
-                        self._append_terminal(payload)  # payload string
+                        self.log_buffer.append(payload)  # payload string
+                        self.update_last_backup_label()
                     elif mtype == "error":
-                        self._append_terminal("ERROR: " + payload)
+                        self.log_buffer.append("ERROR: " + payload)
                 else:
                     # raw string
-                    self._append_terminal(str(msg))
+                    self.log_buffer.append(str(msg))
         except queue.Empty:
             pass
+
+        if progress is not None:
+            b_copied, b_total, f_done, f_total = progress
+            self._update_progress_bar(b_copied, b_total)
+            self.status_var.set(
+                f"Progress: {f_done}/{f_total} files, {self._human_readable(b_copied)}/{self._human_readable(b_total)}")
+
+        lines, dropped = self.log_buffer.drain()
+        if dropped:
+            lines.insert(0, f"... {dropped} older line(s) not shown ...")
+        if lines:
+            self._append_terminal("\n".join(lines))
+
         # schedule next poll
         self.after(200, self._poll_msg_queue)
 
@@ -445,6 +479,10 @@ class MainFrame(tk.Frame):
             text = text + "\n"
         self.terminal_output.config(state="normal")
         self.terminal_output.insert(tk.END, text)
+        # keep the widget bounded: drop the oldest lines beyond terminal_max_lines
+        line_count = int(self.terminal_output.index("end-1c").split(".")[0])
+        if line_count > self.terminal_max_lines:
+            self.terminal_output.delete("1.0", f"{line_count - self.terminal_max_lines + 1}.0")
         self.terminal_output.see(tk.END)
         self.terminal_output.config(state="disabled")
 
@@ -457,169 +495,19 @@ class MainFrame(tk.Frame):
         self.disk_health_bar['value'] = percent
 
     def _human_readable(self, bytes_val):
-        # simple function for readable sizes
-        for unit in ['B', 'KB', 'MB', 'GB', 'TB']:
-            if bytes_val < 1024.0:
-                return f"{bytes_val:3.1f} {unit}"
-            bytes_val /= 1024.0
-        return f"{bytes_val:.1f} PB"
-
-    # -------------------------
-    # Thread-safe copy helper
-    # -------------------------
-    def _copy_file_chunked(self, src, dst, chunk_size=1024 * 1024):
-        """Copy a file in chunks and update bytes_copied. Called from worker thread."""
-        try:
-            os.makedirs(os.path.dirname(dst), exist_ok=True)
-            with open(src, "rb") as fsrc, open(dst, "wb") as fdst:
-                while True:
-                    if self.stop_event.is_set():
-                        # cancellation requested
-                        return False
-                    chunk = fsrc.read(chunk_size)
-                    if not chunk:
-                        break
-                    fdst.write(chunk)
-                    self.bytes_copied += len(chunk)
-                    # send progress update occasionally
-                    if self.total_bytes_to_copy:
-                        self.msg_queue.put(("progress", (
-                        self.bytes_copied, self.total_bytes_to_copy, self.files_processed,
-                        self.total_files_to_process)))
-            # preserve metadata
-            shutil.copystat(src, dst)
-            return True
-        except Exception as e:
-            self.msg_queue.put(("error", f"Failed copying {src} -> {dst}: {e}"))
-            return False
+        return human_readable(bytes_val)
 
     # -------------------------
-    # The worker: incremental, single-pass
+    # Public start/stop helpers
     # -------------------------
-    def _sync_worker(self, source, destination, force=False):
+    def start_sync_thread(self, force=False, paths=None, skip_unchanged=False):
         """
-        Worker thread: walks source, copies new/updated files.
-        'force' -> copy even if timestamps equal (used by Backup Now)
+        Start the sync worker in a background thread (non-blocking).
+        'paths' limits the sync to those changed source files.
         """
-        try:
-            # reset counters
-            self.stop_event.clear()
-            self.bytes_copied = 0
-            self.files_processed = 0
-            self.total_bytes_to_copy = 0
-            self.total_files_to_process = 0
-
-            # First pass: compute totals (sizes & file count) **in background**
-            # This is optional but helps show a meaningful progress bar.
-            for root, dirs, files in os.walk(source):
-                if self.stop_event.is_set():
-                    self.msg_queue.put(("log", "Sync cancelled during scan."))
-                    return
-                for f in files:
-                    fp = os.path.join(root, f)
-                    try:
-                        self.total_bytes_to_copy += os.path.getsize(fp)
-                        self.total_files_to_process += 1
-                    except Exception:
-                        pass
-
-            self.msg_queue.put(("log",
-                                f"Scanning done. {self.total_files_to_process} files, {self._human_readable(self.total_bytes_to_copy)} total."))
-
-            # Second pass: actual copy, file-by-file
-            for root, dirs, files in os.walk(source):
-                if self.stop_event.is_set():
-                    self.msg_queue.put(("log", "Sync cancelled."))
-                    return
-                rel = os.path.relpath(root, source)
-                dest_root = os.path.join(destination, rel) if rel != "." else destination
-                if not os.path.exists(dest_root):
-                    try:
-                        os.makedirs(dest_root, exist_ok=True)
-                    except Exception as e:
-                        self.msg_queue.put(("error", f"Failed to create dir {dest_root}: {e}"))
-                        continue
-
-                for fname in files:
-                    if self.stop_event.is_set():
-                        self.msg_queue.put(("log", "Sync cancelled."))
-                        return
-
-                    src_file = os.path.join(root, fname)
-                    dest_file = os.path.join(dest_root, fname)
-
-                    # skip hidden/temp files (start with . or end with ~ or have .sb-)
-                    base = os.path.basename(src_file)
-                    if base.startswith(".") or base.endswith("~") or ".sb-" in base:
-                        continue
-
-                    try:
-                        # Decide whether to copy
-                        if not os.path.exists(dest_file):
-                            action = "Copied new"
-                            ok = self._copy_file_chunked(src_file, dest_file)
-                        else:
-                            src_mtime = os.path.getmtime(src_file)
-                            dest_mtime = os.path.getmtime(dest_file)
-                            src_size = os.path.getsize(src_file)
-                            dest_size = os.path.getsize(dest_file)
-                            if force or (src_mtime > dest_mtime or src_size != dest_size):
-                                action = "Updated"
-                                ok = self._copy_file_chunked(src_file, dest_file)
-                            else:
-                                action = "Skipped"
-                                ok = True
-
-                        self.files_processed += 1
-                        # log actions (avoid logging every skipped file if verbose)
-                        if action != "Skipped":
-                            self.msg_queue.put(("log", f"{action}: {src_file} -> {dest_file}"))
-                        # also push periodic progress update
-                        if self.total_bytes_to_copy:
-                            self.msg_queue.put(("progress", (
-                            self.bytes_copied, self.total_bytes_to_copy, self.files_processed,
-                            self.total_files_to_process)))
-                    except Exception as e:
-                        self.msg_queue.put(("error", f"Error processing {src_file}: {e}"))
-
-            # finished
-            self.msg_queue.put(("done", "Sync finished."))
-            # update last backup time and persist
-            self.save_last_backup_time()
-            self.update_last_backup_label()
-        except Exception as e:
-            self.msg_queue.put(("error", f"Worker crashed: {e}"))
-
-    # -------------------------
-    # Public start/stop helpers
-    # -------------------------
-    def start_sync_thread(self, force=False):
-        """Start the sync worker in a background thread (non-blocking)."""
-        if self.sync_thread and self.sync_thread.is_alive():
-            self.msg_queue.put(("log", "Sync already running."))
-            return
-        source = self.path_var1.get()
-        destination = self.path_var2.get()
-        if not os.path.isdir(source) or not os.path.isdir(destination):
-            self.msg_queue.put(("log", "Invalid source or destination."))
-            return
-
-        self.stop_event.clear()
-        self.bytes_copied = 0
-        self.files_processed = 0
-        self.sync_thread = threading.Thread(target=self._sync_worker, args=(source, destination, force), daemon=True)
-        self.sync_thread.start()
-        self.msg_queue.put(("log", "Background sync started."))
+        self.engine.start(self.path_var1.get(), self.path_var2.get(), force=force, paths=paths,
+                          skip_unchanged=skip_unchanged)
 
     def cancel_sync(self):
         """Request cancellation. Worker will exit soon after next chunk/check."""
-        if self.sync_thread and self.sync_thread.is_alive():
-            self.stop_event.set()
-            self.msg_queue.put(("log", "Cancellation requested."))
-
-
-
-
-
-
-
+        self.engine.cancel()
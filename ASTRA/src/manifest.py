@@ -0,0 +1,148 @@
+# manifest.py
+import os
+import sqlite3
+import threading
+import time
+
+
+class SyncManifest:
+    """
+    Persistent record of what was last synced, stored as SQLite in the destination.
+
+    One row per source file (path relative to the source root) with the size,
+    mtime and inode the file had when it was last copied. If a source file still
+    matches its row, the destination does not need to be stat'ed at all.
+    Safe to use from several copy workers at once.
+    """
+
+    FILENAME = ".astra_manifest.db"
+    COMMIT_EVERY = 500  # batch writes, a commit per file is far too slow
+
+    def __init__(self, destination):
+        self.path = os.path.join(destination, self.FILENAME)
+        self._lock = threading.Lock()
+        self._pending = 0
+        self._conn = sqlite3.connect(self.path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS files ("
+            " path TEXT PRIMARY KEY,"
+            " size INTEGER NOT NULL,"
+            " mtime_ns INTEGER NOT NULL,"
+            " inode INTEGER NOT NULL,"
+            " state TEXT NOT NULL,"
+            " synced_at REAL NOT NULL)"
+        )
+        # mirror mode finds renamed files by their inode
+        self._conn.execute("CREATE INDEX IF NOT EXISTS files_inode ON files (inode)")
+        # block signatures of large destination files, for delta updates
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS signatures ("
+            " path TEXT PRIMARY KEY,"
+            " block_size INTEGER NOT NULL,"
+            " dest_size INTEGER NOT NULL,"
+            " dest_mtime_ns INTEGER NOT NULL,"
+            " data BLOB NOT NULL)"
+        )
+        self._conn.commit()
+
+    def lookup(self, rel_path):
+        """Return (size, mtime_ns, inode, state, synced_at) or None."""
+        with self._lock:
+            return self._conn.execute(
+                "SELECT size, mtime_ns, inode, state, synced_at FROM files WHERE path = ?",
+                (rel_path,)).fetchone()
+
+    def is_unchanged(self, rel_path, st):
+        """True if 'st' (os.stat of the source file) matches the last synced state."""
+        row = self.lookup(rel_path)
+        if row is None:
+            return False
+        size, mtime_ns, inode, state, _ = row
+        return state == "synced" and size == st.st_size and mtime_ns == st.st_mtime_ns and inode == st.st_ino
+
+    def record(self, rel_path, st, state="synced"):
+        """Remember that 'rel_path' was synced while its source looked like 'st'."""
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO files (path, size, mtime_ns, inode, state, synced_at) VALUES (?, ?, ?, ?, ?, ?)",
+                (rel_path, st.st_size, st.st_mtime_ns, st.st_ino, state, time.time()))
+            self._pending += 1
+            if self._pending >= self.COMMIT_EVERY:
+                self._conn.commit()
+                self._pending = 0
+
+    def mark_patching(self, rel_path, st):
+        """
+        Record that the destination copy of 'rel_path' is about to be patched in
+        place, committed at once: if the process dies mid-patch, the row says so.
+        """
+        self.record(rel_path, st, state="patching")
+        with self._lock:
+            self._conn.commit()
+            self._pending = 0
+
+    def find_moved(self, st):
+        """Paths of synced rows with the same inode, size and mtime as 'st' (rename candidates)."""
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT path FROM files WHERE inode = ? AND size = ? AND mtime_ns = ? AND state = 'synced'",
+                (st.st_ino, st.st_size, st.st_mtime_ns)).fetchall()
+        return [r[0] for r in rows]
+
+    def rename(self, old_path, new_path):
+        """Move the rows of 'old_path' to 'new_path' after the destination file was renamed."""
+        with self._lock:
+            for table in ("files", "signatures"):
+                self._conn.execute(f"DELETE FROM {table} WHERE path = ?", (new_path,))
+                self._conn.execute(f"UPDATE {table} SET path = ? WHERE path = ?", (new_path, old_path))
+            self._pending += 1
+
+    def forget(self, rel_path):
+        """Drop everything known about 'rel_path' (deleted from the destination)."""
+        with self._lock:
+            self._conn.execute("DELETE FROM files WHERE path = ?", (rel_path,))
+            self._conn.execute("DELETE FROM signatures WHERE path = ?", (rel_path,))
+            self._pending += 1
+
+    def count(self):
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM files").fetchone()[0]
+
+    def paths(self, prefix=None):
+        """All recorded paths, or those equal to / inside the directory 'prefix'."""
+        with self._lock:
+            if prefix is None:
+                rows = self._conn.execute("SELECT path FROM files").fetchall()
+            else:
+                # a range scan on the primary key instead of LIKE (no escaping, uses the index)
+                low = prefix + os.sep
+                high = prefix + chr(ord(os.sep) + 1)
+                rows = self._conn.execute("SELECT path FROM files WHERE path = ? OR (path >= ? AND path < ?)",
+                                          (prefix, low, high)).fetchall()
+        return [r[0] for r in rows]
+
+    def get_signatures(self, rel_path, block_size, dest_st):
+        """Packed block signatures for the destination copy, or None if missing or stale."""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT block_size, dest_size, dest_mtime_ns, data FROM signatures WHERE path = ?",
+                (rel_path,)).fetchone()
+        if row is None:
+            return None
+        if (row[0], row[1], row[2]) != (block_size, dest_st.st_size, dest_st.st_mtime_ns):
+            return None
+        return row[3]
+
+    def put_signatures(self, rel_path, block_size, dest_st, data):
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO signatures (path, block_size, dest_size, dest_mtime_ns, data) VALUES (?, ?, ?, ?, ?)",
+                (rel_path, block_size, dest_st.st_size, dest_st.st_mtime_ns, data))
+            self._pending += 1
+
+    def close(self):
+        with self._lock:
+            self._conn.commit()
+            self._conn.close()
@@ -0,0 +1,235 @@
+# metrics.py
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager
+from datetime import datetime, timezone
+
+# upper bounds (seconds) of the per-file copy latency histogram
+LATENCY_BUCKETS = (0.001, 0.005, 0.01, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 300)
+# timeline keys the sampler fills in itself; everything else in a point is a gauge
+_RATE_KEYS = ("t", "files", "bytes", "files_per_s", "mb_per_s")
+
+
+class SyncMetrics:
+    """
+    Timing and throughput of one sync.
+
+    Phases ("scan", "scan_blocked", "stat", "manifest", "dest_check", "dest_list",
+    "link", "copy_wait", "copy", "copystat", "throttle") add up the seconds spent in them by
+    any thread, so with several copy workers "copy" can exceed the wall-clock time;
+    "dest_list" (destination directory listings) is part of "dest_check". Every copied
+    file also lands in a latency histogram, and a sampler thread records files/s,
+    MB/s and gauges (queue depths, bytes in flight) over time. report() gives it all as a dict,
+    prometheus_text() as a textfile for the node exporter.
+    """
+
+    def __init__(self, source=None, destination=None, mode="full", labels=None, max_samples=3600):
+        self.source = source
+        self.destination = destination
+        self.mode = mode
+        self.labels = dict(labels or {})
+        self.max_samples = max_samples
+        self.started = time.time()
+        self.status = None  # "finished" | "cancelled" | "failed"
+        self.seconds = None  # wall-clock, once finished
+        self.totals = {}
+        self.timeline = []
+        self._t0 = time.perf_counter()
+        self._lock = threading.Lock()
+        self._phases = {}  # name -> [seconds, calls]
+        self._latency = [0] * (len(LATENCY_BUCKETS) + 1)
+        self._latency_sum = 0.0
+        self._latency_max = 0.0
+        self._sampler = None
+        self._sampler_stop = threading.Event()
+
+    # -------------------------
+    # Recording
+    # -------------------------
+    def add(self, phase, seconds, calls=1):
+        with self._lock:
+            entry = self._phases.get(phase)
+            if entry is None:
+                self._phases[phase] = [seconds, calls]
+            else:
+                entry[0] += seconds
+                entry[1] += calls
+
+    @contextmanager
+    def phase(self, name):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.add(name, time.perf_counter() - start)
+
+    def observe_copy(self, seconds):
+        """One file copied (or failed) after 'seconds'."""
+        index = len(LATENCY_BUCKETS)
+        for i, bound in enumerate(LATENCY_BUCKETS):
+            if seconds <= bound:
+                index = i
+                break
+        with self._lock:
+            self._latency[index] += 1
+            self._latency_sum += seconds
+            self._latency_max = max(self._latency_max, seconds)
+
+    # -------------------------
+    # Sampling over time
+    # -------------------------
+    def start_sampler(self, sample, interval=1.0):
+        """
+        Call 'sample()' every 'interval' seconds on a daemon thread. It returns
+        (files_done, bytes_copied, gauges_dict); rates are derived here.
+        Past 'max_samples' the series is thinned to every other sample and the
+        interval doubled, so a long sync keeps a bounded timeline.
+        """
+        def run():
+            wait = interval
+            last = (time.perf_counter(), 0, 0)
+            while not self._sampler_stop.wait(wait):
+                files, nbytes, gauges = sample()
+                now = time.perf_counter()
+                dt = now - last[0]
+                point = {
+                    "t": round(now - self._t0, 3),
+                    "files": files,
+                    "bytes": nbytes,
+                    "files_per_s": round((files - last[1]) / dt, 1) if dt else 0.0,
+                    "mb_per_s": round((nbytes - last[2]) / dt / (1024 * 1024), 2) if dt else 0.0,
+                }
+                point.update(gauges)
+                last = (now, files, nbytes)
+                with self._lock:
+                    self.timeline.append(point)
+                    if len(self.timeline) > self.max_samples:
+                        self.timeline = self.timeline[::2]
+                        wait *= 2
+
+        self._sampler = threading.Thread(target=run, daemon=True, name="astra-metrics")
+        self._sampler.start()
+
+    def finish(self, status, **totals):
+        """Stop sampling and freeze the result. 'totals' are the engine's end-of-run counters."""
+        self._sampler_stop.set()
+        if self._sampler:
+            self._sampler.join()
+        self.seconds = time.perf_counter() - self._t0
+        self.status = status
+        self.totals = totals
+
+    # -------------------------
+    # Export
+    # -------------------------
+    def report(self):
+        seconds = self.seconds if self.seconds is not None else time.perf_counter() - self._t0
+        files = self.totals.get("files_processed", 0)
+        nbytes = self.totals.get("bytes_copied", 0)
+        with self._lock:
+            phases = {name: {"seconds": round(s, 4), "calls": n} for name, (s, n) in sorted(self._phases.items())}
+            buckets = {str(bound): count for bound, count in zip(LATENCY_BUCKETS, self._latency)}
+            buckets["+Inf"] = self._latency[-1]
+            latency = {"count": sum(self._latency), "sum": round(self._latency_sum, 4),
+                       "max": round(self._latency_max, 4), "buckets": buckets}
+            timeline = list(self.timeline)
+        gauges = {}
+        for point in timeline:
+            for key, value in point.items():
+                if key not in _RATE_KEYS:
+                    gauges[key] = max(gauges.get(key, 0), value)
+        return {
+            "started": datetime.fromtimestamp(self.started, timezone.utc).isoformat(timespec="seconds"),
+            "status": self.status,
+            "mode": self.mode,
+            "source": self.source,
+            "destination": self.destination,
+            "labels": self.labels,
+            "seconds": round(seconds, 3),
+            "totals": self.totals,
+            "files_per_s": round(files / seconds, 1) if seconds else None,
+            "mb_per_s": round(nbytes / (1024 * 1024) / seconds, 2) if seconds else None,
+            "phases": phases,
+            "copy_latency": latency,
+            "max_gauges": gauges,
+            "timeline": timeline,
+        }
+
+    def prometheus_text(self):
+        """The report in the Prometheus text exposition format (no timeline)."""
+        report = self.report()
+        base = self._label_str(self.labels)
+        lines = []
+
+        def metric(name, help_text, kind, samples):
+            lines.append(f"# HELP {name} {help_text}")
+            lines.append(f"# TYPE {name} {kind}")
+            for labels, value in samples:
+                lines.append(f"{name}{self._label_str({**self.labels, **labels}) if labels else base} {value}")
+
+        metric("astra_sync_last_run_timestamp_seconds", "Start time of the last sync.", "gauge",
+               [({}, round(self.started, 3))])
+        metric("astra_sync_success", "1 if the last sync finished, 0 if it was cancelled or failed.", "gauge",
+               [({}, 1 if report["status"] == "finished" else 0)])
+        metric("astra_sync_duration_seconds", "Wall-clock duration of the last sync.", "gauge",
+               [({}, report["seconds"])])
+        metric("astra_sync_files", "Files processed by the last sync.", "gauge",
+               [({}, self.totals.get("files_processed", 0))])
+        metric("astra_sync_bytes_copied", "Bytes copied by the last sync.", "gauge",
+               [({}, self.totals.get("bytes_copied", 0))])
+        metric("astra_sync_files_per_second", "Average files/s of the last sync.", "gauge",
+               [({}, report["files_per_s"] or 0)])
+        metric("astra_sync_bytes_per_second", "Average copy rate of the last sync.", "gauge",
+               [({}, round(self.totals.get("bytes_copied", 0) / report["seconds"], 1) if report["seconds"] else 0)])
+        metric("astra_sync_phase_seconds", "Seconds spent per phase, summed over threads.", "gauge",
+               [({"phase": name}, p["seconds"]) for name, p in report["phases"].items()])
+        metric("astra_sync_phase_calls", "Times each phase ran.", "gauge",
+               [({"phase": name}, p["calls"]) for name, p in report["phases"].items()])
+        gauges = report["max_gauges"]
+        metric("astra_sync_max_queue_depth", "Deepest a queue got during the last sync.", "gauge",
+               [({"queue": name[:-len("_queue")]}, value) for name, value in gauges.items() if name.endswith("_queue")])
+        for name, value in gauges.items():
+            if not name.endswith("_queue"):
+                metric(f"astra_sync_max_{name}", f"Highest sampled {name} during the last sync.", "gauge",
+                       [({}, value)])
+
+        latency = report["copy_latency"]
+        lines.append("# HELP astra_sync_copy_latency_seconds Per-file copy time in the last sync.")
+        lines.append("# TYPE astra_sync_copy_latency_seconds histogram")
+        cumulative = 0
+        for bound, count in latency["buckets"].items():
+            cumulative += count
+            lines.append(f"astra_sync_copy_latency_seconds_bucket{self._label_str({**self.labels, 'le': bound})} {cumulative}")
+        lines.append(f"astra_sync_copy_latency_seconds_sum{base} {latency['sum']}")
+        lines.append(f"astra_sync_copy_latency_seconds_count{base} {latency['count']}")
+        return "\n".join(lines) + "\n"
+
+    @staticmethod
+    def _label_str(labels):
+        if not labels:
+            return ""
+        return "{" + ",".join(f'{k}="{_escape(v)}"' for k, v in labels.items()) + "}"
+
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def write_atomic(path, text):
+    """Write via a temp file + rename, so a scraper never reads half a file."""
+    folder = os.path.dirname(os.path.abspath(path))
+    os.makedirs(folder, exist_ok=True)
+    tmp = os.path.join(folder, f".{os.path.basename(path)}.tmp")
+    with open(tmp, "w") as f:
+        f.write(text)
+    os.replace(tmp, path)
+
+
+def write_json(metrics, path):
+    write_atomic(path, json.dumps(metrics.report(), indent=2) + "\n")
+
+
+def write_prometheus(metrics, path):
+    write_atomic(path, metrics.prometheus_text())
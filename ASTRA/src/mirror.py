@@ -0,0 +1,80 @@
+# mirror.py
+import os
+import shutil
+import time
+from datetime import datetime, timedelta
+
+from compress import SUFFIXES
+
+
+def dest_variants(dest_file):
+    """The destination copy of a file as it exists on disk: raw and/or compressed (see compress.SUFFIXES)."""
+    candidates = [dest_file] + [dest_file + suffix for suffix in SUFFIXES.values()]
+    return [p for p in candidates if os.path.lexists(p)]
+
+
+def move_dest(old_dest, new_dest):
+    """Rename every stored form of 'old_dest' to 'new_dest'. Returns False if there was nothing to move."""
+    variants = dest_variants(old_dest)
+    for path in variants:
+        target = new_dest + path[len(old_dest):]
+        os.makedirs(os.path.dirname(target), exist_ok=True)
+        os.replace(path, target)
+    return bool(variants)
+
+
+def prune_empty_dirs(path, stop_at, keep=None):
+    """
+    Remove 'path' and its parents while they are empty, up to (not including)
+    'stop_at'. 'keep(dir)' can veto a removal, e.g. for directories that still
+    exist in the source.
+    """
+    stop_at = os.path.abspath(stop_at)
+    path = os.path.abspath(path)
+    while path != stop_at and path.startswith(stop_at + os.sep):
+        if keep and keep(path):
+            return
+        try:
+            os.rmdir(path)
+        except OSError:
+            return  # not empty (or gone)
+        path = os.path.dirname(path)
+
+
+class Trash:
+    """
+    Holding area for files mirror mode deletes from the destination.
+
+    Each sync moves its deletions into '<destination>/.astra_trash/<timestamp>/'
+    with their relative paths kept, so a mistaken delete in the source can be
+    recovered. purge() removes batches older than 'retention_days'.
+    """
+
+    DIRNAME = ".astra_trash"
+    STAMP = "%Y%m%d-%H%M%S"
+
+    def __init__(self, destination, retention_days=30):
+        self.root = os.path.join(destination, self.DIRNAME)
+        self.retention_days = retention_days
+        self.batch = os.path.join(self.root, time.strftime(self.STAMP))
+
+    def move(self, path, rel):
+        target = os.path.join(self.batch, rel)
+        os.makedirs(os.path.dirname(target), exist_ok=True)
+        os.replace(path, target)
+
+    def purge(self):
+        """Delete expired batches. Returns how many were removed."""
+        if not os.path.isdir(self.root):
+            return 0
+        cutoff = datetime.now() - timedelta(days=self.retention_days)
+        removed = 0
+        for name in os.listdir(self.root):
+            try:
+                if datetime.strptime(name, self.STAMP) >= cutoff:
+                    continue
+            except ValueError:
+                continue  # not ours
+            shutil.rmtree(os.path.join(self.root, name), ignore_errors=True)
+            removed += 1
+        return removed
@@ -0,0 +1,143 @@
+# object_store.py
+import errno
+import hashlib
+import os
+import shutil
+import tempfile
+import threading
+
+
+class ObjectStore:
+    """
+    Content-addressable store of file contents under the destination.
+
+    Each distinct content is kept once as '<destination>/.astra_objects/ab/cdef...'
+    (blake2b of the data) and the visible backup tree is made of hardlinks to
+    those objects. Files whose hash is already present never need copying.
+    If the destination filesystem cannot hardlink (FAT/exFAT drives) the object
+    is copied into place instead, which still saves the source->destination copy
+    but not the disk space.
+    """
+
+    DIRNAME = ".astra_objects"
+
+    def __init__(self, destination):
+        self.root = os.path.join(destination, self.DIRNAME)
+        self.tmp_dir = os.path.join(self.root, "tmp")
+        os.makedirs(self.tmp_dir, exist_ok=True)
+        self.hardlinks = self._probe_hardlinks()
+        # striped by digest, so two workers never store the same content twice
+        self._locks = [threading.Lock() for _ in range(64)]
+
+    def _probe_hardlinks(self):
+        probe = self.temp_path()
+        try:
+            os.link(probe, probe + ".link")
+            os.remove(probe + ".link")
+            return True
+        except OSError:
+            return False
+        finally:
+            os.remove(probe)
+
+    @staticmethod
+    def hash_file(path, stop_event=None, chunk_size=1024 * 1024):
+        """Hex blake2b digest of a file, or None if cancelled part way."""
+        h = hashlib.blake2b(digest_size=32)
+        with open(path, "rb") as f:
+            while True:
+                if stop_event is not None and stop_event.is_set():
+                    return None
+                chunk = f.read(chunk_size)
+                if not chunk:
+                    return h.hexdigest()
+                h.update(chunk)
+
+    def lock(self, digest):
+        """Lock to hold while checking for and storing 'digest'."""
+        return self._locks[int(digest[:8], 16) % len(self._locks)]
+
+    def object_path(self, digest):
+        return os.path.join(self.root, digest[:2], digest[2:])
+
+    def has(self, digest):
+        return os.path.exists(self.object_path(digest))
+
+    def temp_path(self):
+        """A fresh path inside the store to copy new content to before commit()."""
+        fd, path = tempfile.mkstemp(dir=self.tmp_dir)
+        os.close(fd)
+        return path
+
+    def copy_in(self, src, stop_event=None, on_progress=None, chunk_size=1024 * 1024):
+        """
+        Copy 'src' to a temp path in the store, hashing exactly the bytes written.
+        Returns (tmp_path, digest) to commit(), or None if cancelled part way.
+        """
+        tmp = self.temp_path()
+        h = hashlib.blake2b(digest_size=32)
+        try:
+            with open(src, "rb") as fsrc, open(tmp, "wb") as fdst:
+                while True:
+                    if stop_event is not None and stop_event.is_set():
+                        os.remove(tmp)
+                        return None
+                    chunk = fsrc.read(chunk_size)
+                    if not chunk:
+                        break
+                    h.update(chunk)
+                    fdst.write(chunk)
+                    if on_progress:
+                        on_progress(len(chunk))
+            shutil.copystat(src, tmp)
+        except BaseException:
+            os.remove(tmp)
+            raise
+        return tmp, h.hexdigest()
+
+    def commit(self, tmp_path, digest):
+        """Move a fully written temp file into place as the object for 'digest'."""
+        obj = self.object_path(digest)
+        os.makedirs(os.path.dirname(obj), exist_ok=True)
+        os.replace(tmp_path, obj)
+
+    def link(self, digest, dst):
+        """Make 'dst' show the object's content, replacing whatever was there."""
+        obj = self.object_path(digest)
+        os.makedirs(os.path.dirname(dst), exist_ok=True)
+        tmp = dst + ".astra-link"
+        if os.path.lexists(tmp):
+            os.remove(tmp)  # left over from an interrupted run
+        linked = False
+        if self.hardlinks:
+            try:
+                os.link(obj, tmp)
+                linked = True
+            except OSError as e:
+                # the object hit the filesystem's link limit; give this path its own copy
+                if e.errno != errno.EMLINK:
+                    raise
+        if not linked:
+            shutil.copy2(obj, tmp)
+        os.replace(tmp, dst)
+
+    def prune_unreferenced(self):
+        """
+        Remove objects no backup file links to any more, and leftover temp files.
+        Only call while no copy is in progress. Returns bytes freed.
+        """
+        if not self.hardlinks:
+            # without hardlinks every object has a link count of 1; nothing can be told apart
+            return 0
+        freed = 0
+        for root, dirs, files in os.walk(self.root):
+            for name in files:
+                path = os.path.join(root, name)
+                try:
+                    st = os.stat(path)
+                    if root == self.tmp_dir or st.st_nlink == 1:
+                        os.remove(path)
+                        freed += st.st_size
+                except OSError:
+                    pass
+        return freed
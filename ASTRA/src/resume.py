@@ -0,0 +1,74 @@
+# resume.py
+import json
+import os
+
+VERIFY_BYTES = 1024 * 1024  # tail of the copied data re-checked before resuming
+
+
+def part_paths(dst):
+    """Temp file a copy is written to, and its resume record, next to 'dst' (hidden)."""
+    folder, name = os.path.split(dst)
+    part = os.path.join(folder, f".{name}.astra-part")
+    return part, part + ".json"
+
+
+class PartialCopy:
+    """
+    Temp file + persisted progress for one destination file.
+
+    Data is written to a hidden '.name.astra-part' file that only replaces the
+    destination once complete, so an interrupted copy never looks like a valid
+    backup. For big files checkpoint() fsyncs the part file and records how far
+    it got together with the source's size/mtime/inode; a later copy of the same,
+    unchanged source re-checks the last MiB and carries on from there.
+    """
+
+    def __init__(self, dst, src_st):
+        self.dst = dst
+        self.part, self.record = part_paths(dst)
+        self.identity = [src_st.st_size, src_st.st_mtime_ns, src_st.st_ino]
+
+    def resume_offset(self, fsrc):
+        """Offset to continue from, or 0 if there is nothing usable to resume."""
+        try:
+            with open(self.record) as f:
+                rec = json.load(f)
+            offset = int(rec["offset"])
+            if rec["source"] != self.identity or os.path.getsize(self.part) < offset:
+                return 0
+            # the recorded offset was fsync'd, but make sure the tail really matches the source
+            start = max(0, offset - VERIFY_BYTES)
+            fsrc.seek(start)
+            expected = fsrc.read(offset - start)
+            with open(self.part, "rb") as fpart:
+                fpart.seek(start)
+                if fpart.read(offset - start) != expected:
+                    return 0
+            return offset
+        except (OSError, ValueError, KeyError, TypeError):
+            return 0
+
+    def checkpoint(self, fdst, offset):
+        """Persist that everything before 'offset' is safely in the part file."""
+        fdst.flush()
+        os.fsync(fdst.fileno())
+        tmp = self.record + ".tmp"
+        with open(tmp, "w") as f:
+            json.dump({"source": self.identity, "offset": offset}, f)
+        os.replace(tmp, self.record)
+
+    def commit(self):
+        """Move the finished part file over the destination."""
+        os.replace(self.part, self.dst)
+        self._remove(self.record)
+
+    def discard(self):
+        self._remove(self.part)
+        self._remove(self.record)
+
+    @staticmethod
+    def _remove(path):
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            pass
@@ -0,0 +1,114 @@
+# scanner.py
+import os
+import queue
+import threading
+import time
+
+
+def scan_tree(root, stop_event=None, on_error=None, path_filter=None):
+    """
+    Walk 'root' with os.scandir and yield ("dir", path, rel, None) / ("file", path, rel, stat).
+
+    'rel' is relative to 'root' ("." for the root itself). The stat result comes
+    from DirEntry.stat(), which is cached on the entry (free on Windows, one call on
+    POSIX) so callers never need to stat the file again. Symlinked directories are
+    not followed, same as os.walk(). Entries excluded by 'path_filter' (a
+    filters.PathFilter) are skipped, directories without being listed at all.
+    """
+    stack = [(root, ".")]
+    while stack:
+        if stop_event is not None and stop_event.is_set():
+            return
+        dir_path, dir_rel = stack.pop()
+        yield "dir", dir_path, dir_rel, None
+        try:
+            it = os.scandir(dir_path)
+        except OSError as e:
+            if on_error:
+                on_error(dir_path, e)
+            continue
+
+        subdirs = []
+        with it:
+            for entry in it:
+                rel = entry.name if dir_rel == "." else os.path.join(dir_rel, entry.name)
+                try:
+                    if entry.is_dir(follow_symlinks=False):
+                        if path_filter is None or not path_filter.excluded(rel, True):
+                            subdirs.append((entry.path, rel))
+                    elif entry.is_file():
+                        if path_filter is None or not path_filter.excluded(rel):
+                            yield "file", entry.path, rel, entry.stat()
+                except OSError as e:
+                    if on_error:
+                        on_error(entry.path, e)
+        # reversed so directories come out in listing order
+        stack.extend(reversed(subdirs))
+
+
+class TreeScanner(threading.Thread):
+    """
+    Background producer that runs scan_tree() into a bounded queue.
+
+    Iterate over the scanner to consume items; iteration ends when the scan is
+    finished or 'stop_event' is set. 'on_file(stat)' is called for every file as
+    it is found so progress totals can grow while copying is already under way.
+    """
+
+    _DONE = object()
+
+    def __init__(self, root, stop_event, on_file=None, on_error=None, maxsize=1000, path_filter=None):
+        super().__init__(daemon=True, name="astra-scan")
+        self.root = root
+        self.stop_event = stop_event
+        self.on_file = on_file
+        self.on_error = on_error
+        self.path_filter = path_filter
+        self.items = queue.Queue(maxsize=maxsize)
+        self.finished = False  # True once the whole tree has been listed
+        self.elapsed = 0.0  # seconds from start to the end of the listing
+        self.blocked = 0.0  # of those, seconds spent waiting for the consumer to make room
+
+    def run(self):
+        started = time.perf_counter()
+        try:
+            for item in scan_tree(self.root, self.stop_event, self.on_error, self.path_filter):
+                if item[0] == "file" and self.on_file:
+                    self.on_file(item[3])
+                if not self._put(item):
+                    return
+            self.finished = not self.stop_event.is_set()
+        finally:
+            self.elapsed = time.perf_counter() - started
+            self._put(self._DONE)
+
+    def _put(self, item):
+        try:
+            self.items.put_nowait(item)
+            return True
+        except queue.Full:
+            pass
+        # block while the consumer is behind, but never past a cancellation
+        started = time.perf_counter()
+        try:
+            while True:
+                try:
+                    self.items.put(item, timeout=0.2)
+                    return True
+                except queue.Full:
+                    if self.stop_event.is_set():
+                        return False
+        finally:
+            self.blocked += time.perf_counter() - started
+
+    def __iter__(self):
+        while True:
+            try:
+                item = self.items.get(timeout=0.2)
+            except queue.Empty:
+                if self.stop_event.is_set():
+                    return
+                continue
+            if item is self._DONE:
+                return
+            yield item
@@ -0,0 +1,181 @@
+# schedule.py
+import time
+from datetime import datetime, timedelta
+
+_MONTHS = ["jan", "feb", "mar", "apr", "may", "jun", "jul", "aug", "sep", "oct", "nov", "dec"]
+_DAYS = ["sun", "mon", "tue", "wed", "thu", "fri", "sat"]
+ALIASES = {"@hourly": "0 * * * *", "@daily": "0 0 * * *", "@midnight": "0 0 * * *",
+           "@weekly": "0 0 * * 0", "@monthly": "0 0 1 * *"}
+
+
+def _parse_field(text, low, high, names=None):
+    """One cron field ("*", "5", "1-5", "*/15", "mon-fri", "1,15") -> set of values."""
+    values = set()
+    for part in text.lower().split(","):
+        step = 1
+        if "/" in part:
+            part, step_text = part.split("/", 1)
+            step = int(step_text)
+            if step < 1:
+                raise ValueError(f"Bad step in cron field: {text}")
+        if part == "*":
+            start, end = low, high
+        else:
+            bounds = part.split("-", 1)
+            nums = [names.index(b) + (1 if names is _MONTHS else 0) if names and b in names else int(b)
+                    for b in bounds]
+            start, end = nums[0], nums[-1] if len(nums) > 1 else (high if step > 1 else nums[0])
+        if start < low or end > high or start > end:
+            raise ValueError(f"Cron field out of range: {text}")
+        values.update(range(start, end + 1, step))
+    return values
+
+
+class CronExpression:
+    """
+    Standard 5-field cron ("minute hour day-of-month month day-of-week") or an
+    alias like "@daily". As in cron, a restricted day-of-month and day-of-week
+    match if either does; Sunday is 0 or 7.
+    """
+
+    def __init__(self, text):
+        self.text = text.strip()
+        fields = ALIASES.get(self.text.lower(), self.text).split()
+        if len(fields) != 5:
+            raise ValueError(f"Expected 5 cron fields: {text!r}")
+        self.minutes = _parse_field(fields[0], 0, 59)
+        self.hours = _parse_field(fields[1], 0, 23)
+        self.days = _parse_field(fields[2], 1, 31)
+        self.months = _parse_field(fields[3], 1, 12, _MONTHS)
+        dow = _parse_field(fields[4], 0, 7, _DAYS)
+        self.weekdays = {d % 7 for d in dow}
+        self._any_day = fields[2] == "*"
+        self._any_weekday = fields[4] == "*"
+
+    def _day_matches(self, dt):
+        dom = dt.day in self.days
+        dow = (dt.weekday() + 1) % 7 in self.weekdays
+        if self._any_day or self._any_weekday:
+            return dom and dow
+        return dom or dow
+
+    def next_after(self, dt):
+        """First matching minute strictly after 'dt' (a naive local datetime)."""
+        t = dt.replace(second=0, microsecond=0) + timedelta(minutes=1)
+        limit = t + timedelta(days=5 * 366)
+        while t < limit:
+            if t.month not in self.months:
+                t = (t.replace(day=1, hour=0, minute=0) + timedelta(days=32)).replace(day=1)
+            elif not self._day_matches(t):
+                t = t.replace(hour=0, minute=0) + timedelta(days=1)
+            elif t.hour not in self.hours:
+                t = t.replace(minute=0) + timedelta(hours=1)
+            elif t.minute not in self.minutes:
+                t += timedelta(minutes=1)
+            else:
+                return t
+        raise ValueError(f"Cron expression never matches: {self.text!r}")
+
+    def __str__(self):
+        return self.text
+
+
+class Interval:
+    """Every 'minutes' minutes, counted from when the schedule started."""
+
+    def __init__(self, minutes):
+        if minutes <= 0:
+            raise ValueError("Interval must be positive.")
+        self.minutes = minutes
+
+    def next_after(self, dt):
+        return dt + timedelta(minutes=self.minutes)
+
+    def __str__(self):
+        return f"every {self.minutes:g} min"
+
+
+def parse_schedule(text):
+    """'60' -> Interval(60) (minutes), anything else -> CronExpression."""
+    text = str(text).strip()
+    try:
+        return Interval(float(text))
+    except ValueError:
+        return CronExpression(text)
+
+
+class BackupScheduler:
+    """
+    Decides when the next scheduled backup is due.
+
+    Deadlines come from the schedule (next = previous deadline + interval, or the
+    next cron match), never from "now + interval", so UI load and long runs do not
+    make the schedule drift. Waiting is measured on the monotonic clock, which is
+    immune to clock changes; when a tick finds the wall clock moved much further
+    than the monotonic one, the machine was asleep and that time is counted too.
+    A run missed while asleep (or while the app was closed, see 'last_run') is
+    caught up once, not once per missed slot. Call due() as often as you like and
+    consume() when you start the run.
+    """
+
+    SLEEP_THRESHOLD = 5.0  # seconds of wall/monotonic disagreement taken as a suspend
+
+    def __init__(self, schedule, last_run=None):
+        self.schedule = schedule
+        self._catch_up = 0
+        self._mark_clocks()
+        now = datetime.now()
+        self._slot = schedule.next_after(now)  # wall-clock time of the next scheduled slot
+        if last_run is not None and schedule.next_after(last_run) <= now:
+            # a run came due while ASTRA was not running: catch up right away
+            self._catch_up = 1
+            self._deadline = time.monotonic()
+        else:
+            self._deadline = time.monotonic() + (self._slot - now).total_seconds()
+
+    def _mark_clocks(self):
+        self._last_mono = time.monotonic()
+        self._last_wall = time.time()
+
+    def _account_sleep(self):
+        mono, wall = time.monotonic(), time.time()
+        slept = (wall - self._last_wall) - (mono - self._last_mono)
+        if slept > self.SLEEP_THRESHOLD:
+            # the monotonic clock stood still while suspended: count that time as waited
+            self._deadline -= slept
+        self._last_mono, self._last_wall = mono, wall
+
+    def seconds_left(self):
+        self._account_sleep()
+        return max(0.0, self._deadline - time.monotonic())
+
+    def next_run(self):
+        """Wall-clock time of the next run, for display."""
+        return datetime.now() + timedelta(seconds=self.seconds_left())
+
+    def due(self):
+        return self.seconds_left() <= 0
+
+    def consume(self):
+        """
+        Start the due run: move the deadline to the next slot in the future.
+        Returns how many scheduled runs were missed and folded into this one.
+        """
+        self._account_sleep()
+        late = time.monotonic() - self._deadline
+        missed, self._catch_up = self._catch_up, 0
+        if isinstance(self.schedule, Interval):
+            # stay on the original grid: start + k * interval
+            step = self.schedule.minutes * 60
+            skipped = int(late // step) if late >= step else 0
+            missed += skipped
+            self._deadline += (skipped + 1) * step
+        else:
+            now = datetime.now()
+            passed = 0
+            while self._slot <= now:
+                passed += 1
+                self._slot = self.schedule.next_after(self._slot)
+            missed += max(0, passed - 1)  # the slot being run now is not missed
+            self._deadline = time.monotonic() + (self._slot - now).total_seconds()
+        return missed
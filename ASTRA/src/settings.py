@@ -0,0 +1,22 @@
+# settings.py
+import json
+import os
+
+SETTINGS_FILE = "astra_settings.json"  # next to last_backup.txt
+
+
+def load_settings(path=SETTINGS_FILE):
+    """Saved GUI state (last paths, interval, ...); {} if there is none or it is unreadable."""
+    try:
+        with open(path) as f:
+            data = json.load(f)
+        return data if isinstance(data, dict) else {}
+    except (OSError, ValueError):
+        return {}
+
+
+def save_settings(data, path=SETTINGS_FILE):
+    tmp = path + ".tmp"
+    with open(tmp, "w") as f:
+        json.dump(data, f, indent=2)
+    os.replace(tmp, path)
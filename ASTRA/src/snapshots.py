@@ -0,0 +1,184 @@
+# snapshots.py
+import os
+import shutil
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+
+# how snapshots are grouped per retention rule: the newest one in each group is kept
+RETENTION_BUCKETS = {
+    "hourly": "%Y-%m-%d %H",
+    "daily": "%Y-%m-%d",
+    "weekly": "%G-%V",  # ISO year and week
+}
+
+
+def select_keep(stamps, last=0, hourly=0, daily=0, weekly=0):
+    """
+    Which of the snapshot times 'stamps' (datetimes) to keep: the 'last' newest,
+    and the newest one of each of the last 'hourly' hours, 'daily' days and
+    'weekly' weeks that have a snapshot; the newest overall always stays. With
+    every count 0, all are kept.
+    """
+    stamps = sorted(stamps, reverse=True)
+    counts = {"hourly": hourly, "daily": daily, "weekly": weekly}
+    if not last and not any(counts.values()):
+        return set(stamps)
+    keep = set(stamps[:max(1, last)])
+    for rule, count in counts.items():
+        buckets = set()
+        for stamp in stamps:
+            if len(buckets) >= count:
+                break
+            bucket = stamp.strftime(RETENTION_BUCKETS[rule])
+            if bucket not in buckets:
+                buckets.add(bucket)
+                keep.add(stamp)
+    return keep
+
+
+def remove_tree(path, workers=4):
+    """Delete a directory tree, its top-level subtrees in parallel (unlinks dominate, not data)."""
+    try:
+        entries = list(os.scandir(path))
+    except FileNotFoundError:
+        return
+    with ThreadPoolExecutor(max_workers=max(1, workers), thread_name_prefix="astra-prune") as pool:
+        for entry in entries:
+            if entry.is_dir(follow_symlinks=False):
+                pool.submit(shutil.rmtree, entry.path, True)
+            else:
+                try:
+                    os.remove(entry.path)
+                except OSError:
+                    pass
+    shutil.rmtree(path, ignore_errors=True)
+
+
+class SnapshotSet:
+    """
+    Point-in-time copies of the source under '<destination>/snapshots/<time>/'.
+
+    Each run writes a new snapshot: files that match the previous snapshot are
+    hardlinked from it, only new and changed ones are copied (rsync --link-dest),
+    so a snapshot costs the I/O and space of an incremental sync. A run builds
+    '<time>.partial' and renames it when complete, so every snapshot without
+    the suffix is whole. Old snapshots are thinned out by prune().
+    """
+
+    DIRNAME = "snapshots"
+    STAMP = "%Y-%m-%d_%H%M%S"
+    PARTIAL = ".partial"
+    PRUNING = ".pruning"  # snapshots being deleted are renamed here first
+
+    def __init__(self, destination):
+        self.root = os.path.join(destination, self.DIRNAME)
+
+    def snapshots(self):
+        """Complete snapshots as [(datetime, path), ...], oldest first."""
+        found = []
+        try:
+            names = os.listdir(self.root)
+        except FileNotFoundError:
+            return found
+        for name in names:
+            try:
+                found.append((datetime.strptime(name, self.STAMP), os.path.join(self.root, name)))
+            except ValueError:
+                continue  # partial, pruning or not ours
+        return sorted(found)
+
+    def latest(self):
+        snapshots = self.snapshots()
+        return snapshots[-1][1] if snapshots else None
+
+    def partials(self):
+        try:
+            return [os.path.join(self.root, n) for n in os.listdir(self.root) if n.endswith(self.PARTIAL)]
+        except FileNotFoundError:
+            return []
+
+    def begin(self):
+        """Start a new snapshot; returns its SnapshotRun. Leftovers of an interrupted run are discarded."""
+        os.makedirs(self.root, exist_ok=True)
+        for path in self.partials():
+            self._discard(path)
+        now = datetime.now()
+        name = now.strftime(self.STAMP)
+        while os.path.exists(os.path.join(self.root, name)):
+            # two runs within a second: the snapshot is named a second later
+            now = datetime.fromtimestamp(now.timestamp() + 1)
+            name = now.strftime(self.STAMP)
+        path = os.path.join(self.root, name + self.PARTIAL)
+        os.makedirs(path)
+        base = self.latest()
+        if base is not None and not self._can_hardlink(path):
+            base = None  # FAT/exFAT and the like: every snapshot is a full copy
+        return SnapshotRun(path, os.path.join(self.root, name), base)
+
+    @staticmethod
+    def _can_hardlink(folder):
+        probe = os.path.join(folder, ".astra_link_probe")
+        try:
+            open(probe, "w").close()
+            os.link(probe, probe + ".link")
+            os.remove(probe + ".link")
+            return True
+        except OSError:
+            return False
+        finally:
+            try:
+                os.remove(probe)
+            except OSError:
+                pass
+
+    def _discard(self, path, workers=4):
+        # renamed first: gone from view at once, however long the unlinking takes
+        trash = os.path.join(self.root, self.PRUNING)
+        os.makedirs(trash, exist_ok=True)
+        target = os.path.join(trash, f"{os.path.basename(path)}-{time.monotonic_ns()}")
+        os.rename(path, target)
+        remove_tree(target, workers)
+
+    def prune(self, last=0, hourly=0, daily=0, weekly=0, workers=4):
+        """Delete the snapshots select_keep() does not keep. Returns their paths."""
+        snapshots = self.snapshots()
+        keep = select_keep([stamp for stamp, _ in snapshots], last, hourly, daily, weekly)
+        removed = []
+        for stamp, path in snapshots:
+            if stamp not in keep:
+                self._discard(path, workers)
+                removed.append(path)
+        # an earlier prune that was interrupted
+        remove_tree(os.path.join(self.root, self.PRUNING), workers)
+        return removed
+
+
+class SnapshotRun:
+    """The snapshot being written: 'path' (still .partial), 'final' name, and 'base', the snapshot it links from."""
+
+    def __init__(self, path, final, base):
+        self.path = path
+        self.final = final
+        self.base = base
+        self.linked = 0
+
+    def base_file(self, rel):
+        return os.path.join(self.base, rel) if self.base else None
+
+    def link(self, rel, dest_file, suffixes=("",)):
+        """
+        Hardlink the previous snapshot's copy of 'rel' to 'dest_file' in this one,
+        each stored form in 'suffixes' ("" raw, ".gz"...). False if linking fails.
+        """
+        base_file = self.base_file(rel)
+        try:
+            for suffix in suffixes:
+                os.link(base_file + suffix, dest_file + suffix)
+        except OSError:
+            return False  # e.g. EMLINK, or gone meanwhile: the caller copies instead
+        self.linked += 1
+        return True
+
+    def commit(self):
+        os.rename(self.path, self.final)
@@ -0,0 +1,95 @@
+# throttle.py
+import threading
+import time
+from datetime import datetime
+
+MB = 1024 * 1024
+
+
+def parse_rate_schedule(text):
+    """
+    Parse "9-18=20,18-9=0" into [(9, 18, 20 MB/s), (18, 9, None)].
+    Hours are 0-24, a range may wrap past midnight, 0 MB/s means unlimited.
+    """
+    rules = []
+    for part in filter(None, (p.strip() for p in text.split(","))):
+        hours, rate = part.split("=")
+        start, end = (float(h) for h in hours.split("-"))
+        mbps = float(rate)
+        rules.append((start, end, mbps * MB if mbps > 0 else None))
+    return rules
+
+
+class RateLimiter:
+    """
+    Caps the combined copy rate of all workers, optionally by time of day.
+
+    'rules' is a list of (start_hour, end_hour, bytes_per_s or None); the first
+    rule whose hours contain the current time wins, otherwise 'default_rate'
+    applies (None = unlimited). Workers call consume() after moving data and
+    are put to sleep long enough to keep the average at the cap.
+    """
+
+    BURST_SECONDS = 0.5  # how far ahead of the cap a worker may get after an idle spell
+
+    def __init__(self, rules=None, default_rate=None):
+        self.rules = rules or []
+        self.default_rate = default_rate
+        self._lock = threading.Lock()
+        self._next_free = time.monotonic()  # when the capped "pipe" is free again
+
+    def current_rate(self, now=None):
+        now = now or datetime.now()
+        hour = now.hour + now.minute / 60
+        for start, end, rate in self.rules:
+            inside = start <= hour < end if start <= end else (hour >= start or hour < end)
+            if inside:
+                return rate
+        return self.default_rate
+
+    @property
+    def active(self):
+        return bool(self.default_rate or any(rate for _, _, rate in self.rules))
+
+    def consume(self, nbytes, stop_event=None):
+        """Account for 'nbytes' just copied; sleeps if that puts us over the current cap."""
+        rate = self.current_rate()
+        if not rate or nbytes <= 0:
+            return
+        with self._lock:
+            now = time.monotonic()
+            start = max(self._next_free, now - self.BURST_SECONDS)
+            self._next_free = start + nbytes / rate
+            wait = self._next_free - now
+        deadline = time.monotonic() + wait
+        while wait > 0:
+            if stop_event is not None and stop_event.is_set():
+                return
+            time.sleep(min(wait, 0.2))
+            wait = deadline - time.monotonic()
+
+
+class AdaptiveChunker:
+    """
+    Picks the copy chunk size from measured throughput.
+
+    Each chunk should take about 'target_seconds': chunks that finish much
+    faster double the size (fewer syscalls on fast disks), chunks that take
+    much longer halve it (quicker cancellation and smoother throttling on slow
+    or busy ones). The learned size is shared by all workers.
+    """
+
+    def __init__(self, initial=1 * MB, minimum=64 * 1024, maximum=16 * MB, target_seconds=0.1):
+        self.minimum = minimum
+        self.maximum = maximum
+        self.target_seconds = target_seconds
+        self.chunk_size = max(minimum, min(maximum, initial))
+
+    def record(self, nbytes, seconds):
+        """Feed back how long a full chunk of 'nbytes' took."""
+        if nbytes < self.chunk_size:
+            return  # end of file, says nothing about the disk
+        if seconds < self.target_seconds / 2 and self.chunk_size < self.maximum:
+            self.chunk_size = min(self.maximum, self.chunk_size * 2)
+        elif seconds > self.target_seconds * 2 and self.chunk_size > self.minimum:
+            self.chunk_size = max(self.minimum, self.chunk_size // 2)
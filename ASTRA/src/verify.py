@@ -0,0 +1,101 @@
+# verify.py
+import bz2
+import gzip
+import hashlib
+import lzma
+import os
+import sqlite3
+import threading
+import time
+
+from compress import SUFFIXES
+
+HASH_CHUNK = 1024 * 1024
+_OPENERS = {"gzip": gzip.open, "xz": lzma.open, "bz2": bz2.open}
+
+
+def hash_file(path, codec=None, stop_event=None, on_progress=None):
+    """
+    blake2b of the file's content, or of its decompressed content when 'codec'
+    (a compress.SUFFIXES key) is given. hashlib releases the GIL on large
+    buffers, so several threads really hash in parallel. None if cancelled.
+    """
+    h = hashlib.blake2b(digest_size=32)
+    opener = _OPENERS[codec] if codec else open
+    with opener(path, "rb") as f:
+        while True:
+            if stop_event is not None and stop_event.is_set():
+                return None
+            chunk = f.read(HASH_CHUNK)
+            if not chunk:
+                break
+            h.update(chunk)
+            if on_progress:
+                on_progress(len(chunk))
+    return h.hexdigest()
+
+
+def codec_for(path):
+    """The codec a destination file was stored with (by suffix), or None for a raw copy."""
+    for codec, suffix in SUFFIXES.items():
+        if path.endswith(suffix):
+            return codec
+    return None
+
+
+class HashCache:
+    """
+    Persistent content hashes keyed by (device, inode, size, mtime_ns), stored as
+    SQLite in the destination. A file whose stat still matches is not read again.
+    'checked_at' lets callers force a re-read after a while: destination data can
+    rot without its metadata changing. Safe to use from several threads.
+    """
+
+    FILENAME = ".astra_hashes.db"
+    COMMIT_EVERY = 500
+
+    def __init__(self, destination):
+        self.path = os.path.join(destination, self.FILENAME)
+        self._lock = threading.Lock()
+        self._pending = 0
+        self._conn = sqlite3.connect(self.path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS hashes ("
+            " dev INTEGER NOT NULL,"
+            " inode INTEGER NOT NULL,"
+            " size INTEGER NOT NULL,"
+            " mtime_ns INTEGER NOT NULL,"
+            " digest TEXT NOT NULL,"
+            " checked_at REAL NOT NULL,"
+            " PRIMARY KEY (dev, inode))"
+        )
+        self._conn.commit()
+
+    def get(self, st, max_age=None):
+        """Cached digest for a file that still looks like 'st', or None. 'max_age' in seconds."""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT size, mtime_ns, digest, checked_at FROM hashes WHERE dev = ? AND inode = ?",
+                (st.st_dev, st.st_ino)).fetchone()
+        if row is None or row[0] != st.st_size or row[1] != st.st_mtime_ns:
+            return None
+        if max_age is not None and time.time() - row[3] > max_age:
+            return None
+        return row[2]
+
+    def put(self, st, digest):
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO hashes (dev, inode, size, mtime_ns, digest, checked_at) VALUES (?, ?, ?, ?, ?, ?)",
+                (st.st_dev, st.st_ino, st.st_size, st.st_mtime_ns, digest, time.time()))
+            self._pending += 1
+            if self._pending >= self.COMMIT_EVERY:
+                self._conn.commit()
+                self._pending = 0
+
+    def close(self):
+        with self._lock:
+            self._conn.commit()
+            self._conn.close()
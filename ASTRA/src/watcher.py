@@ -0,0 +1,78 @@
+# watcher.py
+import os
+from datetime import datetime
+
+from watchdog.events import FileSystemEventHandler
+
+
+class WatchHandler(FileSystemEventHandler):
+    def __init__(self, source_path, dest_path, logger, dirty_paths=None, path_filter=None, recorder=None):
+        super().__init__()
+        self.source_path = source_path
+        self.dest_path = dest_path
+        self.logger = logger
+        self.dirty_paths = dirty_paths  # DirtyPathSet fed to the incremental sync
+        self.path_filter = path_filter  # filters.PathFilter: excluded paths are neither logged nor synced
+        self.recorder = recorder  # workload_trace.TraceRecorder, if events are being recorded
+
+        self.logger("Name                                                                       | Status    | Kind   | Size     | Date Modified")
+        self.logger("-" * 80)
+
+    def dispatch(self, event):
+        if self.path_filter is not None:
+            paths = [event.src_path] + ([event.dest_path] if getattr(event, "dest_path", "") else [])
+            if all(self._excluded(p, event.is_directory) for p in paths):
+                return
+        if self.recorder is not None:
+            self.recorder.watch_event(event)
+        super().dispatch(event)
+
+    def _excluded(self, path, is_dir):
+        rel = os.path.relpath(path, self.source_path)
+        return not rel.startswith(os.pardir) and self.path_filter.excluded_path(rel, is_dir)
+
+    def on_created(self, event):
+        if not event.is_directory:
+            self._mark_dirty(event.src_path)
+            self._log_file_info(event.src_path, status="New")
+
+    def on_modified(self, event):
+        if not event.is_directory:
+            self._mark_dirty(event.src_path)
+            self._log_file_info(event.src_path, status="Modified")
+
+    def on_deleted(self, event):
+        # directories too: mirror mode removes everything that was below them
+        self._mark_dirty(event.src_path)
+        self._log_event(event.src_path, status="Deleted")
+
+    def on_moved(self, event):
+        # both ends: the new path is synced (as a cheap rename in mirror mode), the old one removed
+        self._mark_dirty(event.src_path)
+        self._mark_dirty(event.dest_path)
+        self._log_event(event.dest_path, status="Moved")
+
+    def _mark_dirty(self, file_path):
+        if self.dirty_paths is not None:
+            self.dirty_paths.add(file_path)
+
+    def _log_event(self, file_path, status):
+        name = os.path.basename(file_path)
+        ext = os.path.splitext(name)[1] or "-"
+        when = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+        self.logger(f"{name:<30}                                                                       | {status:<9} | {ext:<6} | {'-':<8} | {when}")
+
+    def _log_file_info(self, file_path, status):
+        try:
+            name = os.path.basename(file_path)
+            ext = os.path.splitext(name)[1] or "-"
+            size_bytes = os.path.getsize(file_path)
+            size_kb = f"{size_bytes / 1024:.1f} KB"
+            mtime = os.path.getmtime(file_path)
+            mod_time = datetime.fromtimestamp(mtime).strftime("%Y-%m-%d %H:%M:%S")
+
+            log_line = f"{name:<30}                                                                       | {status:<9} | {ext:<6} | {size_kb:<8} | {mod_time}"
+            self.logger(log_line)
+
+        except Exception as e:
+            self.logger(f"File in use {file_path}")
@@ -0,0 +1,102 @@
+# workload_trace.py
+"""
+Compact recording of what the watcher saw and what the sync did about it, for
+replaying event storms offline (see benchmarks/replay_trace.py).
+
+A trace is gzipped JSON lines. The first line is a header object
+{"v": 1, "source": ..., "started": <epoch seconds>}; every other line is a
+short array whose second item is milliseconds since the start:
+
+    ["E", t, kind, rel, is_dir, size, dest_rel]   watchdog event (created/modified/deleted/moved)
+    ["S", t, mode, paths]                          sync started ("full" or "paths", path count)
+    ["D", t, action, rel, ok]                      sync decision for one file
+    ["F", t, status, seconds, files, bytes]        sync finished
+
+Paths are relative to the source. 'size' is the file size when the event came
+in (None if unknown), so a replay can write files of the same size.
+"""
+import gzip
+import json
+import os
+import threading
+import time
+
+VERSION = 1
+# what the sync acts on; opened/closed events (many of them the sync's own reads) are not recorded
+RECORDED_EVENTS = ("created", "modified", "deleted", "moved")
+
+
+class TraceRecorder:
+    """Appends trace records from any thread (watchdog's, the sync's, copy workers)."""
+
+    def __init__(self, path, source):
+        self.path = path
+        self.source = source
+        self.records = 0
+        self._lock = threading.Lock()
+        self._t0 = time.monotonic()
+        self._file = gzip.open(path, "wt", encoding="utf-8")
+        self._write({"v": VERSION, "source": source, "started": time.time()})
+
+    def _write(self, record):
+        line = json.dumps(record, separators=(",", ":"), ensure_ascii=False) + "\n"
+        with self._lock:
+            if self._file is not None:
+                self._file.write(line)
+                self.records += 1
+
+    def _now(self):
+        return int((time.monotonic() - self._t0) * 1000)
+
+    def _rel(self, path):
+        return os.path.relpath(path, self.source) if path else None
+
+    def watch_event(self, event):
+        if event.event_type not in RECORDED_EVENTS:
+            return
+        size = None
+        if event.event_type in ("created", "modified") and not event.is_directory:
+            try:
+                size = os.stat(event.src_path).st_size
+            except OSError:
+                pass  # already gone again
+        self._write(["E", self._now(), event.event_type, self._rel(event.src_path), int(event.is_directory),
+                     size, self._rel(getattr(event, "dest_path", None))])
+
+    def sync_start(self, mode, paths=None):
+        self._write(["S", self._now(), mode, paths])
+
+    def decision(self, rel, action, ok):
+        self._write(["D", self._now(), action, rel, int(ok)])
+
+    def sync_end(self, status, seconds, files, nbytes):
+        self._write(["F", self._now(), status, round(seconds, 4), files, nbytes])
+        with self._lock:
+            if self._file is not None:
+                self._file.flush()  # a trace cut short by a crash still has every finished sync
+
+    def close(self):
+        with self._lock:
+            if self._file is not None:
+                self._file.close()
+                self._file = None
+
+
+def read_trace(path):
+    """(header, records) of a trace file; 'records' is an iterator."""
+    f = gzip.open(path, "rt", encoding="utf-8")
+    header = json.loads(f.readline())
+    if header.get("v") != VERSION:
+        f.close()
+        raise ValueError(f"Unsupported trace version: {header.get('v')}")
+
+    def records():
+        with f:
+            try:
+                for line in f:
+                    if line.strip():
+                        yield json.loads(line)
+            except EOFError:
+                return  # cut short (the recording process died): keep what is there
+
+    return header, records()
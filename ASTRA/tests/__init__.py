@@ -0,0 +1,7 @@
+# tests/__init__.py
+import os
+import sys
+
+# the application modules live flat in src/, as the app and the benchmarks import them
+SRC_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir, "src")
+sys.path.insert(0, os.path.abspath(SRC_DIR))
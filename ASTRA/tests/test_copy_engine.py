@@ -0,0 +1,41 @@
+# test_copy_engine.py
+import threading
+import unittest
+
+from copy_engine import CopyEngine
+
+
+class CopyEngineTest(unittest.TestCase):
+    def test_results_reach_on_done(self):
+        done = []
+        pool = CopyEngine(lambda src, dst: src != "bad", workers=2)
+        for name in ("a", "bad", "c"):
+            pool.submit(name, name + ".copy", 10, on_done=lambda s, d, ok: done.append((s, ok)))
+        pool.shutdown()
+        self.assertEqual(sorted(done), [("a", True), ("bad", False), ("c", True)])
+        self.assertEqual(pool.inflight_bytes, 0)
+
+    def test_exception_is_reported(self):
+        errors, done = [], []
+
+        def broken(src, dst):
+            raise OSError("disk on fire")
+
+        pool = CopyEngine(broken, on_error=lambda s, d, e: errors.append((s, d, str(e))))
+        pool.submit("a", "b", 1, on_done=lambda s, d, ok: done.append(ok))
+        pool.shutdown()
+        self.assertEqual(done, [False])
+        self.assertEqual(errors, [("a", "b", "disk on fire")])
+
+    def test_cancelled_copy_is_not_an_error(self):
+        stop = threading.Event()
+        stop.set()
+        errors = []
+        pool = CopyEngine(lambda s, d: True, stop_event=stop, on_error=lambda *a: errors.append(a))
+        self.assertFalse(pool.submit("a", "b", 1))
+        pool.shutdown()
+        self.assertEqual(errors, [])
+
+
+if __name__ == "__main__":
+    unittest.main()
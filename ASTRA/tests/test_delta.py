@@ -0,0 +1,102 @@
+# test_delta.py
+import io
+import os
+import shutil
+import tempfile
+import threading
+import unittest
+
+import delta
+
+BLOCK = 4096
+
+
+class SignatureTest(unittest.TestCase):
+    def test_roundtrip(self):
+        sigs = delta.block_signatures(io.BytesIO(os.urandom(3 * BLOCK + 10)), BLOCK)
+        self.assertEqual(len(sigs), 4)
+        self.assertEqual(delta.unpack_signatures(delta.pack_signatures(sigs)), sigs)
+
+    def test_foreign_blob_is_rejected(self):
+        self.assertIsNone(delta.unpack_signatures(b"x" * (delta.SIG_SIZE + 4)))
+
+
+class DeltaCopyTest(unittest.TestCase):
+    def setUp(self):
+        self.dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.dir, True)
+        self.src = os.path.join(self.dir, "src")
+        self.dst = os.path.join(self.dir, "dst")
+        self.data = bytearray(os.urandom(8 * BLOCK))
+        self.write(self.src, self.data)
+        self.write(self.dst, self.data)
+        with open(self.dst, "rb") as f:
+            self.sigs = delta.block_signatures(f, BLOCK)
+        os.utime(self.dst, (5000, 5000))
+
+    @staticmethod
+    def write(path, data):
+        with open(path, "wb") as f:
+            f.write(data)
+
+    def read(self, path):
+        with open(path, "rb") as f:
+            return f.read()
+
+    def test_unchanged_file_is_left_alone(self):
+        result = delta.delta_copy(self.src, self.dst, BLOCK, self.sigs)
+        self.assertTrue(result.completed)
+        self.assertEqual(result.bytes_written, 0)
+        self.assertEqual(os.stat(self.dst).st_mtime, 5000)
+
+    def test_only_changed_blocks_are_written(self):
+        self.data[BLOCK * 2 + 7] ^= 0xFF
+        self.write(self.src, self.data)
+        result = delta.delta_copy(self.src, self.dst, BLOCK, self.sigs)
+        self.assertEqual(result.bytes_written, BLOCK)
+        self.assertEqual(result.bytes_saved, 7 * BLOCK)
+        self.assertEqual(self.read(self.dst), bytes(self.data))
+        with open(self.dst, "rb") as f:
+            self.assertEqual(result.signatures, delta.block_signatures(f, BLOCK))
+
+    def test_without_signatures_the_destination_is_read(self):
+        self.data[0] ^= 0xFF
+        self.write(self.src, self.data)
+        result = delta.delta_copy(self.src, self.dst, BLOCK)
+        self.assertEqual(result.bytes_written, BLOCK)
+        self.assertEqual(self.read(self.dst), bytes(self.data))
+
+    def test_grow_and_shrink(self):
+        self.write(self.src, self.data + b"tail")
+        delta.delta_copy(self.src, self.dst, BLOCK, self.sigs)
+        self.assertEqual(self.read(self.dst), bytes(self.data) + b"tail")
+        self.write(self.src, self.data[:BLOCK + 1])
+        delta.delta_copy(self.src, self.dst, BLOCK)
+        self.assertEqual(self.read(self.dst), bytes(self.data[:BLOCK + 1]))
+        self.assertEqual(os.stat(self.dst).st_mtime, 0)  # stale until the caller's copystat
+
+    def test_cancelled_update_leaves_the_destination_stale(self):
+        stop = threading.Event()
+        self.write(self.src, os.urandom(len(self.data)))
+        result = delta.delta_copy(self.src, self.dst, BLOCK, self.sigs, on_progress=lambda n: stop.set(),
+                                  stop_event=stop)
+        self.assertFalse(result.completed)
+        self.assertEqual(os.stat(self.dst).st_mtime, 0)
+
+    def test_crash_midway_leaves_the_destination_stale(self):
+        # the mtime must stay 0 although every write sets it to now
+        calls = []
+
+        def crash(nbytes):
+            calls.append(nbytes)
+            if len(calls) == 3:
+                raise RuntimeError("killed")
+
+        self.write(self.src, os.urandom(len(self.data)))
+        with self.assertRaises(RuntimeError):
+            delta.delta_copy(self.src, self.dst, BLOCK, self.sigs, on_progress=crash)
+        self.assertEqual(os.stat(self.dst).st_mtime, 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
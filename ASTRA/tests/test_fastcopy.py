@@ -0,0 +1,52 @@
+# test_fastcopy.py
+import os
+import shutil
+import tempfile
+import unittest
+
+import fastcopy
+
+
+class KernelCopyTest(unittest.TestCase):
+    def setUp(self):
+        self.dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.dir, True)
+        self.data = os.urandom(3 * 1024 * 1024 + 17)
+        self.src = os.path.join(self.dir, "src")
+        with open(self.src, "wb") as f:
+            f.write(self.data)
+
+    def copy(self, offset=0):
+        dst = os.path.join(self.dir, "dst")
+        progress = []
+        before = fastcopy.call_counts()
+        with open(self.src, "rb") as fsrc, open(dst, "r+b" if offset else "wb") as fdst:
+            done = fastcopy.kernel_copy(fsrc.fileno(), fdst.fileno(), len(self.data), progress.append,
+                                        segment_size=1024 * 1024, offset=offset)
+        after = fastcopy.call_counts()
+        calls = sum(after[m] - before[m] for m in after)
+        return dst, done, progress, calls
+
+    def test_copies_and_counts_its_calls(self):
+        dst, done, progress, calls = self.copy()
+        if done < len(self.data):
+            self.skipTest("no kernel copy method works on this filesystem")
+        with open(dst, "rb") as f:
+            self.assertEqual(f.read(), self.data)
+        self.assertEqual(sum(progress), len(self.data))
+        self.assertGreaterEqual(calls, 1)
+
+    def test_resumes_at_an_offset(self):
+        offset = 1024 * 1024
+        with open(os.path.join(self.dir, "dst"), "wb") as f:
+            f.write(self.data[:offset])
+        dst, done, progress, _ = self.copy(offset)
+        if done < len(self.data):
+            self.skipTest("no kernel copy method works on this filesystem")
+        with open(dst, "rb") as f:
+            self.assertEqual(f.read(), self.data)
+        self.assertEqual(sum(progress), len(self.data) - offset)
+
+
+if __name__ == "__main__":
+    unittest.main()
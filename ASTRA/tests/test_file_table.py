@@ -0,0 +1,47 @@
+# test_file_table.py
+import os
+import unittest
+
+from file_table import FileTable
+
+
+class FileTableTest(unittest.TestCase):
+    def test_add_and_lookup(self):
+        table = FileTable()
+        paths = ["top.txt", os.path.join("a", "one"), os.path.join("a", "two"), os.path.join("b", "c", "one")]
+        numbers = [table.add(rel) for rel in paths]
+        self.assertEqual(numbers, [0, 1, 2, 3])
+        self.assertEqual(len(table), 4)
+        for number, rel in zip(numbers, paths):
+            self.assertIn(rel, table)
+            self.assertEqual(table.index_of(rel), number)
+            self.assertEqual(table.rel(number), rel)
+
+    def test_growth_rehashes(self):
+        table = FileTable()
+        paths = [os.path.join(f"d{i % 7}", f"file{i}") for i in range(1000)]
+        for rel in paths:
+            table.add(rel)
+        self.assertEqual(len(table), 1000)
+        self.assertGreaterEqual(len(table._slots), 2000)
+        for number, rel in enumerate(paths):
+            self.assertEqual(table.index_of(rel), number)
+
+    def test_missing_keys(self):
+        table = FileTable()
+        table.add(os.path.join("a", "one"))
+        self.assertIsNone(table.index_of(os.path.join("a", "other")))
+        self.assertNotIn(os.path.join("missing", "one"), table)
+        self.assertNotIn("one", table)
+        self.assertNotIn("", table)
+
+    def test_non_utf8_names(self):
+        table = FileTable()
+        rel = os.path.join("a", "caf\udce9")
+        table.add(rel)
+        self.assertIn(rel, table)
+        self.assertEqual(table.rel(0), rel)
+
+
+if __name__ == "__main__":
+    unittest.main()
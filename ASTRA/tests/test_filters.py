@@ -0,0 +1,131 @@
+# test_filters.py
+import os
+import tempfile
+import unittest
+
+from filters import IGNORE_FILE, PathFilter, parse_rule
+
+
+class ParseRuleTest(unittest.TestCase):
+    def test_blank_and_comment_lines(self):
+        self.assertIsNone(parse_rule(""))
+        self.assertIsNone(parse_rule("   "))
+        self.assertIsNone(parse_rule("# comment"))
+        self.assertIsNone(parse_rule("/"))
+
+    def test_flags(self):
+        _, negate, dir_only = parse_rule("!build/")
+        self.assertTrue(negate)
+        self.assertTrue(dir_only)
+        _, negate, dir_only = parse_rule("*.log")
+        self.assertFalse(negate)
+        self.assertFalse(dir_only)
+
+    def test_escaped_hash_and_bang(self):
+        self.assertFalse(PathFilter([r"\#notes"]).excluded("x"))
+        self.assertTrue(PathFilter([r"\#notes"]).excluded("#notes"))
+        rule = PathFilter([r"\!important"])
+        self.assertTrue(rule.excluded("!important"))
+        self.assertFalse(rule.excluded("important"))
+
+
+class PathFilterTest(unittest.TestCase):
+    def test_unanchored_pattern_matches_at_any_depth(self):
+        f = PathFilter(["*.log"])
+        self.assertTrue(f.excluded("a.log"))
+        self.assertTrue(f.excluded(os.path.join("x", "y", "a.log")))
+        self.assertFalse(f.excluded("a.log.txt"))
+
+    def test_pattern_with_slash_is_anchored(self):
+        f = PathFilter(["docs/*.tmp"])
+        self.assertTrue(f.excluded(os.path.join("docs", "a.tmp")))
+        self.assertFalse(f.excluded(os.path.join("src", "docs", "a.tmp")))
+
+    def test_leading_slash_anchors_to_the_root(self):
+        f = PathFilter(["/build"])
+        self.assertTrue(f.excluded("build", is_dir=True))
+        self.assertFalse(f.excluded(os.path.join("src", "build"), is_dir=True))
+
+    def test_star_stays_within_one_segment(self):
+        f = PathFilter(["src/*.py"])
+        self.assertTrue(f.excluded(os.path.join("src", "a.py")))
+        self.assertFalse(f.excluded(os.path.join("src", "pkg", "a.py")))
+
+    def test_double_star_crosses_directories(self):
+        f = PathFilter(["src/**/*.pyc"])
+        self.assertTrue(f.excluded(os.path.join("src", "a.pyc")))
+        self.assertTrue(f.excluded(os.path.join("src", "a", "b", "c.pyc")))
+        self.assertFalse(f.excluded(os.path.join("lib", "a.pyc")))
+
+    def test_question_mark_and_character_class(self):
+        f = PathFilter(["file?.txt", "img[0-9].png", "tmp[!a].dat"])
+        self.assertTrue(f.excluded("file1.txt"))
+        self.assertFalse(f.excluded("file10.txt"))
+        self.assertTrue(f.excluded("img7.png"))
+        self.assertFalse(f.excluded("imgx.png"))
+        self.assertTrue(f.excluded("tmpb.dat"))
+        self.assertFalse(f.excluded("tmpa.dat"))
+
+    def test_trailing_slash_only_matches_directories(self):
+        f = PathFilter(["cache/"])
+        self.assertTrue(f.excluded("cache", is_dir=True))
+        self.assertFalse(f.excluded("cache", is_dir=False))
+
+    def test_negation_reincludes(self):
+        f = PathFilter(["*.log", "!keep.log"])
+        self.assertTrue(f.excluded("a.log"))
+        self.assertFalse(f.excluded("keep.log"))
+        self.assertFalse(f.excluded(os.path.join("sub", "keep.log")))
+
+    def test_last_matching_rule_wins(self):
+        f = PathFilter(["!keep.log", "*.log"])
+        self.assertTrue(f.excluded("keep.log"))
+        f = PathFilter(["*.log", "!*.log", "debug.log"])
+        self.assertTrue(f.excluded("debug.log"))
+        self.assertFalse(f.excluded("app.log"))
+
+    def test_negated_directory_rule_ignores_files(self):
+        f = PathFilter([".*", "!.*/"])
+        self.assertTrue(f.excluded(".hidden"))
+        self.assertFalse(f.excluded(".config", is_dir=True))
+
+    def test_excluded_path_checks_parents(self):
+        f = PathFilter(["node_modules/"])
+        rel = os.path.join("web", "node_modules", "lib", "index.js")
+        self.assertFalse(f.excluded(rel))
+        self.assertTrue(f.excluded_path(rel))
+        self.assertFalse(f.excluded_path(os.path.join("web", "src", "index.js")))
+
+    def test_reincluding_a_file_does_not_reinclude_under_an_excluded_parent(self):
+        # as in git: a file cannot be re-included once its directory is excluded
+        f = PathFilter(["build/", "!build/keep.txt"])
+        self.assertFalse(f.excluded(os.path.join("build", "keep.txt")))
+        self.assertTrue(f.excluded_path(os.path.join("build", "keep.txt")))
+
+    def test_default_rules(self):
+        f = PathFilter.for_source(tempfile.mkdtemp())
+        self.assertTrue(f.excluded(".DS_Store"))
+        self.assertTrue(f.excluded("report.docx~"))
+        self.assertTrue(f.excluded("report.sb-1234-abcd"))
+        self.assertFalse(f.excluded(".git", is_dir=True))
+        self.assertFalse(f.excluded("report.docx"))
+
+    def test_ignore_file_rules_come_last(self):
+        with tempfile.TemporaryDirectory() as source:
+            with open(os.path.join(source, IGNORE_FILE), "w", encoding="utf-8") as fh:
+                fh.write("# local rules\n*.iso\n!.env\n")
+            f = PathFilter.for_source(source, extra_rules=["!*.iso", "*.bak"])
+            self.assertTrue(f.excluded("disk.iso"))  # .astraignore overrides extra_rules
+            self.assertTrue(f.excluded("old.bak"))
+            self.assertFalse(f.excluded(".env"))  # and the default hidden-file rule
+            self.assertTrue(f.excluded(".other"))
+
+    def test_many_rules_are_merged(self):
+        f = PathFilter([f"*.ext{i}" for i in range(200)] + ["!*.ext7"])
+        self.assertTrue(f.excluded("a.ext150"))
+        self.assertFalse(f.excluded("a.ext7"))
+        self.assertEqual(len(f._groups), 2)
+
+
+if __name__ == "__main__":
+    unittest.main()
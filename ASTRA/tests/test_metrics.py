@@ -0,0 +1,39 @@
+# test_metrics.py
+import json
+import threading
+import unittest
+
+from metrics import SyncMetrics
+
+
+class MetricsTest(unittest.TestCase):
+    def sampled(self):
+        metrics = SyncMetrics(labels={"job": "test"})
+        seen = threading.Event()
+        samples = iter([(1, 100, {"scan_queue": 3, "copy_inflight_bytes": 4096}),
+                        (2, 200, {"scan_queue": 1, "copy_inflight_bytes": 8192})])
+
+        def sample():
+            try:
+                return next(samples)
+            except StopIteration:
+                seen.set()
+                return 2, 200, {"scan_queue": 0, "copy_inflight_bytes": 0}
+
+        metrics.start_sampler(sample, interval=0.01)
+        self.assertTrue(seen.wait(5))
+        metrics.finish("finished", files_processed=2, bytes_copied=200)
+        return metrics
+
+    def test_report_keeps_every_gauge(self):
+        report = json.loads(json.dumps(self.sampled().report()))
+        self.assertEqual(report["max_gauges"], {"scan_queue": 3, "copy_inflight_bytes": 8192})
+
+    def test_prometheus_exports_every_gauge(self):
+        text = self.sampled().prometheus_text()
+        self.assertIn('astra_sync_max_queue_depth{job="test",queue="scan"} 3', text)
+        self.assertIn('astra_sync_max_copy_inflight_bytes{job="test"} 8192', text)
+
+
+if __name__ == "__main__":
+    unittest.main()
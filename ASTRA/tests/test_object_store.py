@@ -0,0 +1,45 @@
+# test_object_store.py
+import os
+import shutil
+import tempfile
+import threading
+import unittest
+
+from object_store import ObjectStore
+
+
+class ObjectStoreTest(unittest.TestCase):
+    def setUp(self):
+        self.dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.dir, True)
+        self.store = ObjectStore(os.path.join(self.dir, "dest"))
+        self.src = os.path.join(self.dir, "src.bin")
+        with open(self.src, "wb") as f:
+            f.write(os.urandom(3 * 1024 * 1024 + 5))
+        os.utime(self.src, (5000, 5000))
+
+    def test_copy_in_hashes_what_it_copied(self):
+        progress = []
+        tmp, digest = self.store.copy_in(self.src, on_progress=progress.append)
+        self.assertEqual(digest, ObjectStore.hash_file(self.src))
+        self.assertEqual(sum(progress), os.path.getsize(self.src))
+        self.assertEqual(os.stat(tmp).st_mtime, 5000)
+        self.store.commit(tmp, digest)
+        self.assertTrue(self.store.has(digest))
+
+    def test_copy_in_cancelled(self):
+        stop = threading.Event()
+        stop.set()
+        self.assertIsNone(self.store.copy_in(self.src, stop))
+        self.assertEqual(os.listdir(self.store.tmp_dir), [])
+
+    def test_link_shows_the_object(self):
+        tmp, digest = self.store.copy_in(self.src)
+        self.store.commit(tmp, digest)
+        dst = os.path.join(self.dir, "dest", "a", "b.bin")
+        self.store.link(digest, dst)
+        self.assertEqual(ObjectStore.hash_file(dst), digest)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,179 @@
+# test_schedule.py
+import unittest
+from datetime import datetime, timedelta
+from unittest import mock
+
+import schedule
+from schedule import BackupScheduler, CronExpression, Interval, parse_schedule
+
+
+class CronFieldTest(unittest.TestCase):
+    def test_star_step_range_and_list(self):
+        cron = CronExpression("*/15 9-17 1,15 * *")
+        self.assertEqual(cron.minutes, {0, 15, 30, 45})
+        self.assertEqual(cron.hours, set(range(9, 18)))
+        self.assertEqual(cron.days, {1, 15})
+        self.assertEqual(cron.months, set(range(1, 13)))
+
+    def test_range_with_step(self):
+        self.assertEqual(CronExpression("10-30/10 * * * *").minutes, {10, 20, 30})
+
+    def test_start_with_step_runs_to_the_end(self):
+        self.assertEqual(CronExpression("50/5 * * * *").minutes, {50, 55})
+
+    def test_names(self):
+        cron = CronExpression("0 0 * jan-mar mon-fri")
+        self.assertEqual(cron.months, {1, 2, 3})
+        self.assertEqual(cron.weekdays, {1, 2, 3, 4, 5})
+        self.assertEqual(CronExpression("0 0 * DEC SUN").months, {12})
+
+    def test_sunday_is_0_and_7(self):
+        self.assertEqual(CronExpression("0 0 * * 7").weekdays, {0})
+        self.assertEqual(CronExpression("0 0 * * 5-7").weekdays, {5, 6, 0})
+
+    def test_aliases(self):
+        self.assertEqual(CronExpression("@daily").hours, {0})
+        self.assertEqual(CronExpression("@weekly").weekdays, {0})
+        self.assertEqual(CronExpression("@monthly").days, {1})
+        self.assertEqual(str(CronExpression(" @hourly ")), "@hourly")
+
+    def test_invalid(self):
+        for text in ("* * * *", "* * * * * *", "60 * * * *", "* 24 * * *", "* * 0 * *", "* * * 13 *",
+                     "* * * * 8", "*/0 * * * *", "30-10 * * * *", "x * * * *", "* * * foo *"):
+            with self.subTest(text=text):
+                with self.assertRaises(ValueError):
+                    CronExpression(text)
+
+
+class CronNextTest(unittest.TestCase):
+    def test_strictly_after(self):
+        cron = CronExpression("30 2 * * *")
+        self.assertEqual(cron.next_after(datetime(2024, 5, 10, 2, 30)), datetime(2024, 5, 11, 2, 30))
+        self.assertEqual(cron.next_after(datetime(2024, 5, 10, 2, 29, 59)), datetime(2024, 5, 10, 2, 30))
+
+    def test_seconds_are_dropped(self):
+        cron = CronExpression("* * * * *")
+        self.assertEqual(cron.next_after(datetime(2024, 5, 10, 8, 0, 45, 123)), datetime(2024, 5, 10, 8, 1))
+
+    def test_rolls_over_hour_day_month_and_year(self):
+        cron = CronExpression("0 0 1 1 *")
+        self.assertEqual(cron.next_after(datetime(2024, 12, 31, 23, 59)), datetime(2025, 1, 1, 0, 0))
+
+    def test_day_of_month_or_day_of_week(self):
+        # both restricted: either one matching is enough (the 13th, or any Friday)
+        cron = CronExpression("0 12 13 * fri")
+        start = datetime(2024, 9, 1)  # a Sunday
+        self.assertEqual(cron.next_after(start), datetime(2024, 9, 6, 12, 0))  # Friday the 6th
+        self.assertEqual(cron.next_after(datetime(2024, 9, 12, 13, 0)), datetime(2024, 9, 13, 12, 0))  # a Friday
+        self.assertEqual(cron.next_after(datetime(2024, 10, 11, 13, 0)), datetime(2024, 10, 13, 12, 0))  # a Sunday
+
+    def test_day_of_week_alone_restricts(self):
+        # day-of-month '*': only the weekday counts
+        cron = CronExpression("0 9 * * mon")
+        self.assertEqual(cron.next_after(datetime(2024, 9, 3, 10, 0)), datetime(2024, 9, 9, 9, 0))
+
+    def test_day_of_month_alone_restricts(self):
+        cron = CronExpression("0 9 31 * *")
+        self.assertEqual(cron.next_after(datetime(2024, 4, 1)), datetime(2024, 5, 31, 9, 0))
+
+    def test_leap_day(self):
+        cron = CronExpression("0 0 29 2 *")
+        self.assertEqual(cron.next_after(datetime(2024, 3, 1)), datetime(2028, 2, 29, 0, 0))
+
+    def test_never_matches(self):
+        with self.assertRaises(ValueError):
+            CronExpression("0 0 31 2 *").next_after(datetime(2024, 1, 1))
+
+
+class ParseScheduleTest(unittest.TestCase):
+    def test_number_is_an_interval_in_minutes(self):
+        self.assertIsInstance(parse_schedule("90"), Interval)
+        self.assertEqual(parse_schedule(" 1.5 ").minutes, 1.5)
+        self.assertEqual(parse_schedule(60).minutes, 60)
+
+    def test_anything_else_is_cron(self):
+        self.assertIsInstance(parse_schedule("0 2 * * *"), CronExpression)
+        with self.assertRaises(ValueError):
+            parse_schedule("-5")
+        with self.assertRaises(ValueError):
+            parse_schedule("soon")
+
+
+class FakeClock:
+    """Stands in for the time module: a monotonic clock and a wall clock moved by hand."""
+
+    def __init__(self):
+        self.mono = 1000.0
+        self.wall = 1_700_000_000.0
+
+    def monotonic(self):
+        return self.mono
+
+    def time(self):
+        return self.wall
+
+    def advance(self, seconds, asleep=False):
+        self.wall += seconds
+        if not asleep:
+            self.mono += seconds  # the monotonic clock stands still while suspended
+
+
+class BackupSchedulerTest(unittest.TestCase):
+    def setUp(self):
+        self.clock = FakeClock()
+        patcher = mock.patch.object(schedule, "time", self.clock)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_interval_stays_on_its_grid(self):
+        sched = BackupScheduler(Interval(10))
+        self.assertFalse(sched.due())
+        self.assertEqual(sched.seconds_left(), 600)
+        self.clock.advance(605)  # the tick came a little late
+        self.assertTrue(sched.due())
+        self.assertEqual(sched.consume(), 0)
+        self.assertEqual(sched.seconds_left(), 595)  # next slot is 1200 s after start, not 605 + 600
+
+    def test_interval_folds_missed_slots(self):
+        sched = BackupScheduler(Interval(10))
+        self.clock.advance(3 * 600 + 30)
+        self.assertEqual(sched.consume(), 2)
+        self.assertEqual(sched.seconds_left(), 570)
+
+    def test_time_asleep_counts_as_waited(self):
+        sched = BackupScheduler(Interval(10))
+        self.clock.advance(60)
+        self.assertEqual(sched.seconds_left(), 540)
+        self.clock.advance(1200, asleep=True)
+        self.assertTrue(sched.due())
+        self.assertEqual(sched.consume(), 1)
+
+    def test_small_clock_jitter_is_not_sleep(self):
+        sched = BackupScheduler(Interval(10))
+        self.clock.wall += BackupScheduler.SLEEP_THRESHOLD - 1
+        self.assertEqual(sched.seconds_left(), 600)
+
+    def test_wall_clock_change_does_not_move_an_interval_forward(self):
+        sched = BackupScheduler(Interval(10))
+        self.clock.wall -= 3600  # clock set back an hour
+        self.assertEqual(sched.seconds_left(), 600)
+
+    def test_cron_waits_for_its_slot(self):
+        sched = BackupScheduler(CronExpression("* * * * *"))
+        self.assertFalse(sched.due())
+        self.assertLessEqual(sched.seconds_left(), 60)
+
+    def test_cron_catches_up_a_run_missed_while_closed(self):
+        last_run = datetime.now() - timedelta(hours=2)
+        sched = BackupScheduler(CronExpression("* * * * *"), last_run=last_run)
+        self.assertTrue(sched.due())
+        self.assertEqual(sched.consume(), 1)
+        self.assertFalse(sched.due())
+
+    def test_cron_nothing_missed_since_last_run(self):
+        sched = BackupScheduler(CronExpression("0 0 1 1 *"), last_run=datetime.now())
+        self.assertFalse(sched.due())
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,117 @@
+# test_snapshots.py
+import os
+import shutil
+import tempfile
+import unittest
+from datetime import datetime, timedelta
+
+from snapshots import SnapshotSet, select_keep
+
+
+def hours_back(start, count, step=1):
+    return [start - timedelta(hours=i * step) for i in range(count)]
+
+
+class SelectKeepTest(unittest.TestCase):
+    def test_empty(self):
+        self.assertEqual(select_keep([], last=3, daily=7), set())
+
+    def test_all_zero_keeps_everything(self):
+        stamps = hours_back(datetime(2024, 6, 1, 12), 10)
+        self.assertEqual(select_keep(stamps), set(stamps))
+
+    def test_last(self):
+        stamps = hours_back(datetime(2024, 6, 1, 12), 10)
+        self.assertEqual(select_keep(stamps, last=3), set(stamps[:3]))
+
+    def test_order_of_input_does_not_matter(self):
+        stamps = hours_back(datetime(2024, 6, 1, 12), 10)
+        self.assertEqual(select_keep(list(reversed(stamps)), last=2), set(stamps[:2]))
+
+    def test_newest_always_kept(self):
+        stamps = [datetime(2024, 6, 1, 12, 0), datetime(2024, 6, 1, 12, 30)]
+        # one daily bucket, whose newest member is also the newest overall
+        self.assertEqual(select_keep(stamps, daily=1), {stamps[1]})
+        self.assertEqual(select_keep(stamps, weekly=1), {stamps[1]})
+
+    def test_hourly_keeps_the_newest_of_each_hour(self):
+        base = datetime(2024, 6, 1, 10)
+        stamps = [base + timedelta(minutes=m) for m in (0, 20, 40, 60, 80, 100)]
+        keep = select_keep(stamps, hourly=2)
+        self.assertEqual(keep, {base + timedelta(minutes=100), base + timedelta(minutes=40)})
+
+    def test_buckets_without_snapshots_are_not_counted(self):
+        # the machine was off for days: "daily=3" still means three days that have a snapshot
+        stamps = [datetime(2024, 6, 20, 9), datetime(2024, 6, 10, 9), datetime(2024, 6, 1, 9), datetime(2024, 5, 1, 9)]
+        self.assertEqual(select_keep(stamps, daily=3), set(stamps[:3]))
+
+    def test_daily_across_midnight(self):
+        stamps = [datetime(2024, 6, 2, 0, 5), datetime(2024, 6, 1, 23, 55), datetime(2024, 6, 1, 8, 0)]
+        self.assertEqual(select_keep(stamps, daily=2), {stamps[0], stamps[1]})
+
+    def test_weekly_uses_iso_weeks_across_new_year(self):
+        # Monday 2024-12-30 and Thursday 2025-01-02 are both in ISO week 2025-W01
+        stamps = [datetime(2025, 1, 2, 9), datetime(2024, 12, 30, 9), datetime(2024, 12, 29, 9)]
+        self.assertEqual(select_keep(stamps, weekly=2), {stamps[0], stamps[2]})
+
+    def test_rules_are_combined(self):
+        base = datetime(2024, 6, 30, 18)  # a Sunday
+        stamps = hours_back(base, 24 * 30)  # hourly snapshots for 30 days
+        keep = select_keep(stamps, last=2, hourly=6, daily=7, weekly=4)
+        hourly = set(stamps[:6])
+        # the newest of each day: today's is the newest overall, earlier days' are at 23:00
+        daily = {base} | {datetime(2024, 6, 30 - day, 23) for day in range(1, 7)}
+        # the newest of each ISO week: this week's, then the Sundays before
+        weekly = {base} | {datetime(2024, 6, day, 23) for day in (23, 16, 9)}
+        self.assertEqual(keep, hourly | daily | weekly)
+
+
+class SnapshotSetTest(unittest.TestCase):
+    def setUp(self):
+        self.destination = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.destination, True)
+        self.snapshots = SnapshotSet(self.destination)
+        os.makedirs(self.snapshots.root)
+
+    def make(self, name):
+        path = os.path.join(self.snapshots.root, name)
+        os.makedirs(path)
+        with open(os.path.join(path, "file.txt"), "w") as f:
+            f.write(name)
+        return path
+
+    def test_lists_complete_snapshots_only(self):
+        self.make("2024-06-01_100000")
+        self.make("2024-06-02_100000")
+        self.make("2024-06-03_100000" + SnapshotSet.PARTIAL)
+        self.make("notes")
+        names = [os.path.basename(p) for _, p in self.snapshots.snapshots()]
+        self.assertEqual(names, ["2024-06-01_100000", "2024-06-02_100000"])
+        self.assertEqual(os.path.basename(self.snapshots.latest()), "2024-06-02_100000")
+        self.assertEqual(len(self.snapshots.partials()), 1)
+
+    def test_prune(self):
+        for day in range(1, 6):
+            self.make(f"2024-06-0{day}_100000")
+        self.make("notes")
+        removed = self.snapshots.prune(last=2)
+        self.assertEqual(sorted(os.path.basename(p) for p in removed),
+                         ["2024-06-01_100000", "2024-06-02_100000", "2024-06-03_100000"])
+        self.assertEqual(sorted(os.listdir(self.snapshots.root)), ["2024-06-04_100000", "2024-06-05_100000", "notes"])
+
+    def test_begin_discards_partials_and_links_from_latest(self):
+        base = self.make("2024-06-01_100000")
+        self.make("2024-06-02_100000" + SnapshotSet.PARTIAL)
+        run = self.snapshots.begin()
+        self.assertTrue(run.path.endswith(SnapshotSet.PARTIAL))
+        self.assertEqual(self.snapshots.partials(), [run.path])
+        self.assertEqual(run.base, base)
+        self.assertTrue(run.link("file.txt", os.path.join(run.path, "file.txt")))
+        self.assertFalse(run.link("missing.txt", os.path.join(run.path, "missing.txt")))
+        run.commit()
+        self.assertEqual(self.snapshots.latest(), run.final)
+        self.assertEqual(os.stat(os.path.join(run.final, "file.txt")).st_nlink, 2)
+
+
+if __name__ == "__main__":
+    unittest.main()